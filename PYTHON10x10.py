@@ -1,5 +1,15 @@
 import pygame
 import sys
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import crossword_journal
+import crossword_profile
+import crossword_queue
+from crossword_model import GRID_SIZE, CrosswordPuzzle, CrosswordSession
 
 # --- Constants ---
 # Colors
@@ -10,457 +20,623 @@ LIGHT_BLUE = (173, 216, 230)
 DARK_BLUE = (0, 0, 139)
 YELLOW = (255, 255, 0)
 RED = (255, 0, 0)
+ORANGE = (255, 140, 0)
 
-# Grid dimensions
-GRID_SIZE = 10
+# Grid dimensions at the default window size for a 10x10 puzzle; other
+# puzzle sizes and window sizes scale the cells (see CrosswordGame._apply_layout)
 CELL_SIZE = 50  # Increased for better visibility
 MARGIN = 5
 NUMBER_OFFSET = 3
 GRID_WIDTH = GRID_SIZE * (CELL_SIZE + MARGIN) + MARGIN
 GRID_HEIGHT = GRID_SIZE * (CELL_SIZE + MARGIN) + MARGIN
 
-# Clue area dimensions
+# Clue area dimensions (the clue area grows to fill any height the grid leaves)
 CLUE_AREA_HEIGHT = 200
 INFO_AREA_HEIGHT = 50
 
-# Screen dimensions
+# Default window dimensions
 SCREEN_WIDTH = GRID_WIDTH
 SCREEN_HEIGHT = GRID_HEIGHT + CLUE_AREA_HEIGHT + INFO_AREA_HEIGHT
+MIN_SCREEN_WIDTH = 320
+
+# Fonts (loaded lazily by _init_fonts on first render)
+FONT_LETTER = None
+FONT_NUMBER = None
+FONT_CLUE = None
+FONT_INFO = None
+
+
+def _init_fonts():
+    """Initialises the font module and loads the fonts the first time they are needed."""
+    global FONT_LETTER, FONT_NUMBER, FONT_CLUE, FONT_INFO
+    if FONT_LETTER is not None:
+        return
+    pygame.font.init() # Initialize font module
+    try:
+        FONT_LETTER = pygame.font.SysFont('arial', 35)
+        FONT_NUMBER = pygame.font.SysFont('arial', 15)
+        FONT_CLUE = pygame.font.SysFont('arial', 20)
+        FONT_INFO = pygame.font.SysFont('arial', 18)
+    except pygame.error as e:
+        print(f"Warning: System font 'arial' not found. Using default font. Error: {e}")
+        FONT_LETTER = pygame.font.Font(None, 45) # Default font if Arial is not found
+        FONT_NUMBER = pygame.font.Font(None, 20)
+        FONT_CLUE = pygame.font.Font(None, 25)
+        FONT_INFO = pygame.font.Font(None, 22)
+
+
+_SCALED_FONTS = {} # size -> font, for cells drawn at other than CELL_SIZE
+
+def _scaled_font(size):
+    """Arial at size (pygame's default font at a matching size if Arial is missing), cached."""
+    font = _SCALED_FONTS.get(size)
+    if font is None:
+        try:
+            font = pygame.font.SysFont('arial', size)
+        except pygame.error:
+            font = pygame.font.Font(None, size * 9 // 7) # Same ratio as the fallbacks above
+        _SCALED_FONTS[size] = font
+    return font
+
+class GlyphCache:
+    """Bounded LRU cache of rendered text surfaces keyed by (font, text, colour)."""
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, colour):
+        """Returns an antialiased surface for text, rendering it only on a cache miss."""
+        key = (font, text, colour)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, True, colour)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False) # Evict least recently used
+        return surf
+
+    def stats(self):
+        """Returns a dict of hit/miss counters and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._surfaces), "max_size": self.max_size}
+
+
+# Height of the strip at the top of the clue area that shows the active clue
+ACTIVE_CLUE_HEIGHT = 38
+# Offset of the first clue row below the top of the clue area (under the column headers)
+CLUE_LIST_TOP = 65
+CLUE_ROW_SPACING = 2
+WHEEL_ROWS = 3 # clue rows scrolled per mouse wheel step
+NET_EVENT = pygame.USEREVENT + 1 # posted by the co-solve client's reader thread
+INPUT_EVENTS = (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEWHEEL) # stamped for input latency
+
+
+@dataclass
+class ClueColumn:
+    """One clue list laid out once: rows of (y, text) from the top of the list, in order."""
+    x: int
+    rows: list
+    row_ys: list # y of each row, for bisecting to the first visible one
+    height: int
+    word_ys: dict # id(word) -> (y of its first row, y below its last row)
+
+
+@dataclass
+class GridLayout:
+    """Geometry of a puzzle's grid fitted into a window (see grid_layout)."""
+    screen_width: int
+    screen_height: int
+    margin: int
+    cell_size: int
+    grid_width: int
+    grid_height: int
+    grid_left: int
+    clue_area_height: int
+    number_offset: int
+
+
+def grid_layout(rows, cols, width, height):
+    """Sizes the cells of a rows x cols grid to fit into a width x height window."""
+    width = max(width, MIN_SCREEN_WIDTH)
+    height = max(height, CLUE_AREA_HEIGHT + INFO_AREA_HEIGHT + 100)
+    grid_area_height = height - CLUE_AREA_HEIGHT - INFO_AREA_HEIGHT
+    step = max(4, min((width - MARGIN) // cols, (grid_area_height - MARGIN) // rows))
+    margin = max(1, step * MARGIN // (CELL_SIZE + MARGIN))
+    cell_size = step - margin
+    grid_width = cols * step + margin
+    grid_height = rows * step + margin
+    return GridLayout(width, height, margin, cell_size, grid_width, grid_height, (width - grid_width) // 2,
+                      height - grid_height - INFO_AREA_HEIGHT, max(1, NUMBER_OFFSET * cell_size // CELL_SIZE))
+
+
+def clue_lines(font, clue_text, x, right_edge, cache):
+    """Returns the wrapped lines for a clue starting at x, cached per (text, x, right_edge)."""
+    key = (clue_text, x, right_edge)
+    lines = cache.get(key)
+    if lines is None:
+        # Simple wrapping (split by space) if wider than the column;
+        # continuation lines are indented
+        lines = []
+        line = ""
+        for w in clue_text.split(' '):
+            candidate = f"{line} {w}" if line else w
+            if line and x + font.size(candidate)[0] > right_edge:
+                lines.append(line)
+                line = "   " + w
+            else:
+                line = candidate
+        lines.append(line)
+        cache[key] = lines
+    return lines
+
+
+def layout_clue_columns(puzzle, screen_width, font, cache):
+    """Wraps every clue of puzzle once for a window screen_width wide; returns the across and down ClueColumns."""
+    line_height = font.get_height()
+    half = screen_width // 2
+    columns = []
+    for clues, x, right_edge in ((puzzle.across_clues_display, MARGIN + 20, half - 10),
+                                 (puzzle.down_clues_display, half + 20, screen_width - 10)):
+        rows, word_ys = [], {}
+        y = 0
+        for num, clue, word in clues:
+            top = y
+            for line in clue_lines(font, f"{num}. {clue}", x, right_edge, cache):
+                rows.append((y, line))
+                y += line_height
+            word_ys[id(word)] = (top, y)
+            y += CLUE_ROW_SPACING # spacing
+        columns.append(ClueColumn(x, rows, [row[0] for row in rows], y, word_ys))
+    return columns
+
+
+def _clue_font_copy():
+    """A second FONT_CLUE for the preloader thread (a font must not be used from two threads).
+
+    Returns None if the copy would measure text differently, in which case
+    clues are wrapped on the main thread when a puzzle is first drawn.
+    """
+    try:
+        font = pygame.font.SysFont('arial', 20)
+    except pygame.error:
+        font = pygame.font.Font(None, 25)
+    sample = "12. The quick brown fox jumps over the lazy dog"
+    if font.size(sample) != FONT_CLUE.size(sample) or font.get_height() != FONT_CLUE.get_height():
+        return None
+    return font
+
+
+@dataclass
+class PreparedPuzzle:
+    """A queued puzzle ready to play: parsed, progress restored, grid and clues laid out."""
+    position: int
+    puzzle: CrosswordPuzzle
+    session: CrosswordSession
+    journal: object # crossword_journal.SessionJournal, or None without autosave
+    layout: GridLayout
+    clue_columns: list # empty if the clues are wrapped on first draw
+    clue_scroll: list
 
-# Fonts
-pygame.font.init() # Initialize font module
-try:
-    FONT_LETTER = pygame.font.SysFont('arial', 35)
-    FONT_NUMBER = pygame.font.SysFont('arial', 15)
-    FONT_CLUE = pygame.font.SysFont('arial', 20)
-    FONT_INFO = pygame.font.SysFont('arial', 18)
-except pygame.error as e:
-    print(f"Warning: System font 'arial' not found. Using default font. Error: {e}")
-    FONT_LETTER = pygame.font.Font(None, 45) # Default font if Arial is not found
-    FONT_NUMBER = pygame.font.Font(None, 20)
-    FONT_CLUE = pygame.font.Font(None, 25)
-    FONT_INFO = pygame.font.Font(None, 22)
-
-
-# --- Crossword Data ---
-# (word, clue, start_row, start_col, direction ('A' or 'D'))
-# Numbering will be assigned automatically
-WORDS_DATA = [
-    ("PYTHON", "Popular programming language", 0, 0, "A"),
-    ("GRID", "Network of lines for the puzzle", 0, 0, "D"),
-    ("LOOP", "Repeated execution of code", 2, 1, "A"),
-    ("TEXT", "Written words or characters", 0, 3, "D"),
-    ("EVENT", "Something that happens, in Pygame", 4, 3, "A"),
-    ("ARRAY", "Ordered series or arrangement", 2, 6, "D"),
-    ("TEN", "Number of rows/columns in this grid", 6, 0, "A"),
-    ("SET", "To put or place something", 6, 0, "D"), # Shares 'T' with TEN
-    ("INPUT", "Data entered into a system", 8, 2, "A"),
-    ("MOUSE", "Computer pointing device", 4, 5, "D"), # Shares 'E' with EVENT
-    ("CELL", "A single box in the grid", 0, 8, "D"),
-    ("pygame", "Library used for this game", 6, 4, "A") #pygame word
-]
 
 class CrosswordGame:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("10x10 Crossword Puzzle")
-
-        self.puzzle_grid = [['#' for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)] # '#' for black, ' ' for white
-        self.solution_grid = [['' for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.user_grid = [['' for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.number_grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)] # Stores word numbers
-
-        self.words = [] # Will store processed word objects
-        self.active_cell = None # (row, col)
-        self.active_direction = "A" # "A" for across, "D" for down
-        self.current_word_highlight = [] # list of (r,c) tuples for the active word
-
-        self._prepare_puzzle()
-
-        self.across_clues_display = [] # (number, clue_text, word_obj)
-        self.down_clues_display = []   # (number, clue_text, word_obj)
-        self._prepare_clue_lists()
-
-        self.active_clue_text = ""
-
-    def _prepare_puzzle(self):
-        """Populates the puzzle_grid, solution_grid, and number_grid based on WORDS_DATA."""
-        word_starts = {} # (row, col) -> number
-        current_word_number = 1
-
-        # Sort words to assign numbers consistently (optional, but good for predictability)
-        # Typically, words are numbered left-to-right, top-to-bottom.
-        sorted_words_data = sorted(WORDS_DATA, key=lambda x: (x[2], x[3]))
-
-        for word_str, clue, r_start, c_start, direction in sorted_words_data:
-            word_obj = {
-                "text": word_str.upper(),
-                "clue": clue,
-                "row": r_start,
-                "col": c_start,
-                "direction": direction,
-                "number": 0, # Will be assigned
-                "cells": [] # List of (r,c) tuples
-            }
-
-            # Assign word number if it's a new starting cell
-            if (r_start, c_start) not in word_starts:
-                word_starts[(r_start, c_start)] = current_word_number
-                self.number_grid[r_start][c_start] = current_word_number
-                word_obj["number"] = current_word_number
-                current_word_number += 1
-            else:
-                word_obj["number"] = word_starts[(r_start, c_start)]
-
-
-            for i, char_w in enumerate(word_str.upper()):
-                if direction == "A": # Across
-                    r, c = r_start, c_start + i
-                else: # Down
-                    r, c = r_start + i, c_start
-
-                if 0 <= r < GRID_SIZE and 0 <= c < GRID_SIZE:
-                    self.puzzle_grid[r][c] = ' ' # Mark as usable cell
-                    self.solution_grid[r][c] = char_w
-                    word_obj["cells"].append((r,c))
-                else:
-                    print(f"Error: Word '{word_str}' at ({r_start},{c_start}) goes out of bounds.")
-                    # Handle error or skip word
-                    continue
-            self.words.append(word_obj)
-
-    def _prepare_clue_lists(self):
-        """Populates the lists of clues for display."""
-        seen_numbers_across = set()
-        seen_numbers_down = set()
-
-        # Sort words by number for ordered clue list
-        sorted_words = sorted(self.words, key=lambda w: w["number"])
-
-        for word_obj in sorted_words:
-            num = word_obj["number"]
-            clue = word_obj["clue"]
-            if word_obj["direction"] == "A" and num not in seen_numbers_across:
-                self.across_clues_display.append((num, clue, word_obj))
-                seen_numbers_across.add(num)
-            elif word_obj["direction"] == "D" and num not in seen_numbers_down:
-                self.down_clues_display.append((num, clue, word_obj))
-                seen_numbers_down.add(num)
-        
-        # Further sort by number just in case (though primary sort should handle it)
-        self.across_clues_display.sort(key=lambda x: x[0])
-        self.down_clues_display.sort(key=lambda x: x[0])
-
+    """Pygame view over a CrosswordSession: draws the puzzle and turns input into session calls."""
+
+    def __init__(self, full_redraw=False, puzzle=None, profiler=None, profile_out=None, overlay=False,
+                 save_path=None, client=None, queue=None, save_dir=None, start=0, preload=3, cache=8):
+        self.screen = None # Display is opened lazily on first render
+
+        # Puzzle queue (crossword_queue.PuzzleQueue): PageUp/PageDown and the F6 picker
+        # move through it. A worker thread prepares the next `preload` puzzles
+        # (autosaved under save_dir) and keeps up to `cache` of them.
+        self.queue = queue
+        self.preloader = None
+        self.prepared = None # the current PreparedPuzzle in queue mode
+        self.picker = None # highlighted queue position while the picker is open
+        self.message = None # shown in the info bar until the next key press or click
+        if queue is not None:
+            prepared = self._start_queue(queue, save_dir, start, preload, cache)
+            self.puzzle, self.session, self.journal = prepared.puzzle, prepared.session, prepared.journal
+        else:
+            self.puzzle = puzzle if puzzle is not None else CrosswordPuzzle()
+            self.session = CrosswordSession(self.puzzle)
+
+            # Autosave (crossword_journal.SessionJournal): restores earlier progress now,
+            # records every letter change and drives Ctrl+Z / Ctrl+Y
+            self.journal = None
+            if save_path:
+                self.journal = crossword_journal.SessionJournal(self.session, save_path)
+                self.journal.restore()
+
+        # Co-solve client (crossword_server.CoSolveClient): the server's letters replace
+        # ours, local edits are sent to it and remote ones arrive as NET_EVENTs
+        self.client = client
+        if client:
+            client.attach(self.session, notify=self._post_net_event)
+
+        # Opt-in frame profiling (crossword_profile.FrameProfiler). With no
+        # profiler every hook below is a single falsy check.
+        self.profiler = profiler
+        self.profile_out = profile_out # JSON dump written when run() exits
+        self.overlay = overlay and profiler is not None # F12 toggles it while profiling
+        self.input_stamps = [] # stamps of the inputs handled this frame, for the profiler's input latency
+
+        # Rendering mode: full_redraw repaints everything at 30 FPS (the original loop),
+        # otherwise run() waits for events and repaints only what changed.
+        self.full_redraw = full_redraw
+        self.dirty_cells = set() # (r,c) cells to repaint on the next update
+        self.clue_dirty = False # active clue strip needs repainting
+        self.info_dirty = False # info bar needs repainting
+        self.full_dirty = True # whole window needs repainting (first frame, expose)
+
+        self.glyphs = GlyphCache() # rendered letters, numbers and clue lines
+        self.clue_layout_cache = {} # (clue_text, x, right_edge) -> wrapped lines
+        self.clue_columns = [] # across and down ClueColumn, laid out by _layout_clues
+        self.clue_scroll = [0, 0] # pixels scrolled in each clue column
+        self.clue_lists_dirty = False # clue lists need repainting (scrolled)
+        if queue is not None:
+            self._activate(prepared)
+        else:
+            self._apply_layout(SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    def _apply_layout(self, width, height):
+        """Sizes the grid cells to fit the puzzle into a width x height window."""
+        self._use_layout(grid_layout(self.puzzle.height, self.puzzle.width, width, height))
+        self.clue_columns = [] # re-laid out for the new width on the next draw
+
+    def _use_layout(self, layout):
+        self.layout = layout
+        self.screen_width, self.screen_height = layout.screen_width, layout.screen_height
+        self.margin = layout.margin
+        self.cell_size = layout.cell_size
+        self.grid_width = layout.grid_width
+        self.grid_height = layout.grid_height
+        self.grid_left = layout.grid_left
+        self.clue_area_height = layout.clue_area_height
+        self.number_offset = layout.number_offset
+        self.full_dirty = True
+
+    # --- Puzzle queue ---
+
+    def _start_queue(self, queue, save_dir, start, preload, cache):
+        """Starts the preloader and returns the first puzzle, prepared here."""
+        self.save_dir = save_dir
+        self.screen_width, self.screen_height = SCREEN_WIDTH, SCREEN_HEIGHT # what the worker lays out for
+        _init_fonts()
+        self._prep_font = _clue_font_copy() # only ever used under _prep_lock
+        self._prep_lock = threading.Lock()
+        self._prep_clue_cache = {}
+        # Autosaved sessions by crossword_journal.puzzle_key: the same puzzle at two positions
+        # shares one session and journal, [session, journal, prepared puzzles using them]
+        self._journals = {}
+        self._journals_lock = threading.Lock()
+        self.preloader = crossword_queue.Preloader(self._prepare, len(queue), ahead=preload, capacity=cache,
+                                                   discard=self._discard)
+        return self.preloader.get(start)
+
+    def _prepare(self, position):
+        """Builds the PreparedPuzzle for a queue position; runs on the preloader's worker thread
+        (or on the main thread when a switch finds nothing prepared)."""
+        puzzle = CrosswordPuzzle(self.queue.load(position))
+        journal = None
+        if self.save_dir:
+            key = crossword_journal.puzzle_key(puzzle)
+            with self._journals_lock:
+                shared = self._journals.get(key)
+                if shared is None:
+                    session = CrosswordSession(puzzle)
+                    path = crossword_journal.default_path(puzzle, self.save_dir)
+                    journal = crossword_journal.SessionJournal(session, path)
+                    journal.restore()
+                    shared = self._journals[key] = [session, journal, 0]
+                shared[2] += 1
+                session, journal = shared[0], shared[1]
+                puzzle = session.puzzle
+        else:
+            session = CrosswordSession(puzzle)
+        layout = grid_layout(puzzle.height, puzzle.width, self.screen_width, self.screen_height)
+        columns = []
+        if self._prep_font is not None:
+            with self._prep_lock:
+                if len(self._prep_clue_cache) > 4096:
+                    self._prep_clue_cache.clear()
+                columns = layout_clue_columns(puzzle, layout.screen_width, self._prep_font, self._prep_clue_cache)
+        return PreparedPuzzle(position, puzzle, session, journal, layout, columns, [0, 0])
+
+    def _discard(self, prepared):
+        """Called by the preloader for puzzles it evicts (and for all of them on close)."""
+        if prepared.journal:
+            with self._journals_lock:
+                shared = self._journals[prepared.journal.key]
+                shared[2] -= 1
+                if not shared[2]: # no other position has this puzzle
+                    del self._journals[prepared.journal.key]
+                    prepared.journal.close()
+
+    def _activate(self, prepared):
+        """Makes a prepared puzzle the current one: a few assignments, nothing is parsed or laid out."""
+        if self.prepared is not None: # keep the outgoing puzzle's clue layout and scroll for coming back
+            self.prepared.layout, self.prepared.clue_columns = self.layout, self.clue_columns
+        self.prepared = prepared
+        self.puzzle, self.session, self.journal = prepared.puzzle, prepared.session, prepared.journal
+        layout = prepared.layout
+        if (layout.screen_width, layout.screen_height) != (self.screen_width, self.screen_height):
+            # Laid out for another window size (resized since); the grid is cheap, clues wrap on first draw
+            if layout.screen_width != self.screen_width:
+                prepared.clue_columns = []
+            layout = grid_layout(self.puzzle.height, self.puzzle.width, self.screen_width, self.screen_height)
+        self._use_layout(layout)
+        self.clue_columns, self.clue_scroll = prepared.clue_columns, prepared.clue_scroll
+        self.dirty_cells.clear()
+        self.session.changed.clear()
+        if self.screen is not None:
+            pygame.display.set_caption(self.puzzle.title or "Crossword Puzzle")
+
+    def _go_to(self, position):
+        """Switches to another puzzle of the queue."""
+        if not 0 <= position < len(self.queue) or position == self.prepared.position:
+            return
+        try:
+            prepared = self.preloader.get(position)
+        except Exception as e: # unreadable or invalid file: say so and stay on this puzzle
+            self.message = f"Cannot open puzzle {position + 1}: {e}"
+            self.info_dirty = True
+            return
+        if self.journal:
+            self.journal.sync() # it may sit in the cache a while before it is closed
+        self._activate(prepared)
+
+    def _cell_fonts(self):
+        """Letter and number fonts for the current cell size."""
+        if self.cell_size == CELL_SIZE:
+            return FONT_LETTER, FONT_NUMBER
+        return (_scaled_font(max(6, 35 * self.cell_size // CELL_SIZE)),
+                _scaled_font(max(6, 15 * self.cell_size // CELL_SIZE)))
+
+    def _ensure_display(self):
+        """Initialises pygame, the fonts and the window the first time something is drawn."""
+        if self.screen is None:
+            pygame.init()
+            _init_fonts()
+            self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), pygame.RESIZABLE)
+            pygame.display.set_caption(self.puzzle.title or "Crossword Puzzle")
+
+    def _cell_rect(self, r, c):
+        """Returns the screen rect of cell (r, c)."""
+        step = self.cell_size + self.margin
+        return pygame.Rect(self.grid_left + self.margin + c * step, self.margin + r * step, self.cell_size, self.cell_size)
 
     def _draw_grid(self):
         """Draws the crossword grid, numbers, and letters."""
-        for r in range(GRID_SIZE):
-            for c in range(GRID_SIZE):
-                rect_x = MARGIN + c * (CELL_SIZE + MARGIN)
-                rect_y = MARGIN + r * (CELL_SIZE + MARGIN)
-                cell_rect = pygame.Rect(rect_x, rect_y, CELL_SIZE, CELL_SIZE)
-
-                # Cell color
-                if self.puzzle_grid[r][c] == '#':
-                    pygame.draw.rect(self.screen, BLACK, cell_rect)
-                else:
-                    pygame.draw.rect(self.screen, WHITE, cell_rect)
-                    if self.active_cell and (r,c) == self.active_cell:
-                        pygame.draw.rect(self.screen, YELLOW, cell_rect, 0) # Highlight active cell
-                    elif (r,c) in self.current_word_highlight:
-                         pygame.draw.rect(self.screen, LIGHT_BLUE, cell_rect, 0) # Highlight active word
-
-                    # Draw cell border
-                    pygame.draw.rect(self.screen, GRAY, cell_rect, 1)
-
-
-                    # Draw word number
-                    if self.number_grid[r][c] != 0:
-                        num_surf = FONT_NUMBER.render(str(self.number_grid[r][c]), True, BLACK)
-                        self.screen.blit(num_surf, (rect_x + NUMBER_OFFSET, rect_y + NUMBER_OFFSET))
-
-                    # Draw user's letter
-                    if self.user_grid[r][c] != '':
-                        letter_surf = FONT_LETTER.render(self.user_grid[r][c].upper(), True, DARK_BLUE)
-                        text_rect = letter_surf.get_rect(center=cell_rect.center)
-                        self.screen.blit(letter_surf, text_rect)
+        highlight = set(self.session.current_word_highlight)
+        for r in range(self.puzzle.height):
+            for c in range(self.puzzle.width):
+                self._draw_cell(r, c, highlight)
+
+    def _draw_cell(self, r, c, highlight):
+        """Draws a single cell and returns its rect."""
+        cell_rect = self._cell_rect(r, c)
+
+        # Cell color
+        if not self.puzzle.is_white(r, c):
+            pygame.draw.rect(self.screen, BLACK, cell_rect)
+        else:
+            pygame.draw.rect(self.screen, WHITE, cell_rect)
+            if self.session.active_cell and (r,c) == self.session.active_cell:
+                pygame.draw.rect(self.screen, YELLOW, cell_rect, 0) # Highlight active cell
+            elif (r,c) in highlight:
+                 pygame.draw.rect(self.screen, LIGHT_BLUE, cell_rect, 0) # Highlight active word
+
+            # Draw cell border, thick where another player's cursor is
+            pygame.draw.rect(self.screen, GRAY, cell_rect, 1)
+            if self.client and r * self.puzzle.width + c in self.client.cursor_cells:
+                pygame.draw.rect(self.screen, ORANGE, cell_rect, 3)
+
+
+            # Draw word number
+            font_letter, font_number = self._cell_fonts()
+            number = self.puzzle.number_at(r, c)
+            if number != 0:
+                num_surf = self.glyphs.render(font_number, str(number), BLACK)
+                self.screen.blit(num_surf, (cell_rect.x + self.number_offset, cell_rect.y + self.number_offset))
+
+            # Draw user's letter
+            letter = self.session.letter_at(r, c)
+            if letter != '':
+                # Letters found wrong by a word check stay red until they are retyped
+                colour = RED if r * self.puzzle.width + c in self.session.checked_wrong else DARK_BLUE
+                letter_surf = self.glyphs.render(font_letter, letter, colour)
+                text_rect = letter_surf.get_rect(center=cell_rect.center)
+                self.screen.blit(letter_surf, text_rect)
+        return cell_rect
 
     def _draw_clues(self):
         """Draws the clue lists and the active clue."""
-        clue_area_rect = pygame.Rect(0, GRID_HEIGHT, SCREEN_WIDTH, CLUE_AREA_HEIGHT)
+        clue_area_rect = pygame.Rect(0, self.grid_height, self.screen_width, self.clue_area_height)
         pygame.draw.rect(self.screen, GRAY, clue_area_rect) # Background for clue area
 
-        # Active Clue Display
-        if self.active_clue_text:
-            active_clue_surf = FONT_CLUE.render(f"Clue: {self.active_clue_text}", True, BLACK)
-            active_clue_rect = active_clue_surf.get_rect(centerx=clue_area_rect.centerx, top=clue_area_rect.top + 10)
-            self.screen.blit(active_clue_surf, active_clue_rect)
+        self._draw_active_clue()
 
         # Column headers
-        across_header_surf = FONT_CLUE.render("Across", True, BLACK)
-        down_header_surf = FONT_CLUE.render("Down", True, BLACK)
-        self.screen.blit(across_header_surf, (MARGIN + 20, clue_area_rect.top + 40))
-        self.screen.blit(down_header_surf, (SCREEN_WIDTH // 2 + 20, clue_area_rect.top + 40))
-
-        # Display Across Clues
-        y_offset_clue = clue_area_rect.top + 65
-        for num, clue, _ in self.across_clues_display:
-            if y_offset_clue < clue_area_rect.bottom - 20: # Check if there's space
-                clue_text = f"{num}. {clue}"
-                clue_surf = FONT_CLUE.render(clue_text, True, BLACK)
-                clue_width = clue_surf.get_width()
-                # Simple wrapping (split by space)
-                if MARGIN + 20 + clue_width > SCREEN_WIDTH // 2 - 10: # if wider than half screen
-                    words_in_clue = clue_text.split(' ')
-                    line1 = ""
-                    line2_list = []
-                    for i, w in enumerate(words_in_clue):
-                        if FONT_CLUE.size(line1 + w)[0] < (SCREEN_WIDTH // 2 - 30):
-                            line1 += w + " "
-                        else:
-                            line2_list = words_in_clue[i:]
-                            break
-                    
-                    clue_surf_l1 = FONT_CLUE.render(line1.strip(), True, BLACK)
-                    self.screen.blit(clue_surf_l1, (MARGIN + 20, y_offset_clue))
-                    y_offset_clue += FONT_CLUE.get_height()
-                    if line2_list and y_offset_clue < clue_area_rect.bottom - 20:
-                         clue_surf_l2 = FONT_CLUE.render("   " + " ".join(line2_list), True, BLACK)
-                         self.screen.blit(clue_surf_l2, (MARGIN + 20, y_offset_clue))
-
-                else:
-                    self.screen.blit(clue_surf, (MARGIN + 20, y_offset_clue))
-                
-                y_offset_clue += FONT_CLUE.get_height() + 2 # spacing
-            else:
-                break # Stop if no more space
-
-        # Display Down Clues
-        y_offset_clue = clue_area_rect.top + 65
-        for num, clue, _ in self.down_clues_display:
-            if y_offset_clue < clue_area_rect.bottom - 20:
-                clue_text = f"{num}. {clue}"
-                clue_surf = FONT_CLUE.render(clue_text, True, BLACK)
-                clue_width = clue_surf.get_width()
-
-                if SCREEN_WIDTH // 2 + 20 + clue_width > SCREEN_WIDTH - 10:
-                    words_in_clue = clue_text.split(' ')
-                    line1 = ""
-                    line2_list = []
-                    for i, w in enumerate(words_in_clue):
-                        if FONT_CLUE.size(line1 + w)[0] < (SCREEN_WIDTH // 2 - 30):
-                            line1 += w + " "
-                        else:
-                            line2_list = words_in_clue[i:]
-                            break
-                    clue_surf_l1 = FONT_CLUE.render(line1.strip(), True, BLACK)
-                    self.screen.blit(clue_surf_l1, (SCREEN_WIDTH // 2 + 20, y_offset_clue))
-                    y_offset_clue += FONT_CLUE.get_height()
-                    if line2_list and y_offset_clue < clue_area_rect.bottom - 20:
-                         clue_surf_l2 = FONT_CLUE.render("   " + " ".join(line2_list), True, BLACK)
-                         self.screen.blit(clue_surf_l2, (SCREEN_WIDTH // 2 + 20, y_offset_clue))
-                else:
-                    self.screen.blit(clue_surf, (SCREEN_WIDTH // 2 + 20, y_offset_clue))
-
-                y_offset_clue += FONT_CLUE.get_height() + 2
-            else:
-                break
-    
+        self.screen.blit(self.glyphs.render(FONT_CLUE, "Across", BLACK), (MARGIN + 20, clue_area_rect.top + 40))
+        self.screen.blit(self.glyphs.render(FONT_CLUE, "Down", BLACK), (self.screen_width // 2 + 20, clue_area_rect.top + 40))
+
+        self._draw_clue_lists()
+
+    def _layout_clues(self):
+        """Wraps every clue once for the current window width."""
+        self.clue_columns = layout_clue_columns(self.puzzle, self.screen_width, FONT_CLUE, self.clue_layout_cache)
+        self._clamp_clue_scroll()
+
+    def _clue_list_rect(self):
+        """The scrolling viewport of both clue columns."""
+        top = self.grid_height + CLUE_LIST_TOP
+        return pygame.Rect(0, top, self.screen_width, max(0, self.grid_height + self.clue_area_height - 5 - top))
+
+    def _clamp_clue_scroll(self):
+        view_height = self._clue_list_rect().height
+        for i, column in enumerate(self.clue_columns):
+            self.clue_scroll[i] = max(0, min(self.clue_scroll[i], column.height - view_height))
+
+    def _draw_clue_lists(self):
+        """Draws the rows of both clue columns that are inside the viewport and returns its rect."""
+        if not self.clue_columns:
+            self._layout_clues()
+        rect = self._clue_list_rect()
+        pygame.draw.rect(self.screen, GRAY, rect)
+        line_height = FONT_CLUE.get_height()
+        self.screen.set_clip(rect) # Rows cut by the viewport edges are drawn partially
+        for column, scroll in zip(self.clue_columns, self.clue_scroll):
+            # Only rows overlapping [scroll, scroll + viewport height) are blitted
+            first = max(0, bisect_right(column.row_ys, scroll - line_height))
+            bottom = scroll + rect.height
+            for y, text in column.rows[first:]:
+                if y >= bottom:
+                    break
+                self.screen.blit(self.glyphs.render(FONT_CLUE, text, BLACK), (column.x, rect.top + y - scroll))
+        self.screen.set_clip(None)
+        return rect
+
+    def _scroll_clues(self, column, delta):
+        """Scrolls one clue column by delta pixels."""
+        if not self.clue_columns:
+            self._layout_clues()
+        before = self.clue_scroll[column]
+        self.clue_scroll[column] += delta
+        self._clamp_clue_scroll()
+        if self.clue_scroll[column] != before:
+            self.clue_lists_dirty = True
+
+    def _scroll_to_word(self, word):
+        """Scrolls the clue column of word just far enough to show its clue."""
+        if word is None:
+            return
+        if not self.clue_columns:
+            self._layout_clues()
+        column = 0 if word.direction == "A" else 1
+        span = self.clue_columns[column].word_ys.get(id(word))
+        if span is None:
+            return
+        top, bottom = span
+        scroll = self.clue_scroll[column]
+        view_height = self._clue_list_rect().height
+        if top < scroll:
+            self._scroll_clues(column, top - scroll)
+        elif bottom > scroll + view_height:
+            self._scroll_clues(column, bottom - scroll - view_height)
+
+    def _draw_active_clue(self):
+        """Draws the active clue strip at the top of the clue area and returns its rect."""
+        strip_rect = pygame.Rect(0, self.grid_height, self.screen_width, ACTIVE_CLUE_HEIGHT)
+        pygame.draw.rect(self.screen, GRAY, strip_rect)
+        if self.session.active_clue_text:
+            active_clue_surf = self.glyphs.render(FONT_CLUE, f"Clue: {self.session.active_clue_text}", BLACK)
+            active_clue_rect = active_clue_surf.get_rect(centerx=strip_rect.centerx, top=strip_rect.top + 10)
+            self.screen.blit(active_clue_surf, active_clue_rect)
+        return strip_rect
+
     def _draw_info_bar(self):
         """Draws an info bar at the bottom."""
-        info_area_rect = pygame.Rect(0, GRID_HEIGHT + CLUE_AREA_HEIGHT, SCREEN_WIDTH, INFO_AREA_HEIGHT)
+        info_area_rect = pygame.Rect(0, self.grid_height + self.clue_area_height, self.screen_width, INFO_AREA_HEIGHT)
         pygame.draw.rect(self.screen, DARK_BLUE, info_area_rect)
         
+        session = self.session
         info_text = "Click a cell or use arrows. Click cell again to toggle direction (Across/Down)."
-        if self.active_cell:
-            r, c = self.active_cell
-            info_text = f"Selected: ({r},{c}) | Direction: {'Across' if self.active_direction == 'A' else 'Down'}"
+        if session.is_solved():
+            info_text = "Puzzle complete!"
+        elif self.client and not self.client.connected:
+            info_text = "Disconnected from the co-solve server"
+        elif session.active_cell:
+            r, c = session.active_cell
+            info_text = (f"Selected: ({r},{c}) | Direction: {'Across' if session.active_direction == 'A' else 'Down'}"
+                         f" | Filled: {session.filled_count}/{session.white_count} | F2 check, F3/F4 reveal")
+        if self.message:
+            info_text = self.message
+        if self.queue is not None:
+            info_text = f"Puzzle {self.prepared.position + 1}/{len(self.queue)} (PgUp/PgDn, F6) | {info_text}"
             
+        # Rendered directly, like the profile overlay: the cell and fill counts change with
+        # nearly every input, and caching each variant would only evict the letters and clues
         info_surf = FONT_INFO.render(info_text, True, WHITE)
         info_rect = info_surf.get_rect(center=info_area_rect.center)
         self.screen.blit(info_surf, info_rect)
-
+        return info_area_rect
+
+
+    PICKER_ROWS = 12 # titles shown at once in the puzzle picker
+
+    def _draw_picker(self):
+        """Draws the puzzle picker (F6) over the middle of the window."""
+        line_height = FONT_INFO.get_height() + 4
+        count = len(self.queue)
+        shown = min(count, self.PICKER_ROWS)
+        first = max(0, min(self.picker - shown // 2, count - shown))
+        rect = pygame.Rect(0, 0, self.screen_width - 40, (shown + 1) * line_height + 10)
+        rect.center = (self.screen_width // 2, self.screen_height // 2)
+        pygame.draw.rect(self.screen, WHITE, rect)
+        pygame.draw.rect(self.screen, DARK_BLUE, rect, 2)
+        header = f"Go to puzzle ({count}): arrows, Enter, Esc"
+        self.screen.blit(self.glyphs.render(FONT_INFO, header, DARK_BLUE), (rect.x + 10, rect.y + 5))
+        self.screen.set_clip(rect.inflate(-4, -4))
+        for row, position in enumerate(range(first, first + shown)):
+            y = rect.y + 5 + (row + 1) * line_height
+            if position == self.picker:
+                pygame.draw.rect(self.screen, YELLOW, (rect.x + 4, y, rect.width - 8, line_height))
+            current = "*" if position == self.prepared.position else " "
+            text = f"{current} {position + 1}. {self.queue.title(position) or 'Untitled'}"
+            self.screen.blit(self.glyphs.render(FONT_INFO, text, BLACK), (rect.x + 10, y + 2))
+        self.screen.set_clip(None)
+        return rect
+
+    def _handle_picker_key(self, event):
+        """Keys while the picker is open: arrows/PageUp/PageDown move, Enter goes there, Esc closes."""
+        steps = {pygame.K_UP: -1, pygame.K_DOWN: 1,
+                 pygame.K_PAGEUP: -self.PICKER_ROWS, pygame.K_PAGEDOWN: self.PICKER_ROWS}
+        if event.key in steps:
+            self.picker = max(0, min(self.picker + steps[event.key], len(self.queue) - 1))
+        elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            self._go_to(self.picker)
+            self.picker = None
+        elif event.key in (pygame.K_ESCAPE, pygame.K_F6):
+            self.picker = None
+        self.full_dirty = True # The picker covers parts of everything
 
     def _handle_click(self, pos):
         """Handles mouse clicks on the grid."""
-        col = (pos[0] - MARGIN) // (CELL_SIZE + MARGIN)
-        row = (pos[1] - MARGIN) // (CELL_SIZE + MARGIN)
-
-        if 0 <= row < GRID_SIZE and 0 <= col < GRID_SIZE and self.puzzle_grid[row][col] != '#':
-            if self.active_cell == (row, col): # Clicked same cell again
-                # Toggle direction if the cell is part of both A and D words
-                is_across_word = any(word for word in self.words if word["direction"] == "A" and (row,col) in word["cells"])
-                is_down_word = any(word for word in self.words if word["direction"] == "D" and (row,col) in word["cells"])
-
-                if is_across_word and is_down_word:
-                    self.active_direction = "D" if self.active_direction == "A" else "A"
-            else: # Clicked a new cell
-                self.active_cell = (row, col)
-                # Default to Across if possible, else Down
-                is_across_word = any(word for word in self.words if word["direction"] == "A" and (row,col) in word["cells"])
-                if is_across_word:
-                    self.active_direction = "A"
-                else: # If not part of any across word, try down
-                    is_down_word = any(word for word in self.words if word["direction"] == "D" and (row,col) in word["cells"])
-                    if is_down_word:
-                        self.active_direction = "D"
-                    else: # Not part of any word (should not happen if puzzle_grid is correct)
-                        self.active_cell = None # Deselect
-
-            self._update_active_word_highlight_and_clue()
-        else: # Clicked outside grid or on black square
-            self.active_cell = None
-            self.current_word_highlight = []
-            self.active_clue_text = ""
-
+        step = self.cell_size + self.margin
+        col = (pos[0] - self.grid_left - self.margin) // step
+        row = (pos[1] - self.margin) // step
+        self.session.select_cell(row, col)
 
     def _update_active_word_highlight_and_clue(self):
-        """Updates the highlighted word and current clue based on active_cell and active_direction."""
-        self.current_word_highlight = []
-        self.active_clue_text = ""
-        if not self.active_cell:
-            return
-
-        r_active, c_active = self.active_cell
-        found_word = None
-
-        for word_obj in self.words:
-            if word_obj["direction"] == self.active_direction and (r_active, c_active) in word_obj["cells"]:
-                found_word = word_obj
-                break
-        
-        # If no word in current direction, try to find one in the other direction
-        if not found_word:
-            other_direction = "D" if self.active_direction == "A" else "A"
-            for word_obj in self.words:
-                if word_obj["direction"] == other_direction and (r_active, c_active) in word_obj["cells"]:
-                    found_word = word_obj
-                    self.active_direction = other_direction # Switch to this direction
-                    break
-        
-        if found_word:
-            self.current_word_highlight = found_word["cells"]
-            self.active_clue_text = f"{found_word['number']}{found_word['direction']}. {found_word['clue']}"
-            # Ensure active cell is the start of the segment of this word for typing
-            # For example, if you click in the middle of "PYTHON", typing should still fill "PYTHON"
-            # The current active_cell is fine for this logic.
+        """Updates the highlighted word and current clue based on the active cell and direction."""
+        self.session.update_highlight()
 
     def _move_active_cell(self, dr, dc):
         """Moves the active cell by dr, dc, skipping black cells."""
-        if not self.active_cell:
-            # Try to select the first available cell
-            for r in range(GRID_SIZE):
-                for c in range(GRID_SIZE):
-                    if self.puzzle_grid[r][c] != '#':
-                        self.active_cell = (r,c)
-                        self._update_active_word_highlight_and_clue()
-                        return
-            return # No valid cells
-
-        r, c = self.active_cell
-        
-        # If moving along the current word's direction
-        if self.active_direction == "A": # Across
-            next_r, next_c = r, c + dc
-        else: # Down
-            next_r, next_c = r + dr, c
-
-        # Check bounds and if it's a valid cell
-        if 0 <= next_r < GRID_SIZE and 0 <= next_c < GRID_SIZE and \
-           self.puzzle_grid[next_r][next_c] != '#':
-            # Check if the new cell is part of the currently highlighted word
-            if (next_r, next_c) in self.current_word_highlight:
-                self.active_cell = (next_r, next_c)
-            else: # Moved out of current word, try to find a new word at the new cell
-                self.active_cell = (next_r, next_c)
-                self._update_active_word_highlight_and_clue() # This will try to find a new word
-                # If no word is found in current direction, it might switch or clear highlight
-        else: # If out of bounds or black cell, try general movement
-            # This part handles jumping to the next available cell if the direct move is blocked
-            # or if not moving along the word.
-            # For simplicity, this example will only move if the direct next cell in word is valid.
-            # A more advanced version would "jump" to the next letter of the current word or next word.
-            
-            # Fallback: simple boundary-respecting move if not in a word context
-            # This is a simpler arrow key navigation if not strictly following a word path
-            new_r, new_c = r + dr, c + dc
-            if 0 <= new_r < GRID_SIZE and 0 <= new_c < GRID_SIZE and self.puzzle_grid[new_r][new_c] != '#':
-                self.active_cell = (new_r, new_c)
-                self._update_active_word_highlight_and_clue()
-
+        self.session.move(dr, dc)
 
     def _handle_keypress(self, event):
         """Handles keyboard input."""
-        if not self.active_cell:
+        session = self.session
+        if event.mod & pygame.KMOD_CTRL and self.journal:
+            if event.key == pygame.K_z and event.mod & pygame.KMOD_SHIFT or event.key == pygame.K_y:
+                self.journal.redo()
+            elif event.key == pygame.K_z:
+                self.journal.undo()
+            return
+        if not session.active_cell:
             return
-
-        r, c = self.active_cell
 
         if event.key == pygame.K_BACKSPACE:
-            self.user_grid[r][c] = ''
-            # Optionally, move back one cell in the current word direction
-            if self.active_direction == "A" and c > 0 :
-                # Find previous cell in this word
-                prev_cell_in_word = None
-                current_word_cells = self.current_word_highlight
-                if (r,c) in current_word_cells:
-                    idx = current_word_cells.index((r,c))
-                    if idx > 0:
-                        prev_cell_in_word = current_word_cells[idx-1]
-                
-                if prev_cell_in_word and self.puzzle_grid[prev_cell_in_word[0]][prev_cell_in_word[1]] != '#':
-                    self.active_cell = prev_cell_in_word
-                # elif c > 0 and self.puzzle_grid[r][c-1] != '#': # Simple move left
-                #     self.active_cell = (r, c - 1)
-
-            elif self.active_direction == "D" and r > 0:
-                prev_cell_in_word = None
-                current_word_cells = self.current_word_highlight
-                if (r,c) in current_word_cells:
-                    idx = current_word_cells.index((r,c))
-                    if idx > 0:
-                        prev_cell_in_word = current_word_cells[idx-1]
-
-                if prev_cell_in_word and self.puzzle_grid[prev_cell_in_word[0]][prev_cell_in_word[1]] != '#':
-                    self.active_cell = prev_cell_in_word
-                # elif r > 0 and self.puzzle_grid[r-1][c] != '#': # Simple move up
-                #     self.active_cell = (r - 1, c)
-            self._update_active_word_highlight_and_clue()
-
-
+            session.backspace()
         elif event.unicode.isalpha() and len(event.unicode) == 1:
-            self.user_grid[r][c] = event.unicode.upper()
-            # Move to next cell in the current word direction
-            if self.active_direction == "A":
-                next_cell_in_word = None
-                current_word_cells = self.current_word_highlight
-                if (r,c) in current_word_cells:
-                    idx = current_word_cells.index((r,c))
-                    if idx < len(current_word_cells) - 1:
-                        next_cell_in_word = current_word_cells[idx+1]
-                
-                if next_cell_in_word and self.puzzle_grid[next_cell_in_word[0]][next_cell_in_word[1]] != '#':
-                     self.active_cell = next_cell_in_word
-                # elif c + 1 < GRID_SIZE and self.puzzle_grid[r][c+1] != '#': # Simple move right
-                #     self.active_cell = (r, c + 1)
-
-
-            elif self.active_direction == "D":
-                next_cell_in_word = None
-                current_word_cells = self.current_word_highlight
-                if (r,c) in current_word_cells:
-                    idx = current_word_cells.index((r,c))
-                    if idx < len(current_word_cells) - 1:
-                        next_cell_in_word = current_word_cells[idx+1]
-                
-                if next_cell_in_word and self.puzzle_grid[next_cell_in_word[0]][next_cell_in_word[1]] != '#':
-                     self.active_cell = next_cell_in_word
-                # elif r + 1 < GRID_SIZE and self.puzzle_grid[r+1][c] != '#': # Simple move down
-                #     self.active_cell = (r + 1, c)
-            self._update_active_word_highlight_and_clue()
-
-
+            session.type_letter(event.unicode)
         elif event.key == pygame.K_LEFT:
             self._move_active_cell(0, -1)
         elif event.key == pygame.K_RIGHT:
@@ -470,43 +646,341 @@ class CrosswordGame:
         elif event.key == pygame.K_DOWN:
             self._move_active_cell(1, 0)
         elif event.key == pygame.K_TAB: # Use Tab to toggle direction
-            if self.active_cell:
-                is_across_word = any(word for word in self.words if word["direction"] == "A" and self.active_cell in word["cells"])
-                is_down_word = any(word for word in self.words if word["direction"] == "D" and self.active_cell in word["cells"])
-                if is_across_word and is_down_word:
-                    self.active_direction = "D" if self.active_direction == "A" else "A"
-                    self._update_active_word_highlight_and_clue()
-
+            session.toggle_direction()
+        elif event.key == pygame.K_F2: # Check the active word
+            session.check_word()
+        elif event.key == pygame.K_F3: # Reveal the active cell
+            session.reveal_cell()
+        elif event.key == pygame.K_F4: # Reveal the active word
+            session.reveal_word()
+
+
+    def _view_state(self):
+        """Captures the state the dirty tracking diffs against after handling events."""
+        session = self.session
+        return (session.active_cell, session.active_direction, session.current_word_highlight, session.active_clue_text,
+                session.filled_count, session.is_solved())
+
+    def _mark_dirty(self, before):
+        """Marks the cells, clue strip and info bar that changed since `before` (from _view_state)."""
+        old_cell, old_direction, old_highlight, old_clue, old_filled, old_solved = before
+        session = self.session
+        # The session records every cell whose letter or check mark changed;
+        # the old and new active cells plus the highlight difference cover the rest.
+        for cell in (old_cell, session.active_cell):
+            if cell:
+                self.dirty_cells.add(cell)
+        for idx in session.changed:
+            self.dirty_cells.add(divmod(idx, self.puzzle.width))
+        session.changed.clear()
+        if old_highlight is not session.current_word_highlight:
+            self.dirty_cells.update(set(old_highlight) ^ set(session.current_word_highlight))
+        if old_clue != session.active_clue_text:
+            self.clue_dirty = True
+        if (old_cell != session.active_cell or old_direction != session.active_direction
+                or old_filled != session.filled_count or old_solved != session.is_solved()):
+            self.info_dirty = True
+
+    def _draw_full(self):
+        """Repaints the whole window."""
+        self._ensure_display()
+        prof = self.profiler
+        self.screen.fill(BLACK) # Background for areas outside grid/clues
+        self._draw_grid()
+        if prof:
+            prof.mark(crossword_profile.GRID)
+        self._draw_clues()
+        if prof:
+            prof.mark(crossword_profile.CLUES)
+        self._draw_info_bar()
+        if self.overlay:
+            self._draw_profile_overlay()
+        if self.picker is not None:
+            self._draw_picker()
+        if prof:
+            prof.mark(crossword_profile.INFO)
+
+    def _draw_dirty(self):
+        """Repaints only the dirty regions and returns the rects that changed."""
+        self._ensure_display()
+        prof = self.profiler
+        if self.full_dirty:
+            self._draw_full()
+            rects = [self.screen.get_rect()]
+        else:
+            rects = []
+            if self.dirty_cells:
+                highlight = set(self.session.current_word_highlight)
+                for r, c in self.dirty_cells:
+                    rects.append(self._draw_cell(r, c, highlight))
+            if prof:
+                prof.mark(crossword_profile.GRID)
+            if self.clue_dirty:
+                rects.append(self._draw_active_clue())
+            if self.clue_lists_dirty:
+                rects.append(self._draw_clue_lists())
+            if prof:
+                prof.mark(crossword_profile.CLUES)
+            if self.info_dirty:
+                rects.append(self._draw_info_bar())
+            if self.overlay:
+                rects.append(self._draw_profile_overlay()) # Numbers change every frame
+            if prof:
+                prof.mark(crossword_profile.INFO)
+        self.dirty_cells.clear()
+        self.clue_dirty = self.info_dirty = self.clue_lists_dirty = self.full_dirty = False
+        return rects
+
+    def _draw_profile_overlay(self):
+        """Draws the recent per-phase frame timings over the info bar and returns its rect."""
+        rect = pygame.Rect(0, self.grid_height + self.clue_area_height, self.screen_width, INFO_AREA_HEIGHT)
+        pygame.draw.rect(self.screen, BLACK, rect)
+        # Rendered directly: the text changes every frame and would only churn the glyph cache
+        surf = FONT_INFO.render(self.profiler.overlay_text(), True, YELLOW)
+        self.screen.blit(surf, surf.get_rect(center=rect.center))
+        return rect
+
+    def _handle_event(self, event):
+        """Applies a single event (see _process_events). Returns False when the game should quit."""
+        if event.type == pygame.QUIT:
+            return False
+        if self.message and event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+            self.message = None
+            self.info_dirty = True
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F12 and self.profiler:
+            self.overlay = not self.overlay
+            self.full_dirty = True # Bring the info bar back
+            return True
+        if event.type == pygame.KEYDOWN and self.queue is not None:
+            if self.picker is not None:
+                self._handle_picker_key(event)
+                return True
+            if event.key == pygame.K_F6:
+                self.picker = self.prepared.position
+                self.full_dirty = True
+                return True
+            if event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                self._go_to(self.prepared.position + (1 if event.key == pygame.K_PAGEDOWN else -1))
+                return True
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1: # Left mouse button
+                # Check if click is within the grid area
+                if 0 <= event.pos[1] < self.grid_height:
+                     self._handle_click(event.pos)
+                # Potentially handle clicks on clue list later to select word
+        if event.type == pygame.MOUSEWHEEL:
+            x, y = pygame.mouse.get_pos()
+            if self._clue_list_rect().collidepoint(x, y):
+                column = 0 if x < self.screen_width // 2 else 1
+                self._scroll_clues(column, -event.y * WHEEL_ROWS * FONT_CLUE.get_height())
+        if event.type == pygame.KEYDOWN:
+            self._handle_keypress(event)
+        if event.type == pygame.VIDEORESIZE:
+            self._apply_layout(event.w, event.h)
+            self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), pygame.RESIZABLE)
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            self.full_dirty = True
+        if event.type == NET_EVENT and self.client:
+            # Remote letters land in session.changed; cursor marks are redrawn here
+            for idx in self.client.poll():
+                self.dirty_cells.add(divmod(idx, self.puzzle.width))
+            if not self.client.connected:
+                self.info_dirty = True
+        return True
+
+    def _stamp_inputs(self, events):
+        """Stamps the input events just drained (unless already stamped, as a replay may do)."""
+        now = time.perf_counter()
+        for event in events:
+            if event.type in INPUT_EVENTS:
+                if not hasattr(event, "stamp"):
+                    event.stamp = now
+                self.input_stamps.append(event.stamp)
+
+    def _process_events(self, events):
+        """Input pipeline for one frame. Every event is applied to the session first; the
+        highlight and clue text, the clue scroll, the cursor sent to the co-solve server
+        and the dirty regions are then worked out once for the whole batch, ready for a
+        single redraw. Returns False when the game should quit."""
+        session = self.session
+        before = self._view_state()
+        active_word = session.active_word
+        running = True
+        session.defer_view = True
+        try:
+            for event in events:
+                if not self._handle_event(event):
+                    running = False
+        finally:
+            session.defer_view = False
+            session.refresh_view()
+        # A puzzle switch (queue mode) replaces the session and repaints everything
+        session = self.session
+        if session.active_word is not active_word:
+            self._scroll_to_word(session.active_word) # Keep the active clue in view
+        if self.client:
+            self.client.send_cursor(session.active_cell, session.active_direction)
+        self._mark_dirty(before)
+        return running
+
+    def _post_net_event(self):
+        """Wakes the game loop from the client's reader thread."""
+        try:
+            pygame.event.post(pygame.event.Event(NET_EVENT))
+        except pygame.error:
+            pass # Display not open yet; the messages wait in the client until the next poll
 
     def run(self):
         """Main game loop."""
+        self._ensure_display()
+        if self.full_redraw:
+            self._run_full_redraw()
+        else:
+            self._run_retained()
+
+        if self.profiler and self.profile_out:
+            self.profiler.dump(self.profile_out, {"glyph_cache": self.glyphs.stats()})
+            print(f"Profile written to {self.profile_out}")
+        if self.preloader:
+            self.preloader.close() # closes every cached puzzle's journal, the current one's too
+            self.queue.close()
+        elif self.journal:
+            self.journal.close()
+        if self.client:
+            self.client.close()
+        pygame.quit()
+        sys.exit()
+
+    def _run_full_redraw(self):
+        """Original loop: redraws the whole window at 30 FPS whether or not anything changed."""
         running = True
         clock = pygame.time.Clock()
+        prof = self.profiler
 
         while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1: # Left mouse button
-                        # Check if click is within the grid area
-                        if 0 <= event.pos[1] < GRID_HEIGHT:
-                             self._handle_click(event.pos)
-                        # Potentially handle clicks on clue list later to select word
-                if event.type == pygame.KEYDOWN:
-                    self._handle_keypress(event)
-
-            self.screen.fill(BLACK) # Background for areas outside grid/clues
-            self._draw_grid()
-            self._draw_clues()
-            self._draw_info_bar()
+            if prof:
+                prof.begin_frame()
+            events = pygame.event.get()
+            if prof:
+                self._stamp_inputs(events)
+            running = self._process_events(events)
+            if prof:
+                prof.mark(crossword_profile.HANDLE)
+
+            self._draw_full()
 
             pygame.display.flip() # Update the full screen
+            if prof:
+                prof.mark(crossword_profile.FLIP)
+                prof.end_frame(len(events), self.input_stamps)
+                self.input_stamps.clear()
+            if self.journal:
+                self.journal.sync_due()
             clock.tick(30) # Limit to 30 FPS
 
-        pygame.quit()
-        sys.exit()
+    def _run_retained(self):
+        """Event-driven loop: sleeps until input arrives, then repaints only the dirty regions."""
+        running = True
+        self.full_dirty = True
+        prof = self.profiler
+        pygame.display.update(self._draw_dirty())
+
+        while running:
+            # Block until something happens, then drain whatever else is queued. Unsynced
+            # autosave records bound the wait, so they reach the disk while the player is idle
+            due = self.journal.sync_due() if self.journal else None
+            if due is None:
+                event = pygame.event.wait()
+            else:
+                event = pygame.event.wait(int(due * 1000) + 1)
+                if event.type == pygame.NOEVENT:
+                    continue # timed out: sync_due() writes them on the next pass
+            events = [event] + pygame.event.get()
+            if prof:
+                prof.begin_frame() # Time spent waiting is not part of the frame
+                self._stamp_inputs(events)
+            running = self._process_events(events)
+            if prof:
+                prof.mark(crossword_profile.HANDLE)
+
+            rects = self._draw_dirty()
+            if rects:
+                pygame.display.update(rects)
+            if prof:
+                prof.mark(crossword_profile.FLIP)
+                # Inputs that changed nothing on screen have no update to measure to
+                prof.end_frame(len(events), self.input_stamps if rects else ())
+                self.input_stamps.clear()
 
 if __name__ == '__main__':
-    game = CrosswordGame()
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="10x10 Crossword Puzzle")
+    parser.add_argument("puzzle", nargs="*",
+                        help="JSON puzzle file or binary puzzle library (default: built-in puzzle); "
+                             "with --queue, any number of them")
+    parser.add_argument("--index", type=int, default=0,
+                        help="puzzle number to open from a library (with --queue, position to start at)")
+    parser.add_argument("--queue", action="store_true",
+                        help="play every puzzle of the files in turn: PageUp/PageDown, F6 for a picker")
+    parser.add_argument("--preload", type=int, default=3, metavar="N",
+                        help="with --queue, puzzles to prepare ahead in the background (default: 3)")
+    parser.add_argument("--cache", type=int, default=8, metavar="N",
+                        help="with --queue, prepared puzzles to keep, recently played ones included (default: 8)")
+    parser.add_argument("--full-redraw", action="store_true",
+                        help="redraw the whole window every frame at 30 FPS instead of only dirty regions")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="record per-phase frame timings and write them to FILE as JSON on exit")
+    parser.add_argument("--overlay", action="store_true",
+                        help="with --profile, show recent frame timings over the info bar (F12 toggles)")
+    parser.add_argument("--save-dir", default=os.path.join(os.path.expanduser("~"), ".crossword"),
+                        help="directory for autosaves, one per puzzle (default: ~/.crossword)")
+    parser.add_argument("--no-save", action="store_true", help="do not restore or record progress")
+    parser.add_argument("--connect", metavar="HOST:PORT",
+                        help="solve together with others on a crossword_server (its puzzle replaces PUZZLE)")
+    parser.add_argument("--name", default="", help="player name sent to the server")
+    args = parser.parse_args()
+    if len(args.puzzle) > 1 and not args.queue:
+        parser.error("more than one puzzle file needs --queue")
+    if args.queue and args.connect:
+        parser.error("--queue and --connect cannot be combined")
+
+    profiler = None
+    if args.profile:
+        profiler = crossword_profile.FrameProfiler()
+
+    if args.queue:
+        save_dir = None
+        if not args.no_save:
+            os.makedirs(args.save_dir, exist_ok=True)
+            save_dir = args.save_dir
+        queue = crossword_queue.PuzzleQueue(args.puzzle, builtin=not args.puzzle)
+        if not 0 <= args.index < len(queue):
+            parser.error(f"--index must be below {len(queue)}")
+        game = CrosswordGame(full_redraw=args.full_redraw, profiler=profiler, profile_out=args.profile,
+                             overlay=args.overlay, queue=queue, save_dir=save_dir, start=args.index,
+                             preload=args.preload, cache=args.cache)
+        game.run()
+
+    client = None
+    if args.connect:
+        from crossword_server import CoSolveClient
+        host, _, port = args.connect.rpartition(":")
+        client = CoSolveClient(host or "127.0.0.1", int(port), args.name)
+        puzzle = client.puzzle()
+    elif args.puzzle:
+        from crossword_io import load_any
+        puzzle = CrosswordPuzzle(load_any(args.puzzle[0], args.index))
+    else:
+        puzzle = CrosswordPuzzle()
+
+    save_path = None
+    if not args.no_save and client is None: # the server keeps shared progress
+        os.makedirs(args.save_dir, exist_ok=True)
+        save_path = crossword_journal.default_path(puzzle, args.save_dir)
+
+    game = CrosswordGame(full_redraw=args.full_redraw, puzzle=puzzle, profiler=profiler,
+                         profile_out=args.profile, overlay=args.overlay, save_path=save_path,
+                         client=client)
     game.run()
@@ -0,0 +1,45 @@
+"""Helpers shared by the bench_*.py scripts."""
+
+import random
+
+
+def synthetic_words_data(size, seed=0):
+    """Builds a size x size puzzle in WORDS_DATA form from a staggered black-square pattern.
+
+    Letters are random, so crossings always agree. Clues are placeholders.
+    """
+    rnd = random.Random(seed)
+    white = [[(r + 2 * c) % 5 != 0 for c in range(size)] for r in range(size)]
+    letters = [[chr(65 + rnd.randrange(26)) for _ in range(size)] for _ in range(size)]
+
+    words_data = []
+    for direction, dr, dc in (("A", 0, 1), ("D", 1, 0)):
+        for r in range(size):
+            for c in range(size):
+                if not white[r][c]:
+                    continue
+                pr, pc = r - dr, c - dc
+                if 0 <= pr < size and 0 <= pc < size and white[pr][pc]:
+                    continue # not the start of a run
+                text = ""
+                rr, cc = r, c
+                while rr < size and cc < size and white[rr][cc]:
+                    text += letters[rr][cc]
+                    rr, cc = rr + dr, cc + dc
+                if len(text) >= 2:
+                    words_data.append((text, f"Clue for {text}", r, c, direction))
+    return words_data
+
+
+def percentiles(samples, scale=1.0, digits=3):
+    """p50/p90/p99/max/mean of samples (seconds) multiplied by scale."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pick(q):
+        return round(ordered[min(n - 1, int(q * n))] * scale, digits)
+
+    return {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99),
+            "max": round(ordered[-1] * scale, digits), "mean": round(sum(ordered) / n * scale, digits)}
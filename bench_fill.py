@@ -0,0 +1,51 @@
+"""Benchmarks the grid filler: fills per second for a fixed seed range and word list.
+
+Usage: python bench_fill.py WORDLIST [--size 10] [--count 20] [--seed 0] [--timeout 10]
+"""
+
+import argparse
+import os
+import time
+
+from crossword_fill import WordIndex, build_mask, fill_grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wordlist", nargs="?", default="/usr/share/dict/words",
+                        help="one word per line (default: /usr/share/dict/words)")
+    parser.add_argument("--size", type=int, default=10)
+    parser.add_argument("--count", type=int, default=20, help="number of grids (seeds seed..seed+count-1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--black-ratio", type=float, default=0.18)
+    parser.add_argument("--max-len", type=int, default=None, help="longest allowed run in the mask")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds allowed per grid")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.wordlist):
+        parser.error(f"word list {args.wordlist} not found")
+
+    start = time.perf_counter()
+    index = WordIndex.from_file(args.wordlist, max_len=args.size)
+    index_time = time.perf_counter() - start
+    print(f"index: {len(index)} words in {index_time:.2f}s")
+
+    masks = [build_mask(args.size, seed=seed, black_ratio=args.black_ratio, max_len=args.max_len)
+             for seed in range(args.seed, args.seed + args.count)]
+
+    statuses = {}
+    nodes = 0
+    start = time.perf_counter()
+    for seed, mask in zip(range(args.seed, args.seed + args.count), masks):
+        result = fill_grid(mask, index, seed=seed, timeout=args.timeout)
+        statuses[result.status] = statuses.get(result.status, 0) + 1
+        nodes += result.nodes
+    elapsed = time.perf_counter() - start
+
+    filled = statuses.get("filled", 0)
+    print(f"{args.count} grids of {args.size}x{args.size} in {elapsed:.2f}s: {statuses}")
+    print(f"{filled / elapsed:.2f} fills/s, {nodes / elapsed:.0f} nodes/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Compares the memory footprint of the old list-of-lists/dict puzzle layout with the flat one.
+
+Usage: python bench_memory.py [--sizes 10 21 50]
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from bench_common import synthetic_words_data
+from crossword_model import CrosswordPuzzle, CrosswordSession, PuzzleData
+
+
+def build_legacy(words_data, size):
+    """Builds the grids, word dicts and cell index the way the game did before flat grids."""
+    puzzle_grid = [['#' for _ in range(size)] for _ in range(size)]
+    solution_grid = [['' for _ in range(size)] for _ in range(size)]
+    user_grid = [['' for _ in range(size)] for _ in range(size)]
+    number_grid = [[0 for _ in range(size)] for _ in range(size)]
+    words = []
+    cell_index = {}
+    word_starts = {}
+    for word_str, clue, r_start, c_start, direction in sorted(words_data, key=lambda x: (x[2], x[3])):
+        word_obj = {"text": word_str.upper(), "clue": clue, "row": r_start, "col": c_start,
+                    "direction": direction, "number": 0, "cells": []}
+        if (r_start, c_start) not in word_starts:
+            word_starts[(r_start, c_start)] = len(word_starts) + 1
+            number_grid[r_start][c_start] = word_starts[(r_start, c_start)]
+        word_obj["number"] = word_starts[(r_start, c_start)]
+        for i, char_w in enumerate(word_str.upper()):
+            r, c = (r_start, c_start + i) if direction == "A" else (r_start + i, c_start)
+            puzzle_grid[r][c] = ' '
+            solution_grid[r][c] = char_w
+            cell_index.setdefault((r, c), {}).setdefault(direction, (word_obj, len(word_obj["cells"])))
+            word_obj["cells"].append((r, c))
+        words.append(word_obj)
+    return puzzle_grid, solution_grid, user_grid, number_grid, words, cell_index
+
+
+def build_flat(words_data, size):
+    """Builds the current CrosswordPuzzle plus a play session."""
+    puzzle = CrosswordPuzzle(PuzzleData(f"{size}x{size}", size, size, words_data))
+    return puzzle, CrosswordSession(puzzle)
+
+
+def measure(builder, words_data, size, copies):
+    """Returns bytes allocated per puzzle when holding `copies` puzzles built by builder."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [builder(words_data, size) for _ in range(copies)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / copies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 21, 50])
+    parser.add_argument("--copies", type=int, default=50, help="puzzles held in memory per measurement")
+    args = parser.parse_args()
+
+    print(f"{'size':>5} {'words':>6} {'legacy B':>10} {'flat B':>10} {'ratio':>6}")
+    for size in args.sizes:
+        words_data = synthetic_words_data(size)
+        legacy = measure(build_legacy, words_data, size, args.copies)
+        flat = measure(build_flat, words_data, size, args.copies)
+        print(f"{size:>5} {len(words_data):>6} {legacy:>10.0f} {flat:>10.0f} {legacy / flat:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark: numbering and entries derived from the grid (crossword_grid) vs CrosswordPuzzle's word loop.
+
+Usage: python bench_numbering.py [--sizes 15 50 100] [--repeat 20]
+
+For each size, a synthetic puzzle (bench_common) is built both ways:
+  loop     CrosswordPuzzle(PuzzleData): _prepare_puzzle walks every word's
+           letters, then _prepare_clue_lists sorts them
+  derive   derive_entries() on the solution grid alone
+  words    derive_entries() plus GridEntries.words(), giving the same Word
+           records and clue lists as the loop
+The derived numbering, starts and lengths are checked against the loop's.
+A crossword_fill.build_mask grid of each size is also derived straight from
+its row strings and its entries checked against mask_slots ("mask_same").
+Times are medians in ms.
+"""
+
+import argparse
+import json
+import time
+
+from bench_common import percentiles, synthetic_words_data
+from crossword_fill import build_mask, mask_slots
+from crossword_grid import derive_entries
+from crossword_model import CrosswordPuzzle, PuzzleData
+
+
+def time_call(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return percentiles(samples, 1e3)["p50"]
+
+
+def check_same(puzzle, entries):
+    """True if the derived entries number and measure every word exactly as the loop did."""
+    loop = sorted((w.number, w.direction, w.start, w.length) for w in puzzle.words)
+    derived, _, _ = entries.words()
+    if loop != sorted((w.number, w.direction, w.start, w.length) for w in derived):
+        return False
+    return list(puzzle.numbers) == entries.numbers.tolist()
+
+
+def check_mask(size, seed=0):
+    """True if derive_entries on a build_mask grid finds exactly mask_slots' entries."""
+    mask = build_mask(size, seed=seed)
+    entries = derive_entries(mask)
+    derived = {(start, "A", tuple(range(start, start + length)))
+               for start, length in zip(entries.across_start.tolist(), entries.across_length.tolist())}
+    derived |= {(start, "D", tuple(range(start, start + size * length, size)))
+                for start, length in zip(entries.down_start.tolist(), entries.down_length.tolist())}
+    slots = {(s.row * size + s.col, s.direction, s.cells) for s in mask_slots(mask)}
+    return len(slots) > 0 and derived == slots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 50, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        data = PuzzleData(f"{size}x{size}", size, size, synthetic_words_data(size))
+        puzzle = CrosswordPuzzle(data)
+        solution = bytes(puzzle.solution)
+        clues = {(w.number, w.direction): w.clue for w in puzzle.words}
+        entries = derive_entries(solution, size)
+        results.append({
+            "size": size,
+            "words": len(puzzle.words),
+            "same": check_same(puzzle, entries),
+            "mask_same": check_mask(size),
+            "loop_ms": time_call(lambda: CrosswordPuzzle(data), args.repeat),
+            "derive_ms": time_call(lambda: derive_entries(solution, size), args.repeat),
+            "words_ms": time_call(lambda: derive_entries(solution, size).words(clues), args.repeat),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""Replays input event streams through CrosswordGame headlessly and reports timings as JSON.
+
+Usage: python bench_replay.py [--sizes 10 21 50] [--events N] [--burst N] [--output FILE] [--compare OLD.json]
+       python bench_replay.py --replay EVENTS.json [--size 10] [--stream 10/solve]
+
+Runs under SDL_VIDEODRIVER=dummy. For each puzzle size and scenario
+(full solve, arrow-key storm, rapid clicks) the events go through the same
+path as the retained loop, --burst of them per frame (as if that many were
+queued when the loop drained the queue): _process_events, _draw_dirty and
+display.update. Reported per scenario: per-frame event handling and draw
+time percentiles, input latency (drain to display.update, per event),
+events/s and the game's glyph cache counters. The full-window paths (_draw_grid,
+_draw_clues, and a whole frame as the --full-redraw loop draws it) are timed
+separately per size. Output is sorted JSON so runs can be diffed.
+
+--replay takes a JSON list of {"type": "KEYDOWN", "key": ..., "unicode": ...}
+and {"type": "MOUSEBUTTONDOWN", "pos": [x, y], "button": 1} objects, or a
+--dump-events file (the synthetic streams keyed "size/scenario") plus --stream.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import PYTHON10x10 as game_module
+from bench_common import percentiles, synthetic_words_data
+from crossword_model import CrosswordPuzzle, CrosswordSession, PuzzleData
+
+SCENARIOS = ("solve", "arrows", "clicks")
+ARROWS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+
+# --- Event streams ---
+
+def event_to_dict(event):
+    if event.type == pygame.KEYDOWN:
+        return {"type": "KEYDOWN", "key": event.key, "unicode": event.unicode}
+    return {"type": "MOUSEBUTTONDOWN", "pos": list(event.pos), "button": event.button}
+
+
+def event_from_dict(obj):
+    if obj["type"] == "KEYDOWN":
+        return pygame.event.Event(pygame.KEYDOWN, key=obj["key"], unicode=obj.get("unicode", ""),
+                                  mod=obj.get("mod", 0))
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=tuple(obj["pos"]), button=obj.get("button", 1))
+
+
+def _click(game, r, c):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=game._cell_rect(r, c).center, button=1)
+
+
+def _key(key, unicode=""):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, unicode=unicode, mod=0)
+
+
+def solve_events(game):
+    """Clicks the start of every word, again if that toggles it to the word's direction, and types its answer."""
+    session = CrosswordSession(game.puzzle) # scratch session to see where each click leaves the cursor
+    events = []
+    for word in game.puzzle.words:
+        if not word.length:
+            continue
+        r, c = word.cell(0)
+        for _ in range(2):
+            events.append(_click(game, r, c))
+            session.select_cell(r, c)
+            if session.active_word is word:
+                break
+        for ch in word.text[:word.length]:
+            events.append(_key(ord(ch.lower()), ch.lower()))
+            session.type_letter(ch)
+    return events
+
+
+def arrow_events(game, count, rnd):
+    """Selects a cell, then holds random arrow keys."""
+    r, c = divmod(game.puzzle.white_indices()[0], game.puzzle.width)
+    return [_click(game, r, c)] + [_key(rnd.choice(ARROWS)) for _ in range(count)]
+
+
+def click_events(game, count, rnd):
+    """Clicks random grid cells, white or black."""
+    return [_click(game, rnd.randrange(game.puzzle.height), rnd.randrange(game.puzzle.width))
+            for _ in range(count)]
+
+
+# --- Measurement ---
+
+def replay(game, events, burst=1):
+    """Feeds events `burst` per frame through the retained loop path; returns timings."""
+    clock = time.perf_counter
+    handle_times, frame_times, latencies = [], [], []
+    game.full_dirty = True
+    pygame.display.update(game._draw_dirty())
+    start = clock()
+    for i in range(0, len(events), burst):
+        batch = events[i:i + burst]
+        t0 = clock()
+        game._process_events(batch)
+        t1 = clock()
+        rects = game._draw_dirty()
+        if rects:
+            pygame.display.update(rects)
+        t2 = clock()
+        handle_times.append(t1 - t0)
+        frame_times.append(t2 - t1)
+        latencies += [t2 - t0] * len(batch)
+    elapsed = clock() - start
+    return {
+        "events": len(events),
+        "frames": len(frame_times),
+        "handle_us": percentiles(handle_times, 1e6, 1),
+        "frame_ms": percentiles(frame_times, 1e3),
+        "input_ms": percentiles(latencies, 1e3),
+        "events_per_s": round(len(events) / elapsed, 1) if elapsed else None,
+        "glyph_cache": game.glyphs.stats(),
+    }
+
+
+def time_call(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return percentiles(samples, 1e3)
+
+
+def full_frame(game):
+    game._draw_full()
+    pygame.display.flip()
+
+
+def make_game(size):
+    puzzle = CrosswordPuzzle(PuzzleData(f"{size}x{size}", size, size, synthetic_words_data(size)))
+    return game_module.CrosswordGame(puzzle=puzzle)
+
+
+def bench_size(size, count, seed, repeat, burst=1, dump=None):
+    """Runs every scenario on a fresh game for a size x size puzzle."""
+    result = {"size": size, "scenarios": {}}
+    for scenario in SCENARIOS:
+        game = make_game(size)
+        game._ensure_display()
+        rnd = random.Random(seed)
+        if scenario == "solve":
+            events = solve_events(game)
+        elif scenario == "arrows":
+            events = arrow_events(game, count, rnd)
+        else:
+            events = click_events(game, count, rnd)
+        if dump is not None:
+            dump[f"{size}/{scenario}"] = [event_to_dict(e) for e in events]
+        result["scenarios"][scenario] = replay(game, events, burst)
+        if scenario == "solve":
+            result["scenarios"][scenario]["solved"] = game.session.is_solved()
+
+    result["words"] = len(game.puzzle.words)
+    result["draw_grid_ms"] = time_call(game._draw_grid, repeat)
+    result["draw_clues_ms"] = time_call(game._draw_clues, repeat)
+    result["full_frame_ms"] = time_call(lambda: full_frame(game), repeat)
+    return result
+
+
+def compare(old, new):
+    """Prints p50 ratios (new/old) for every metric present in both reports."""
+    old_sizes = {r["size"]: r for r in old["results"]}
+    for result in new["results"]:
+        before = old_sizes.get(result["size"])
+        if before is None:
+            continue
+        rows = [(f"{name}.handle_us", metrics["handle_us"], before["scenarios"].get(name, {}).get("handle_us"))
+                for name, metrics in result["scenarios"].items()]
+        rows += [(f"{name}.frame_ms", metrics["frame_ms"], before["scenarios"].get(name, {}).get("frame_ms"))
+                 for name, metrics in result["scenarios"].items()]
+        rows += [(key, result[key], before.get(key)) for key in ("draw_grid_ms", "draw_clues_ms", "full_frame_ms")]
+        for label, now, then in rows:
+            if now and then and then.get("p50"):
+                print(f"{result['size']:>3}x{result['size']:<3} {label:<22} {then['p50']:>10} -> {now['p50']:>10}"
+                      f"  {now['p50'] / then['p50']:.2f}x", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 21, 50])
+    parser.add_argument("--events", type=int, default=500, help="events per arrow/click scenario")
+    parser.add_argument("--burst", type=int, default=1, help="events handled per frame")
+    parser.add_argument("--repeat", type=int, default=20, help="calls per full-window timing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON report to print p50 ratios against")
+    parser.add_argument("--dump-events", help="write the synthetic event streams as JSON")
+    parser.add_argument("--replay", help="JSON list of recorded events to replay instead of the scenarios")
+    parser.add_argument("--size", type=int, default=10, help="puzzle size for --replay")
+    parser.add_argument("--stream", help="stream of a --dump-events file to replay, e.g. 21/arrows")
+    args = parser.parse_args()
+
+    report = {"python": platform.python_version(), "pygame": pygame.version.ver,
+              "driver": os.environ["SDL_VIDEODRIVER"], "seed": args.seed, "burst": args.burst}
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as f:
+            stream = json.load(f)
+        if isinstance(stream, dict): # a --dump-events file: pick one stream
+            stream = stream[args.stream or f"{args.size}/solve"]
+        events = [event_from_dict(obj) for obj in stream]
+        game = make_game(args.size)
+        game._ensure_display()
+        report["results"] = [{"size": args.size, "scenarios": {"replay": replay(game, events, args.burst)}}]
+    else:
+        dump = {} if args.dump_events else None
+        report["results"] = [bench_size(size, args.events, args.seed, args.repeat, args.burst, dump)
+                             for size in args.sizes]
+        if dump is not None:
+            with open(args.dump_events, "w", encoding="utf-8") as f:
+                json.dump(dump, f)
+    pygame.quit()
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
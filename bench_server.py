@@ -0,0 +1,157 @@
+"""Load test for crossword_server: many simulated players on one puzzle, reported as JSON.
+
+Usage: python bench_server.py [--clients 200] [--seconds 10] [--rate 2] [--size 15] [--tick 0.05]
+
+Starts the server in a subprocess on a free localhost port, connects
+--clients asyncio clients and has each one write a random letter to a random
+white cell --rate times a second (plus a cursor move with every write). All
+writes target one puzzle, so concurrent writes to a cell are common.
+
+Reported:
+  echo_ms    a write's send time to the delta carrying it back to its writer
+  fanout_ms  the server building a delta to each client receiving it
+  overridden writes that lost a conflict and never came back as their own
+  server     CPU seconds and CPU share over the run, from the server's own
+             stats, plus its per-tick delta build/send time
+The clients share one process and one core. With many clients the client
+side can be the bottleneck, which shows up as latency, so watch client_cpu.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_common import percentiles, synthetic_words_data
+from crossword_io import save_puzzle
+from crossword_model import CrosswordPuzzle, PuzzleData
+
+
+class SimClient:
+    def __init__(self, rnd, white, stats):
+        self.rnd = rnd
+        self.white = white
+        self.stats = stats
+        self.seq = 0
+        self.tick = 0
+        self.sent = {} # seq -> send time (perf_counter)
+
+    async def run(self, host, port, rate, stop_at):
+        reader, writer = await asyncio.open_connection(host, port)
+        welcome = json.loads(await reader.readline())
+        self.id, self.tick = welcome["id"], welcome["tick"]
+        reading = asyncio.ensure_future(self._read(reader))
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(self.rnd.random() / rate) # spread the clients' write phases
+        while loop.time() < stop_at:
+            cell = self.rnd.choice(self.white)
+            self.seq += 1
+            self.sent[self.seq] = time.perf_counter()
+            writer.write(json.dumps({"op": "set", "cell": cell, "letter": self.rnd.choice("ABCDE"),
+                                     "seq": self.seq, "base": self.tick}).encode() + b"\n"
+                         + json.dumps({"op": "cursor", "cell": cell, "dir": "A"}).encode() + b"\n")
+            self.stats["writes"] += 1
+            await asyncio.sleep(1 / rate)
+        await asyncio.sleep(0.5) # let the last deltas arrive
+        reading.cancel()
+        writer.close()
+        self.stats["overridden"] += len(self.sent)
+
+    async def _read(self, reader):
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            delta = json.loads(line)
+            if delta.get("op") != "delta":
+                continue
+            now = time.perf_counter()
+            self.stats["fanout"].append(time.time() - delta["time"])
+            self.stats["deltas"] += 1
+            self.tick = delta["tick"]
+            for _, _, writer_id, seq in delta["cells"]:
+                if writer_id == self.id:
+                    sent = self.sent.pop(seq, None)
+                    if sent is not None:
+                        self.stats["echo"].append(now - sent)
+            self.stats["bytes"] += len(line)
+
+
+async def server_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    await reader.readline() # welcome
+    writer.write(b'{"op":"stats"}\n')
+    while True:
+        message = json.loads(await reader.readline())
+        if message.get("op") == "stats":
+            writer.close()
+            return message
+
+
+async def load_test(host, port, clients, seconds, rate, puzzle, seed):
+    white = puzzle.white_indices()
+    stats = {"writes": 0, "deltas": 0, "bytes": 0, "overridden": 0, "echo": [], "fanout": []}
+    rnd = random.Random(seed)
+    sims = [SimClient(random.Random(rnd.random()), white, stats) for _ in range(clients)]
+    before = await server_stats(host, port)
+    cpu_start = time.process_time()
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + seconds
+    await asyncio.gather(*(sim.run(host, port, rate, stop_at) for sim in sims))
+    client_cpu = time.process_time() - cpu_start
+    after = await server_stats(host, port)
+
+    cpu = after["cpu"] - before["cpu"]
+    wall = after["wall"] - before["wall"]
+    return {
+        "clients": clients, "seconds": seconds, "rate_per_client": rate,
+        "writes": stats["writes"], "overridden": stats["overridden"],
+        "deltas_received": stats["deltas"], "mb_received": round(stats["bytes"] / 1e6, 3),
+        "echo_ms": percentiles(stats["echo"], 1e3), "fanout_ms": percentiles(stats["fanout"], 1e3),
+        "server": {"cpu_s": round(cpu, 3), "cpu_percent": round(100 * cpu / wall, 1) if wall else None,
+                   "ticks": after["tick"] - before["tick"], "tick_ms": after["tick_ms"],
+                   "tick_late_ms": after["tick_late_ms"],
+                   "messages_in": after["messages_in"] - before["messages_in"]},
+        "client_cpu_percent": round(100 * client_cpu / wall, 1) if wall else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[200], help="client counts to run in turn")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rate", type=float, default=2.0, help="writes per second per client")
+    parser.add_argument("--size", type=int, default=15, help="synthetic puzzle size")
+    parser.add_argument("--tick", type=float, default=0.05, help="server tick in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = PuzzleData(f"{args.size}x{args.size}", args.size, args.size, synthetic_words_data(args.size))
+    puzzle = CrosswordPuzzle(data)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "puzzle.json")
+        save_puzzle(data, path)
+        server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                "crossword_server.py"),
+                                   path, "--port", "0", "--tick", str(args.tick)],
+                                  stdout=subprocess.PIPE, text=True)
+        try:
+            host, port = server.stdout.readline().split()[-1].rsplit(":", 1)
+            results = [asyncio.run(load_test(host, int(port), n, args.seconds, args.rate, puzzle, args.seed))
+                       for n in args.clients]
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps({"python": platform.python_version(), "tick": args.tick, "size": args.size,
+                      "results": results}, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""Batch puzzle generation across a process pool.
+
+Usage:
+    python crossword_batch.py WORDLIST OUTPUT.cwl --seeds 0:10000 --sizes 10 15 [--workers N]
+
+Every (seed, size) pair is one job; jobs are ordered seed-major. Workers
+build a mask for the seed and fill it (crossword_fill.generate_puzzle).
+Finished puzzles are appended to the OUTPUT puzzle library in job order,
+whatever order the workers finish in, so the library is identical for a given
+seed set regardless of --workers. Only jobs that fill are written; a job
+that fails (no mask can be built for that seed and size, or any other
+error) is counted as "no_mask" or "error" in the stats and the run goes on.
+
+The word index is built once in the parent and inherited by forked workers
+(where fork is available) or built once per worker by the pool initializer;
+it is never pickled per task.
+
+Progress is recorded in OUTPUT.progress after every checkpoint. Re-running
+the same command with --resume continues after the last checkpointed job;
+the log's first line fingerprints the run (word list contents, seeds, sizes
+and search options) and a resume with anything different is refused.
+For bit-identical output across runs use --max-nodes: --timeout depends on
+wall-clock time and is there as a safety net.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from crossword_fill import MaskError, WordIndex, generate_puzzle
+from crossword_io import LibraryWriter
+
+# Word index for this process, set by the parent before forking or by _init_worker
+_INDEX = None
+
+
+def _init_worker(wordlist, max_len):
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = WordIndex.from_file(wordlist, max_len=max_len)
+
+
+def _run_job(job):
+    """Runs one (position, seed, size, options, validate) job in a worker."""
+    pos, seed, size, options, validate = job
+    start = time.perf_counter()
+    try:
+        puzzle, result = generate_puzzle(_INDEX, size, seed, **options)
+    except MaskError as e: # no mask for this seed and size
+        return pos, seed, size, None, "no_mask", 0, time.perf_counter() - start, str(e)
+    except Exception as e: # one bad job should not stop the batch
+        return pos, seed, size, None, "error", 0, time.perf_counter() - start, repr(e)
+    status, error = result.status, None
+    if puzzle is not None and validate:
+        try:
+            from crossword_validate import validate_puzzle
+            if not validate_puzzle(puzzle)["ok"]:
+                puzzle, status = None, "invalid"
+        except Exception as e:
+            puzzle, status, error = None, "error", repr(e)
+    return pos, seed, size, puzzle, status, result.nodes, result.elapsed, error
+
+
+def parse_seeds(text):
+    """Parses '0:100' (half-open range), '5' or '1,2,9' into a list of ints."""
+    if ":" in text:
+        start, stop = text.split(":", 1)
+        return list(range(int(start), int(stop)))
+    return [int(s) for s in text.split(",") if s]
+
+
+def job_fingerprint(wordlist, seeds, sizes, options, validate):
+    """Hex digest of everything that decides a run's output, so --resume cannot mix two runs."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(wordlist, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    params = {"seeds": seeds, "sizes": sizes, "options": options, "validate": validate}
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ProgressLog:
+    """Sidecar file of JSON lines: {"fingerprint": ...} for the run, then one
+    {"next_job": k, "count": n, ...stats} per checkpoint."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fingerprint = None # read by last()
+
+    def last(self):
+        """Returns the last complete checkpoint entry, or a fresh one."""
+        state = {"next_job": 0, "count": 0}
+        if not os.path.exists(self.path):
+            return state
+        with open(self.path, encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break # torn last line
+                if i == 0 and "fingerprint" in entry:
+                    self.fingerprint = entry["fingerprint"]
+                    continue
+                if "next_job" not in entry or "count" not in entry:
+                    break
+                state = entry
+        return state
+
+    def start(self, fingerprint):
+        """Starts a new log for a run with the given job_fingerprint."""
+        self.fingerprint = fingerprint
+        self._append({"fingerprint": fingerprint}, "w")
+
+    def record(self, next_job, count, stats):
+        self._append({"next_job": next_job, "count": count, **stats}, "a")
+
+    def _append(self, entry, mode):
+        with open(self.path, mode, encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def run_batch(wordlist, output, seeds, sizes, workers=None, max_nodes=None, timeout=60.0,
+              resume=False, checkpoint_every=50, report_every=5.0, mask_options=None, validate=False,
+              log=sys.stderr):
+    """Generates puzzles for every (seed, size) job into the library at output. Returns a stats dict."""
+    global _INDEX
+    jobs = [(seed, size) for seed in seeds for size in sizes]
+    options = {"max_nodes": max_nodes, "timeout": timeout, **(mask_options or {})}
+    fingerprint = job_fingerprint(wordlist, seeds, sizes, options, validate)
+    progress = ProgressLog(output + ".progress")
+    if resume and os.path.exists(progress.path):
+        checkpoint = progress.last()
+        if progress.fingerprint != fingerprint:
+            raise ValueError(f"{progress.path} is from a run with another word list, seeds, sizes or options; "
+                             "rerun without --resume to start over")
+    else:
+        checkpoint = {"next_job": 0, "count": 0}
+        progress.start(fingerprint)
+    next_job, count = checkpoint["next_job"], checkpoint["count"]
+
+    writer = LibraryWriter(output, append=resume)
+    writer.truncate(count) # drop puzzles written after the last checkpoint
+    if len(writer) != count:
+        writer.close()
+        raise ValueError(f"{output} has {len(writer)} puzzles but the progress log expects {count}")
+
+    max_len = max(sizes)
+    start = time.perf_counter()
+    _INDEX = WordIndex.from_file(wordlist, max_len=max_len)
+    print(f"index: {len(_INDEX)} words in {time.perf_counter() - start:.2f}s", file=log)
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    workers = workers or os.cpu_count() or 1
+
+    stats = {key: checkpoint.get(key, 0)
+             for key in ("filled", "timeout", "exhausted", "invalid", "no_mask", "error", "nodes")}
+    reported = set() # (status, size) whose first failure has been logged
+    done = {} # job position -> finished result waiting for earlier jobs
+    pending = iter(range(next_job, len(jobs)))
+    in_flight = set()
+    window = workers * 4
+    last_report = start = time.perf_counter()
+    since_checkpoint = 0
+    completed = 0
+
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                             initargs=(wordlist, max_len)) as pool:
+        def submit_more():
+            while len(in_flight) < window:
+                pos = next(pending, None)
+                if pos is None:
+                    return
+                seed, size = jobs[pos]
+                in_flight.add(pool.submit(_run_job, (pos, seed, size, options, validate)))
+
+        submit_more()
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                in_flight.discard(future)
+                pos, seed, size, puzzle, status, nodes, elapsed, error = future.result()
+                done[pos] = (puzzle, status, nodes)
+                completed += 1
+                if error and (status, size) not in reported: # one line per kind, not per seed
+                    reported.add((status, size))
+                    print(f"seed {seed} size {size}: {status}: {error} (later ones for this size are only counted)", file=log)
+
+            # Write out the contiguous run of finished jobs in job order
+            while next_job in done:
+                puzzle, status, nodes = done.pop(next_job)
+                if puzzle is not None:
+                    writer.add(puzzle)
+                stats[status] += 1
+                stats["nodes"] += nodes
+                next_job += 1
+                since_checkpoint += 1
+            if since_checkpoint >= checkpoint_every:
+                writer.checkpoint(fsync=True)
+                progress.record(next_job, len(writer), stats)
+                since_checkpoint = 0
+            submit_more()
+
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                rate = completed / (now - start)
+                print(f"{next_job}/{len(jobs)} jobs, {len(writer)} puzzles, {rate:.1f} jobs/s, "
+                      f"{stats['timeout']} timeouts, {stats['exhausted']} unfillable, "
+                      f"{stats['no_mask'] + stats['error']} failed", file=log)
+                last_report = now
+
+    writer.checkpoint(fsync=True)
+    progress.record(next_job, len(writer), stats)
+    writer.close()
+
+    elapsed = time.perf_counter() - start
+    stats.update(jobs=len(jobs), puzzles=len(writer), elapsed=elapsed,
+                 jobs_per_second=completed / elapsed if elapsed else 0.0)
+    print(f"done: {completed} jobs in {elapsed:.1f}s ({stats['jobs_per_second']:.1f} jobs/s), "
+          f"{len(writer)} puzzles in {output}", file=log)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate crossword puzzles in parallel into a puzzle library.")
+    parser.add_argument("wordlist", help="one word per line, optionally WORD<tab>clue")
+    parser.add_argument("output", help="puzzle library to write")
+    parser.add_argument("--seeds", default="0:100", help="seed range start:stop, or a comma-separated list")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10])
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-nodes", type=int, default=None, help="deterministic search budget per job")
+    parser.add_argument("--timeout", type=float, default=60.0, help="wall-clock seconds allowed per job")
+    parser.add_argument("--black-ratio", type=float, default=0.18)
+    parser.add_argument("--validate", action="store_true",
+                        help="run crossword_validate on each puzzle and drop any that fail (needs NumPy)")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run")
+    parser.add_argument("--checkpoint-every", type=int, default=50, help="jobs between library checkpoints")
+    args = parser.parse_args(argv)
+
+    run_batch(args.wordlist, args.output, parse_seeds(args.seeds), args.sizes, workers=args.workers,
+              max_nodes=args.max_nodes, timeout=args.timeout, resume=args.resume,
+              checkpoint_every=args.checkpoint_every, mask_options={"black_ratio": args.black_ratio},
+              validate=args.validate)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,400 @@
+"""Printable and web exports of puzzles: PNG and SVG sheets plus a self-contained HTML page.
+
+Every export is built from a CrosswordPuzzle, so the numbering and clue
+lists are the ones the game shows (_prepare_puzzle / _prepare_clue_lists).
+Per puzzle NAME the exporter writes:
+
+    NAME.blank.png  NAME.solution.png    grid and clues, drawn on an offscreen pygame Surface
+    NAME.blank.svg  NAME.solution.svg    the same sheets as vector graphics
+    NAME.html                            playable page with inline CSS/JS and Check/Reveal buttons
+
+Puzzles are exported across a process pool and a JSON line is printed for
+each one as it finishes. With --skip-unchanged a puzzle is skipped when the
+hash of its encoded record (plus the export settings) matches the one in
+OUTDIR/manifest.json from the last run and its files are still there.
+
+Usage:
+    python crossword_export.py OUTDIR [--builtin] [FILE ...] [--formats png svg html] [--skip-unchanged]
+"""
+
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from crossword_io import MAGIC, PuzzleLibrary, decode_puzzle, encode_puzzle, load_puzzle
+from crossword_model import DEFAULT_PUZZLE, CrosswordPuzzle
+
+FORMATS = ("png", "svg", "html")
+EXPORT_VERSION = 1 # bump when the output changes so --skip-unchanged re-exports everything
+
+# Sheet geometry in pixels (SVG user units)
+CELL = 36
+PAGE_MARGIN = 24
+MIN_PAGE_WIDTH = 640
+NUMBER_SIZE = 11
+LETTER_SIZE = 24
+CLUE_SIZE = 15
+HEADING_SIZE = 18
+LINE_GAP = 4
+
+
+def _clue_columns(puzzle):
+    """(heading, [clue text, ...]) for Across and Down, in the game's order."""
+    return [("Across", [f"{num}. {clue} ({word.length})" for num, clue, word in puzzle.across_clues_display]),
+            ("Down", [f"{num}. {clue} ({word.length})" for num, clue, word in puzzle.down_clues_display])]
+
+
+def _wrap(text, width, measure):
+    """Splits text into lines no wider than width by measure(text); continuation lines are indented."""
+    lines, line = [], ""
+    for w in text.split(' '):
+        candidate = f"{line} {w}" if line else w
+        if line and measure(candidate) > width:
+            lines.append(line)
+            line = "   " + w
+        else:
+            line = candidate
+    lines.append(line)
+    return lines
+
+
+def _sheet_layout(puzzle, measure, line_height, heading_height):
+    """Page size and positioned text for a sheet: (width, height, grid_left, [(x, y, text, is_heading)])."""
+    grid_width = puzzle.width * CELL
+    width = max(grid_width + 2 * PAGE_MARGIN, MIN_PAGE_WIDTH)
+    grid_left = (width - grid_width) // 2
+    column_width = (width - 3 * PAGE_MARGIN) // 2
+    top = PAGE_MARGIN + puzzle.height * CELL + PAGE_MARGIN
+    texts = []
+    bottom = top
+    for i, (heading, clues) in enumerate(_clue_columns(puzzle)):
+        x = PAGE_MARGIN + i * (column_width + PAGE_MARGIN)
+        texts.append((x, top, heading, True))
+        y = top + heading_height + LINE_GAP
+        for clue in clues:
+            for line in _wrap(clue, column_width, measure):
+                texts.append((x, y, line, False))
+                y += line_height
+            y += LINE_GAP
+        bottom = max(bottom, y)
+    return width, bottom + PAGE_MARGIN, grid_left, texts
+
+
+# --- PNG ---
+
+_FONTS = {}
+
+def _font(size):
+    """pygame's bundled default font at size, so sheets look the same on every machine."""
+    import pygame
+    font = _FONTS.get(size)
+    if font is None:
+        pygame.font.init()
+        font = _FONTS[size] = pygame.font.Font(None, size * 9 // 7)
+    return font
+
+
+def render_png(puzzle, path, solution=False):
+    """Draws a blank (or solution) sheet on an offscreen Surface and saves it as PNG."""
+    import pygame
+    clue_font, heading_font = _font(CLUE_SIZE), _font(HEADING_SIZE)
+    number_font, letter_font = _font(NUMBER_SIZE), _font(LETTER_SIZE)
+    width, height, grid_left, texts = _sheet_layout(puzzle, lambda t: clue_font.size(t)[0],
+                                                    clue_font.get_linesize(), heading_font.get_linesize())
+    surface = pygame.Surface((width, height))
+    surface.fill((255, 255, 255))
+    black = (0, 0, 0)
+    for r in range(puzzle.height):
+        for c in range(puzzle.width):
+            rect = pygame.Rect(grid_left + c * CELL, PAGE_MARGIN + r * CELL, CELL + 1, CELL + 1)
+            idx = r * puzzle.width + c
+            if not puzzle.solution[idx]:
+                pygame.draw.rect(surface, black, rect)
+                continue
+            pygame.draw.rect(surface, black, rect, 1)
+            if puzzle.numbers[idx]:
+                surface.blit(number_font.render(str(puzzle.numbers[idx]), True, black), (rect.x + 2, rect.y + 2))
+            if solution:
+                glyph = letter_font.render(chr(puzzle.solution[idx]), True, black)
+                surface.blit(glyph, glyph.get_rect(center=(rect.centerx, rect.centery + 3)))
+    for x, y, text, is_heading in texts:
+        surface.blit((heading_font if is_heading else clue_font).render(text, True, black), (x, y))
+    pygame.image.save(surface, path)
+
+
+# --- SVG ---
+
+def _svg_measure(text):
+    return len(text) * CLUE_SIZE * 0.5 # average sans-serif advance; close enough for wrapping
+
+
+def render_svg(puzzle, solution=False):
+    """Returns a blank (or solution) sheet as an SVG document."""
+    width, height, grid_left, texts = _sheet_layout(puzzle, _svg_measure, CLUE_SIZE + 4, HEADING_SIZE + 4)
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+           f'viewBox="0 0 {width} {height}" font-family="Arial, Helvetica, sans-serif">',
+           f'<rect width="{width}" height="{height}" fill="#fff"/>']
+    for r in range(puzzle.height):
+        for c in range(puzzle.width):
+            x, y = grid_left + c * CELL, PAGE_MARGIN + r * CELL
+            idx = r * puzzle.width + c
+            if not puzzle.solution[idx]:
+                out.append(f'<rect x="{x}" y="{y}" width="{CELL}" height="{CELL}" fill="#000"/>')
+                continue
+            out.append(f'<rect x="{x}" y="{y}" width="{CELL}" height="{CELL}" fill="#fff" stroke="#000"/>')
+            if puzzle.numbers[idx]:
+                out.append(f'<text x="{x + 2}" y="{y + NUMBER_SIZE}" font-size="{NUMBER_SIZE}">'
+                           f'{puzzle.numbers[idx]}</text>')
+            if solution:
+                out.append(f'<text x="{x + CELL // 2}" y="{y + CELL // 2 + LETTER_SIZE // 3 + 2}" '
+                           f'font-size="{LETTER_SIZE}" text-anchor="middle">{chr(puzzle.solution[idx])}</text>')
+    for x, y, text, is_heading in texts:
+        size = HEADING_SIZE if is_heading else CLUE_SIZE
+        weight = ' font-weight="bold"' if is_heading else ''
+        out.append(f'<text x="{x}" y="{y + size}" font-size="{size}"{weight} xml:space="preserve">'
+                   f'{html.escape(text)}</text>')
+    out.append('</svg>')
+    return "\n".join(out) + "\n"
+
+
+# --- HTML ---
+
+_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+  body {{ font-family: Arial, Helvetica, sans-serif; margin: 20px; }}
+  .crossword {{ display: grid; grid-template-columns: repeat({width}, {cell}px); width: max-content; border: 1px solid #000; }}
+  .cell {{ width: {cell}px; height: {cell}px; box-sizing: border-box; border: 1px solid #000; position: relative; background: #fff; }}
+  .cell.black {{ background: #000; }}
+  .cell input {{ width: 100%; height: 100%; border: none; padding: 0; background: transparent; text-align: center;
+                 font-size: {letter}px; text-transform: uppercase; }}
+  .cell input.wrong {{ color: #d00; }}
+  .clue-number {{ position: absolute; top: 1px; left: 2px; font-size: {number}px; pointer-events: none; }}
+  .clues {{ display: flex; gap: 40px; margin-top: 20px; }}
+  .clues ol {{ padding-left: 2.5em; }}
+  @media print {{ button {{ display: none; }} }}
+</style>
+</head>
+<body>
+<h2>{title}</h2>
+<div class="crossword">
+{cells}
+</div>
+<p><button onclick="check()">Check</button> <button onclick="reveal()">Reveal</button></p>
+<div class="clues">
+{clues}
+</div>
+<script>
+const W = {width}, H = {height}, SOLUTION = {solution};
+let dir = 1; // 1: across, W: down
+const inputs = document.querySelectorAll(".cell input");
+const at = (i) => document.querySelector('input[data-i="' + i + '"]');
+inputs.forEach((el) => {{
+  el.addEventListener("focus", () => el.select());
+  el.addEventListener("dblclick", () => {{ dir = dir === 1 ? W : 1; }});
+  el.addEventListener("input", () => {{
+    el.value = el.value.slice(-1).toUpperCase();
+    el.classList.remove("wrong");
+    const next = at(+el.dataset.i + dir);
+    if (el.value && next && (dir === W || (+el.dataset.i + 1) % W !== 0)) next.focus();
+  }});
+  el.addEventListener("keydown", (e) => {{
+    const steps = {{ArrowLeft: -1, ArrowRight: 1, ArrowUp: -W, ArrowDown: W}};
+    if (steps[e.key]) {{ const next = at(+el.dataset.i + steps[e.key]); if (next) next.focus(); e.preventDefault(); }}
+  }});
+}});
+function check() {{
+  inputs.forEach((el) => el.classList.toggle("wrong", !!el.value && el.value !== SOLUTION[+el.dataset.i]));
+}}
+function reveal() {{
+  inputs.forEach((el) => {{ el.value = SOLUTION[+el.dataset.i]; el.classList.remove("wrong"); }});
+}}
+</script>
+</body>
+</html>
+"""
+
+
+def render_html(puzzle):
+    """Returns a playable, self-contained HTML page for puzzle."""
+    cells = []
+    for idx, ch in enumerate(puzzle.solution):
+        if not ch:
+            cells.append('<div class="cell black"></div>')
+            continue
+        number = puzzle.numbers[idx]
+        label = f'<span class="clue-number">{number}</span>' if number else ''
+        cells.append(f'<div class="cell">{label}<input maxlength="1" data-i="{idx}"></div>')
+    clues = []
+    for heading, entries in (("Across", puzzle.across_clues_display), ("Down", puzzle.down_clues_display)):
+        items = "".join(f'<li value="{num}">{html.escape(clue)} ({word.length})</li>' for num, clue, word in entries)
+        clues.append(f'<div><h3>{heading}</h3><ol>{items}</ol></div>')
+    solution = json.dumps("".join(chr(ch) if ch else "." for ch in puzzle.solution))
+    return _HTML.format(title=html.escape(puzzle.title), width=puzzle.width, height=puzzle.height, cell=CELL,
+                        letter=LETTER_SIZE, number=NUMBER_SIZE, cells="\n".join(cells), clues="\n".join(clues),
+                        solution=solution)
+
+
+# --- Pipeline ---
+
+def output_files(name, formats):
+    """File names written for puzzle name in formats."""
+    files = []
+    for fmt in formats:
+        if fmt == "html":
+            files.append(f"{name}.html")
+        else:
+            files += [f"{name}.blank.{fmt}", f"{name}.solution.{fmt}"]
+    return files
+
+
+def export_puzzle(data, outdir, name, formats=FORMATS):
+    """Writes every requested format for a PuzzleData; returns the file names written."""
+    puzzle = CrosswordPuzzle(data)
+    for filename in output_files(name, formats):
+        path = os.path.join(outdir, filename)
+        tmp = os.path.join(outdir, "." + filename) # keeps the extension pygame picks the format from
+        if filename.endswith(".png"):
+            render_png(puzzle, tmp, solution=".solution." in filename)
+            os.replace(tmp, path)
+            continue
+        if filename.endswith(".svg"):
+            text = render_svg(puzzle, solution=".solution." in filename)
+        else:
+            text = render_html(puzzle)
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    return output_files(name, formats)
+
+
+def _init_worker():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1") # stdout carries the JSON lines
+
+
+def _run_job(job):
+    """Exports one (name, digest, encoded puzzle, outdir, formats) job in a worker."""
+    name, digest, payload, outdir, formats = job
+    start = time.perf_counter()
+    try:
+        files = export_puzzle(decode_puzzle(payload), outdir, name, formats)
+        error = None
+    except Exception as e: # one bad puzzle should not stop the batch
+        files, error = [], repr(e)
+    return name, digest, files, error, time.perf_counter() - start
+
+
+def iter_jobs(paths, builtin=False):
+    """Yields (name, encoded puzzle) for the built-in puzzle and every puzzle in paths.
+
+    Library records are passed through as stored, without decoding them here.
+    """
+    if builtin:
+        yield "builtin", encode_puzzle(DEFAULT_PUZZLE)
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "rb") as f:
+            is_library = f.read(len(MAGIC)) == MAGIC
+        if is_library:
+            with PuzzleLibrary(path) as library:
+                for i in range(len(library)):
+                    yield f"{stem}-{i:05d}", bytes(library.raw(i))
+        else:
+            yield stem, encode_puzzle(load_puzzle(path))
+
+
+def content_hash(payload, formats):
+    """Hash of an encoded puzzle plus the export settings, for --skip-unchanged."""
+    h = hashlib.sha256(payload)
+    h.update(f"|v{EXPORT_VERSION}|{CELL}|{','.join(formats)}".encode())
+    return h.hexdigest()
+
+
+def run_export(paths, outdir, builtin=False, formats=FORMATS, workers=None, skip_unchanged=False,
+               out=sys.stdout, log=sys.stderr):
+    """Exports every puzzle into outdir across a process pool, printing one JSON line per puzzle."""
+    os.makedirs(outdir, exist_ok=True)
+    manifest_path = os.path.join(outdir, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    def save_manifest():
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    workers = workers or os.cpu_count() or 1
+    stats = {"exported": 0, "skipped": 0, "failed": 0}
+    jobs = iter_jobs(paths, builtin)
+    in_flight = set()
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+        def submit_more():
+            for name, payload in jobs:
+                digest = content_hash(payload, formats)
+                if (skip_unchanged and manifest.get(name) == digest
+                        and all(os.path.exists(os.path.join(outdir, f)) for f in output_files(name, formats))):
+                    stats["skipped"] += 1
+                    continue
+                in_flight.add(pool.submit(_run_job, (name, digest, payload, outdir, formats)))
+                if len(in_flight) >= workers * 4:
+                    return
+
+        submit_more()
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                in_flight.discard(future)
+                name, digest, files, error, elapsed = future.result()
+                if error is None:
+                    manifest[name] = digest
+                    stats["exported"] += 1
+                else:
+                    manifest.pop(name, None)
+                    stats["failed"] += 1
+                print(json.dumps({"name": name, "files": files, "error": error, "ms": round(elapsed * 1e3, 1)}),
+                      file=out, flush=True)
+                if (stats["exported"] + stats["failed"]) % 100 == 0:
+                    save_manifest()
+            submit_more()
+
+    save_manifest()
+    stats["elapsed"] = time.perf_counter() - start
+    print(f"exported {stats['exported']}, skipped {stats['skipped']} unchanged, {stats['failed']} failed "
+          f"in {stats['elapsed']:.1f}s", file=log)
+    return stats
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export puzzles as PNG/SVG sheets and HTML pages.")
+    parser.add_argument("outdir", help="directory to write the exports and manifest.json to")
+    parser.add_argument("files", nargs="*", help="JSON puzzles or puzzle libraries")
+    parser.add_argument("--builtin", action="store_true", help="also export the built-in puzzle")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--skip-unchanged", action="store_true",
+                        help="skip puzzles whose content hash matches the last export")
+    args = parser.parse_args(argv)
+
+    stats = run_export(args.files, args.outdir, args.builtin, tuple(args.formats), args.workers, args.skip_unchanged)
+    sys.exit(1 if stats["failed"] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,462 @@
+"""Automatic grid filling: black-square masks, a pattern index over a word list, and a solver.
+
+A mask is a list of strings, '#' for a black square and '.' for a white one.
+fill_grid() fills every across/down run of the mask with distinct words from a
+WordIndex using backtracking (most-constrained slot first) with arc-consistency
+propagation over the crossings. Candidate sets are Python ints used as bitsets,
+one per (length, position, letter), so a pattern such as "A?T??" is a couple
+of ANDs.
+
+The result is in the same (word, clue, row, col, direction) shape as
+WORDS_DATA, ready for PuzzleData / CrosswordPuzzle.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+
+from crossword_model import PuzzleData
+
+CLUE_PLACEHOLDER = "Clue needed"
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Slots with more candidates than this almost never rule out a letter at a
+# crossing, so propagation skips them rather than paying for 26 wide ANDs.
+PROPAGATE_LIMIT = 2000
+
+
+# --- Word list ---
+
+def load_word_list(path, min_len=2, max_len=None):
+    """Reads one word per line, optionally followed by a tab and a clue.
+
+    Returns {WORD: clue or None}. Non-alphabetic entries are skipped.
+    """
+    words = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            word, _, clue = line.rstrip("\n").partition("\t")
+            word = word.strip().upper()
+            if not (word.isascii() and word.isalpha()):
+                continue
+            if len(word) < min_len or (max_len and len(word) > max_len):
+                continue
+            words.setdefault(word, clue.strip() or None)
+    return words
+
+
+class WordIndex:
+    """Word list indexed by length, position and letter.
+
+    For each length L, words[L] is the sorted list of words of that length and
+    masks[L][pos][letter] is a bitset of the words with that letter at pos
+    (bit i set means words[L][i] matches). full[L] has every bit set.
+    """
+
+    def __init__(self, words):
+        if isinstance(words, dict):
+            self.clues = {w: c for w, c in words.items() if c}
+            words = words.keys()
+        else:
+            self.clues = {}
+        by_length = {}
+        for word in words:
+            by_length.setdefault(len(word), set()).add(word.upper())
+
+        self.words = {}
+        self.masks = {}
+        self.full = {}
+        for length, group in by_length.items():
+            self._index_length(length, group)
+        self._support = {} # (length, pos, letters bitmask) -> OR of the letters' bitsets
+
+    def _index_length(self, length, group):
+        group = sorted(group)
+        self.words[length] = group
+        self.full[length] = (1 << len(group)) - 1
+        nbytes = (len(group) + 7) // 8
+        masks = []
+        for pos in range(length):
+            bitmaps = [bytearray(nbytes) for _ in LETTERS]
+            for i, word in enumerate(group):
+                bitmaps[ord(word[pos]) - 65][i >> 3] |= 1 << (i & 7)
+            masks.append([int.from_bytes(b, "little") for b in bitmaps])
+        self.masks[length] = masks
+
+    def extended(self, words):
+        """Returns an index that also contains words, sharing every length that needs no change."""
+        by_length = {}
+        for word in words:
+            by_length.setdefault(len(word), set()).add(word.upper())
+        missing = {length: group.difference(self.words.get(length, ()))
+                   for length, group in by_length.items()}
+        missing = {length: group for length, group in missing.items() if group}
+        if not missing:
+            return self
+        index = WordIndex.__new__(WordIndex)
+        index.clues = self.clues
+        index.words, index.masks, index.full = dict(self.words), dict(self.masks), dict(self.full)
+        index._support = {}
+        for length, extra in missing.items():
+            index._index_length(length, extra.union(self.words.get(length, ())))
+        return index
+
+    @classmethod
+    def from_file(cls, path, min_len=2, max_len=None):
+        return cls(load_word_list(path, min_len, max_len))
+
+    def __len__(self):
+        return sum(len(group) for group in self.words.values())
+
+    def candidates(self, pattern):
+        """Bitset of words matching pattern ('?' or '.' for unknown letters)."""
+        length = len(pattern)
+        bits = self.full.get(length, 0)
+        masks = self.masks.get(length)
+        for pos, ch in enumerate(pattern):
+            if bits and ch not in "?.":
+                bits &= masks[pos][ord(ch.upper()) - 65]
+        return bits
+
+    def matching(self, pattern):
+        """List of words matching pattern, e.g. matching("A?T??")."""
+        group = self.words.get(len(pattern), [])
+        return [group[i] for i in iter_bits(self.candidates(pattern))]
+
+    def support(self, length, pos, letters):
+        """Bitset of words of length with any of `letters` (bit k = letter k) at pos. Cached."""
+        key = (length, pos, letters)
+        bits = self._support.get(key)
+        if bits is None:
+            if length not in self.masks:
+                return 0 # no words of that length
+            masks = self.masks[length][pos]
+            bits = 0
+            for k in range(26):
+                if letters >> k & 1:
+                    bits |= masks[k]
+            self._support[key] = bits
+        return bits
+
+    def clue_for(self, word):
+        return self.clues.get(word, CLUE_PLACEHOLDER)
+
+
+def iter_bits(bits):
+    """Yields the indices of the set bits of a non-negative int, lowest first."""
+    s = bin(bits)[:1:-1] # reversed binary digits, bit 0 first
+    i = s.find("1")
+    while i >= 0:
+        yield i
+        i = s.find("1", i + 1)
+
+
+# --- Masks and slots ---
+
+@dataclass(frozen=True, slots=True)
+class Slot:
+    """A run of white cells to be filled with one word; cells are flat indices r*width+c."""
+    row: int
+    col: int
+    direction: str
+    cells: tuple
+
+
+def mask_slots(mask, min_len=2):
+    """Returns the across and down runs of at least min_len white cells, in numbering order."""
+    height, width = len(mask), len(mask[0])
+    slots = []
+    for r in range(height):
+        for c in range(width):
+            if mask[r][c] == '#':
+                continue
+            for direction, dr, dc in (("A", 0, 1), ("D", 1, 0)):
+                pr, pc = r - dr, c - dc
+                if pr >= 0 and pc >= 0 and mask[pr][pc] != '#':
+                    continue # not the start of a run
+                cells = []
+                rr, cc = r, c
+                while rr < height and cc < width and mask[rr][cc] != '#':
+                    cells.append(rr * width + cc)
+                    rr, cc = rr + dr, cc + dc
+                if len(cells) >= min_len:
+                    slots.append(Slot(r, c, direction, tuple(cells)))
+    return slots
+
+
+def _run_lengths(grid, r, c):
+    """Returns (across, down) lengths of the white runs through (r, c)."""
+    height, width = len(grid), len(grid[0])
+    lengths = []
+    for dr, dc in ((0, 1), (1, 0)):
+        n = 1
+        for sign in (1, -1):
+            rr, cc = r + sign * dr, c + sign * dc
+            while 0 <= rr < height and 0 <= cc < width and grid[rr][cc]:
+                n += 1
+                rr, cc = rr + sign * dr, cc + sign * dc
+        lengths.append(n)
+    return lengths
+
+
+def _connected(grid):
+    height, width = len(grid), len(grid[0])
+    white = [(r, c) for r in range(height) for c in range(width) if grid[r][c]]
+    if not white:
+        return False
+    seen = {white[0]}
+    stack = [white[0]]
+    while stack:
+        r, c = stack.pop()
+        for nr, nc in ((r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)):
+            if 0 <= nr < height and 0 <= nc < width and grid[nr][nc] and (nr, nc) not in seen:
+                seen.add((nr, nc))
+                stack.append((nr, nc))
+    return len(seen) == len(white)
+
+
+class MaskError(ValueError):
+    """Raised by build_mask when no mask meets the rules within its attempts."""
+
+
+def build_mask(width, height=None, seed=0, black_ratio=0.18, min_len=3, max_len=None, attempts=200):
+    """Builds a rotationally symmetric black-square mask.
+
+    Every run of white cells is either a single (unchecked) cell or between
+    min_len and max_len long, no white cell is isolated, and the white cells
+    are connected. Raises MaskError if no such mask is found.
+    """
+    height = height or width
+    max_len = max_len or max(width, height)
+    rnd = random.Random(seed)
+    target = int(width * height * black_ratio)
+    for _ in range(attempts):
+        grid = [[True] * width for _ in range(height)]
+        black = 0
+        cells = [(r, c) for r in range(height) for c in range(width)
+                 if (r, c) <= (height - 1 - r, width - 1 - c)]
+        rnd.shuffle(cells)
+        for r, c in cells:
+            if black >= target and max(_run_lengths(grid, r, c)) <= max_len:
+                continue
+            mate = (height - 1 - r, width - 1 - c)
+            placed = {(r, c), mate}
+            for pr, pc in placed:
+                grid[pr][pc] = False
+            if _mask_ok_around(grid, placed, min_len):
+                black += len(placed)
+            else:
+                for pr, pc in placed:
+                    grid[pr][pc] = True
+        if _mask_ok(grid, min_len, max_len) and _connected(grid):
+            return ["".join('.' if w else '#' for w in row) for row in grid]
+    raise MaskError(f"Could not build a {width}x{height} mask after {attempts} attempts")
+
+
+def _mask_ok_around(grid, placed, min_len):
+    """Checks the run rules for white cells next to newly placed black squares."""
+    height, width = len(grid), len(grid[0])
+    for r, c in placed:
+        for nr, nc in ((r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)):
+            if 0 <= nr < height and 0 <= nc < width and grid[nr][nc]:
+                across, down = _run_lengths(grid, nr, nc)
+                if across == 1 and down == 1:
+                    return False
+                if 1 < across < min_len or 1 < down < min_len:
+                    return False
+    return True
+
+
+def _mask_ok(grid, min_len, max_len):
+    for r, row in enumerate(grid):
+        for c, white in enumerate(row):
+            if white:
+                across, down = _run_lengths(grid, r, c)
+                if across == down == 1:
+                    return False
+                for n in (across, down):
+                    if n > max_len or 1 < n < min_len:
+                        return False
+    return True
+
+
+# --- Solver ---
+
+class FillTimeout(Exception):
+    """Raised inside the search when the node or time budget runs out."""
+
+
+class _Restart(Exception):
+    """Raised inside the search when the current attempt's node budget runs out."""
+
+
+@dataclass
+class FillResult:
+    words_data: list # (word, clue, row, col, direction) tuples, or None if not filled
+    status: str # "filled", "exhausted" (no fill exists) or "timeout"
+    nodes: int
+    elapsed: float
+
+
+class GridSearch:
+    """Backtracking search state for one grid: slot domains, assignments and crossings."""
+
+    propagate_limit = PROPAGATE_LIMIT
+
+    def __init__(self, slots, index, rnd, max_nodes, deadline, nodes=0, restart_at=None):
+        self.slots = slots
+        self.index = index
+        self.rnd = rnd
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.nodes = nodes # carried over from earlier attempts
+        self.restart_at = restart_at
+        self._letters_cache = {} # (slot, pos) -> (domain, letters)
+
+        self.lengths = [len(s.cells) for s in slots]
+        self.domains = [index.full.get(n, 0) for n in self.lengths]
+        self.assigned = [None] * len(slots)
+        self.used = set()
+
+        # crossings[s] = [(pos_in_s, other_slot, pos_in_other), ...]
+        owners = {}
+        for s, slot in enumerate(slots):
+            for pos, cell in enumerate(slot.cells):
+                owners.setdefault(cell, []).append((s, pos))
+        self.crossings = [[] for _ in slots]
+        for pairs in owners.values():
+            for s, pos in pairs:
+                for other, opos in pairs:
+                    if other != s:
+                        self.crossings[s].append((pos, other, opos))
+
+    def _letters_at(self, s, pos):
+        """Bitmask (bit k = letter k) of letters some word in s's domain has at pos."""
+        domain = self.domains[s]
+        if not domain: # also covers lengths the index has no words for
+            return 0
+        cached = self._letters_cache.get((s, pos))
+        if cached is not None and cached[0] is domain:
+            return cached[1]
+        masks = self.index.masks[self.lengths[s]][pos]
+        letters = 0
+        for k in range(26):
+            if domain & masks[k]:
+                letters |= 1 << k
+        self._letters_cache[(s, pos)] = (domain, letters)
+        return letters
+
+    def _propagate(self, queue, trail):
+        """Arc consistency over crossings. Returns False on a wiped-out domain."""
+        domains, assigned, lengths, support = self.domains, self.assigned, self.lengths, self.index.support
+        limit = self.propagate_limit
+        while queue:
+            s = queue.pop()
+            if domains[s].bit_count() > limit:
+                continue
+            for pos, other, opos in self.crossings[s]:
+                if assigned[other] is not None:
+                    continue
+                narrowed = domains[other] & support(lengths[other], opos, self._letters_at(s, pos))
+                if narrowed != domains[other]:
+                    if not narrowed:
+                        return False
+                    trail.append((other, domains[other]))
+                    domains[other] = narrowed
+                    queue.append(other)
+        return True
+
+    def _tick(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise FillTimeout()
+        if self.restart_at is not None and self.nodes > self.restart_at:
+            raise _Restart()
+        if self.deadline is not None and self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise FillTimeout()
+
+    def _choose_slot(self):
+        best, best_count = None, None
+        for s, word in enumerate(self.assigned):
+            if word is None:
+                count = self.domains[s].bit_count()
+                if best is None or count < best_count:
+                    best, best_count = s, count
+                    if count <= 1:
+                        break
+        return best
+
+    def solve(self):
+        """Returns True once every slot is assigned."""
+        s = self._choose_slot()
+        if s is None:
+            return True
+        group = self.index.words[self.lengths[s]] if self.lengths[s] in self.index.words else []
+        candidates = list(iter_bits(self.domains[s]))
+        self.rnd.shuffle(candidates)
+        domain = self.domains[s]
+        for i in candidates:
+            word = group[i]
+            if word in self.used:
+                continue
+            self._tick()
+            self.assigned[s] = word
+            self.used.add(word)
+            self.domains[s] = 1 << i
+            trail = []
+            if self._propagate([s], trail) and self.solve():
+                return True
+            for other, old in reversed(trail):
+                self.domains[other] = old
+            self.domains[s] = domain
+            self.used.discard(word)
+            self.assigned[s] = None
+        return False
+
+
+def fill_grid(mask, index, seed=0, max_nodes=None, timeout=None, min_len=2, restart_nodes=200):
+    """Fills mask with words from index. Returns a FillResult.
+
+    The search restarts with a fresh random order whenever an attempt uses up
+    its node budget (restart_nodes, doubling each time), which avoids getting
+    stuck under a bad early choice. The same mask, index and seed always give
+    the same fill as long as the search is not cut short by timeout, which
+    depends on wall-clock time; max_nodes is the deterministic budget.
+    """
+    start = time.perf_counter()
+    slots = mask_slots(mask, min_len)
+    if any(len(slot.cells) not in index.words for slot in slots):
+        # Some slot has an empty domain: no fill exists, whatever the crossings
+        return FillResult(None, "exhausted", 0, time.perf_counter() - start)
+    deadline = start + timeout if timeout else None
+    rnd = random.Random(seed)
+    nodes = 0
+    budget = restart_nodes
+    while True:
+        restart_at = nodes + budget if budget else None
+        search = GridSearch(slots, index, rnd, max_nodes, deadline, nodes, restart_at)
+        try:
+            # Initial propagation narrows every slot against its crossings
+            filled = search._propagate(list(range(len(slots))), []) and search.solve()
+            status = "filled" if filled else "exhausted"
+        except FillTimeout:
+            filled, status = False, "timeout"
+        except _Restart:
+            nodes = search.nodes
+            budget *= 2
+            continue
+        break
+    words_data = None
+    if filled:
+        words_data = [(word, index.clue_for(word), slot.row, slot.col, slot.direction)
+                      for slot, word in zip(slots, search.assigned)]
+    return FillResult(words_data, status, search.nodes, time.perf_counter() - start)
+
+
+def generate_puzzle(index, size=10, seed=0, title=None, max_nodes=None, timeout=None, **mask_options):
+    """Builds a mask for seed, fills it and returns (PuzzleData or None, FillResult)."""
+    mask = build_mask(size, size, seed=seed, **mask_options)
+    result = fill_grid(mask, index, seed=seed, max_nodes=max_nodes, timeout=timeout)
+    if result.words_data is None:
+        return None, result
+    return PuzzleData(title or f"Generated {size}x{size} #{seed}", size, size, result.words_data), result
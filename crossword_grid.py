@@ -0,0 +1,160 @@
+"""Entries and numbering derived from the grid itself, with NumPy.
+
+_prepare_puzzle takes each word's start and direction on trust and numbers
+the starts in (row, col) order. This module goes the other way: given a
+black-square mask or a solution grid it finds every entry (a run of 2+
+white cells), numbers the starts in standard order and measures each run.
+Everything is whole-array shifts and cumulative ops, with no per-cell
+Python loop:
+
+    run_starts(white)     where across/down entries start, and which cells are in a run
+    run_lengths(white)    length of the run starting at each cell
+    derive_entries(grid)  GridEntries: numbers, per-entry start/number/length and cell -> entry maps
+
+GridEntries.words() turns the entries into the Word records and clue display
+lists CrosswordPuzzle builds (words, across_clues_display,
+down_clues_display), with answers read from the solution and clues looked up
+by (number, direction). crossword_validate uses the same run helpers to check
+that a puzzle's words match its grid.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from crossword_model import Word
+
+BLACK_CHARS = b"#" # in row strings; "." is white, as in crossword_fill masks
+
+
+def white_mask(grid, width=None):
+    """Boolean (height, width) array of white cells.
+
+    grid may be a boolean mask, a 2-D array of letter codes (0 = black), a
+    list of row strings ('#' or NUL = black, anything else white, so
+    crossword_fill.build_mask grids work as they are) or a flat solution bytearray
+    like CrosswordPuzzle.solution (pass width).
+    """
+    return _letters(grid, width) != 0
+
+
+def _letters(grid, width=None):
+    """(height, width) uint8 letter codes, 0 for black; a mask gives 1 for white."""
+    if isinstance(grid, np.ndarray):
+        return grid.astype(np.uint8)
+    if isinstance(grid, (bytes, bytearray, memoryview)):
+        return np.frombuffer(bytes(grid), dtype=np.uint8).reshape(-1, width)
+    rows = [row.encode("ascii") if isinstance(row, str) else bytes(row) for row in grid]
+    letters = np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(len(rows), -1).copy()
+    letters[np.isin(letters, np.frombuffer(BLACK_CHARS, dtype=np.uint8))] = 0
+    return letters
+
+
+def run_starts(white):
+    """Boolean grids of the cells where across and down entries (runs of 2+) start."""
+    left = np.zeros_like(white)
+    left[:, 1:] = white[:, :-1]
+    right = np.zeros_like(white)
+    right[:, :-1] = white[:, 1:]
+    up = np.zeros_like(white)
+    up[1:, :] = white[:-1, :]
+    below = np.zeros_like(white)
+    below[:-1, :] = white[1:, :]
+    start_across = white & ~left & right
+    start_down = white & ~up & below
+    in_across = white & (left | right)
+    in_down = white & (up | below)
+    return start_across, start_down, in_across, in_down
+
+
+def run_lengths(white, axis):
+    """Grid holding, at each white cell, the number of white cells from it to the end of its run
+    along axis (1 across, 0 down); so at a run start, the run's length."""
+    w = white if axis == 1 else white.T
+    height, width = w.shape
+    # Column of the first black cell at or after each cell (width past the edge)
+    cols = np.broadcast_to(np.arange(width), w.shape)
+    black_at = np.where(w, width, cols)
+    next_black = np.minimum.accumulate(black_at[:, ::-1], axis=1)[:, ::-1]
+    lengths = np.where(w, next_black - cols, 0)
+    return lengths if axis == 1 else lengths.T
+
+
+def _owners(starts, in_run, entry_ids, axis):
+    """Flat cell -> entry id (-1 for none): each run cell takes the id of the last start before it."""
+    marks = np.where(starts, entry_ids, -1)
+    # Ids grow in row-major order, so a running maximum along the axis carries each start's id down its run
+    return np.where(in_run, np.maximum.accumulate(marks, axis=axis), -1).ravel()
+
+
+@dataclass
+class GridEntries:
+    """Entries of a grid. Per-entry arrays are in number order; across ids come before down ids."""
+    width: int
+    height: int
+    numbers: np.ndarray # flat clue number per cell, 0 for none
+    across_start: np.ndarray # flat index of each across entry's first cell
+    across_number: np.ndarray
+    across_length: np.ndarray
+    down_start: np.ndarray
+    down_number: np.ndarray
+    down_length: np.ndarray
+    across_word: np.ndarray # flat cell -> across entry id, -1 for none
+    down_word: np.ndarray # flat cell -> len(across) + down entry index, -1 for none
+    letters: np.ndarray # flat letter codes (1 for every white cell when built from a mask)
+
+    def __len__(self):
+        return len(self.across_start) + len(self.down_start)
+
+    def words(self, clues=None):
+        """Word records plus (number, clue, word) display lists, like CrosswordPuzzle builds.
+
+        clues maps (number, "A"/"D") to clue text. Returns (words,
+        across_clues_display, down_clues_display); words are indexed by entry id.
+        """
+        clues = clues or {}
+        letters = self.letters.tobytes()
+        width = self.width
+        words, across, down = [], [], []
+        for direction, starts, numbers, lengths, stride, display in (
+                ("A", self.across_start, self.across_number, self.across_length, 1, across),
+                ("D", self.down_start, self.down_number, self.down_length, width, down)):
+            for start, number, length in zip(starts.tolist(), numbers.tolist(), lengths.tolist()):
+                text = letters[start:start + stride * length:stride].decode("latin-1")
+                clue = clues.get((number, direction), "")
+                r, c = divmod(start, width)
+                word = Word(text, clue, r, c, direction, number, start, stride, length, width, len(words))
+                words.append(word)
+                display.append((number, clue, word))
+        return words, across, down
+
+    def words_data(self, clues=None):
+        """The entries as PuzzleData.words_data tuples (answer, clue, row, col, direction)."""
+        return [(w.text, w.clue, w.row, w.col, w.direction) for w in self.words(clues)[0]]
+
+
+def derive_entries(grid, width=None):
+    """Finds, numbers and measures every entry of a mask or solution grid (see white_mask)."""
+    letters = _letters(grid, width)
+    white = letters != 0
+    height, width = white.shape
+    start_across, start_down, in_across, in_down = run_starts(white)
+
+    starts = (start_across | start_down).ravel()
+    numbers = np.zeros(height * width, dtype=np.int32)
+    numbers[starts] = np.arange(1, int(starts.sum()) + 1, dtype=np.int32)
+
+    across_start = np.flatnonzero(start_across)
+    down_start = np.flatnonzero(start_down)
+    across_ids = np.zeros((height, width), dtype=np.int64)
+    across_ids.ravel()[across_start] = np.arange(len(across_start))
+    down_ids = np.zeros((height, width), dtype=np.int64)
+    down_ids.ravel()[down_start] = np.arange(len(across_start), len(across_start) + len(down_start))
+
+    return GridEntries(
+        width, height, numbers,
+        across_start, numbers[across_start], run_lengths(white, 1).ravel()[across_start],
+        down_start, numbers[down_start], run_lengths(white, 0).ravel()[down_start],
+        _owners(start_across, in_across, across_ids, 1), _owners(start_down, in_down, down_ids, 0),
+        letters.ravel(),
+    )
@@ -0,0 +1,389 @@
+"""Puzzle files: a JSON interchange format and a packed binary library.
+
+JSON puzzle (one puzzle per file):
+
+    {"title": "...", "width": 10, "height": 10,
+     "words": [{"answer": "PYTHON", "clue": "...", "row": 0, "col": 0, "direction": "A"}, ...]}
+
+Binary library (many puzzles per file, little-endian):
+
+    header   magic b"CWPL", version u16, reserved u16, count u32, index_offset u64
+    records  u32 payload length + payload, back to back
+    index    count x u64 record offsets, at index_offset (always the end of the file)
+
+While a writer is adding records the index is stale and index_offset is 0;
+checkpoint() writes a fresh index and points the header at it. A reader
+that finds no valid index (a writer between checkpoints, or killed) walks
+the records instead.
+
+    payload  width u16, height u16, word count u16, title (u16 length + UTF-8),
+             then per word: row u16, col u16, direction u8, answer (u8 length + ASCII),
+             clue (u16 length + UTF-8)
+
+PuzzleLibrary maps the file with mmap and decodes only the records asked for,
+so picking puzzle #N from a large archive does not parse the others.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+
+from crossword_model import PuzzleData
+
+# --- JSON ---
+
+def puzzle_to_dict(data):
+    """Converts a PuzzleData to the JSON interchange structure."""
+    return {
+        "title": data.title,
+        "width": data.width,
+        "height": data.height,
+        "words": [{"answer": word, "clue": clue, "row": row, "col": col, "direction": direction}
+                  for word, clue, row, col, direction in data.words_data],
+    }
+
+
+def puzzle_from_dict(obj):
+    """Builds a PuzzleData from the JSON interchange structure.
+
+    Anything the library format cannot hold is rejected here (sizes and
+    coordinates are u16, answers 1-255 ASCII characters), so a loaded puzzle
+    always packs. Whether it is a good puzzle is crossword_validate's job.
+    """
+    try:
+        words_data = [(w["answer"], w.get("clue", ""), int(w["row"]), int(w["col"]), w["direction"].upper())
+                      for w in obj["words"]]
+        data = PuzzleData(obj.get("title", ""), int(obj["width"]), int(obj["height"]), words_data)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"Invalid puzzle: {e!r}") from e
+    if not isinstance(data.title, str) or len(data.title.encode("utf-8")) > 0xFFFF:
+        raise ValueError("Invalid puzzle: title must be a string of at most 65535 bytes")
+    if not (0 < data.width <= 0xFFFF and 0 < data.height <= 0xFFFF):
+        raise ValueError(f"Invalid puzzle: size {data.width}x{data.height} (1 to 65535 each way)")
+    if len(words_data) > 0xFFFF:
+        raise ValueError(f"Invalid puzzle: {len(words_data)} words (at most 65535)")
+    for word, clue, row, col, direction in words_data:
+        if not isinstance(word, str) or not word.isascii() or not 0 < len(word) <= 0xFF:
+            raise ValueError(f"Invalid puzzle: answer {word!r} must be 1 to 255 ASCII characters")
+        if direction not in ("A", "D"):
+            raise ValueError(f"Invalid puzzle: word '{word}' has direction '{direction}'")
+        if not (0 <= row <= 0xFFFF and 0 <= col <= 0xFFFF):
+            raise ValueError(f"Invalid puzzle: word '{word}' starts at ({row},{col})")
+        if not isinstance(clue, str) or len(clue.encode("utf-8")) > 0xFFFF:
+            raise ValueError(f"Invalid puzzle: clue of word '{word}' must be a string of at most 65535 bytes")
+    return data
+
+
+def load_puzzle(path):
+    """Reads a JSON puzzle file."""
+    with open(path, encoding="utf-8") as f:
+        return puzzle_from_dict(json.load(f))
+
+
+def save_puzzle(data, path):
+    """Writes a PuzzleData as a JSON puzzle file."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(puzzle_to_dict(data), f, indent=2)
+        f.write("\n")
+
+
+# --- Binary library ---
+
+MAGIC = b"CWPL"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQ")
+LENGTH = struct.Struct("<I")
+OFFSET = struct.Struct("<Q")
+RECORD_HEAD = struct.Struct("<HHH")
+WORD_HEAD = struct.Struct("<HHBB")
+U16 = struct.Struct("<H")
+
+
+def encode_puzzle(data):
+    """Packs a PuzzleData into a library record payload."""
+    title = data.title.encode("utf-8")
+    parts = [RECORD_HEAD.pack(data.width, data.height, len(data.words_data)), U16.pack(len(title)), title]
+    for word, clue, row, col, direction in data.words_data:
+        answer = word.encode("ascii")
+        clue_bytes = clue.encode("utf-8")
+        parts.append(WORD_HEAD.pack(row, col, ord(direction), len(answer)))
+        parts.append(answer)
+        parts.append(U16.pack(len(clue_bytes)))
+        parts.append(clue_bytes)
+    return b"".join(parts)
+
+
+def decode_puzzle(buf, pos=0):
+    """Unpacks a library record payload starting at buf[pos]."""
+    width, height, word_count = RECORD_HEAD.unpack_from(buf, pos)
+    pos += RECORD_HEAD.size
+    title, pos = _read_str(buf, pos)
+    words_data = []
+    for _ in range(word_count):
+        row, col, direction, answer_len = WORD_HEAD.unpack_from(buf, pos)
+        pos += WORD_HEAD.size
+        answer = bytes(buf[pos:pos + answer_len]).decode("ascii")
+        pos += answer_len
+        clue, pos = _read_str(buf, pos)
+        words_data.append((answer, clue, row, col, chr(direction)))
+    return PuzzleData(title, width, height, words_data)
+
+
+def _read_str(buf, pos):
+    (n,) = U16.unpack_from(buf, pos)
+    pos += U16.size
+    return bytes(buf[pos:pos + n]).decode("utf-8"), pos + n
+
+
+class LibraryWriter:
+    """Appends puzzles to a binary library file.
+
+    With append=True an existing library is reopened and extended; if its
+    index is missing or damaged (e.g. the writer was killed) the record
+    offsets are recovered by walking the length-prefixed records.
+    Call checkpoint() to make everything written so far readable, and close()
+    (or use as a context manager) when done.
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.offsets = []
+        if append and os.path.exists(path) and os.path.getsize(path) >= HEADER.size:
+            self._file = open(path, "r+b")
+            self.offsets, end = _recover_offsets(self._file)
+            self._dirty = False
+            self._invalidate_index()
+            self._file.seek(end)
+            self._file.truncate() # index was cut off; checkpoint() rewrites it
+        else:
+            self._file = open(path, "w+b")
+            self._file.write(HEADER.pack(MAGIC, VERSION, 0, 0, HEADER.size))
+            self._dirty = False
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def add(self, data):
+        """Appends one puzzle and returns its index in the library."""
+        payload = encode_puzzle(data)
+        f = self._file
+        if not self._dirty:
+            # Overwrite the trailing index; it is rewritten by checkpoint()
+            self._invalidate_index()
+            f.seek(self._data_end())
+            f.truncate()
+        self.offsets.append(f.tell())
+        f.write(LENGTH.pack(len(payload)))
+        f.write(payload)
+        return len(self.offsets) - 1
+
+    def _invalidate_index(self):
+        """Zeroes the header's index offset before the index is overwritten, so readers
+        (and a reopen after a crash) walk the records instead of trusting it."""
+        if not self._dirty:
+            f = self._file
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, 0, len(self.offsets), 0))
+            f.flush()
+            self._dirty = True
+
+    def _data_end(self):
+        if not self.offsets:
+            return HEADER.size
+        f = self._file
+        f.seek(self.offsets[-1])
+        (n,) = LENGTH.unpack(f.read(LENGTH.size))
+        return self.offsets[-1] + LENGTH.size + n
+
+    def checkpoint(self, fsync=False):
+        """Writes the index and header so readers see every puzzle added so far."""
+        f = self._file
+        if self._dirty:
+            index_offset = f.tell()
+            f.write(struct.pack(f"<{len(self.offsets)}Q", *self.offsets))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, 0, len(self.offsets), index_offset))
+            f.seek(0, os.SEEK_END)
+            self._dirty = False
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+
+    def truncate(self, count):
+        """Drops every puzzle after the first count (used when resuming an interrupted run)."""
+        if count >= len(self.offsets):
+            return
+        self._invalidate_index()
+        f = self._file
+        f.seek(self.offsets[count])
+        f.truncate()
+        del self.offsets[count:]
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.checkpoint()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _recover_offsets(f):
+    """Returns (record offsets, end of record data) for an existing library file."""
+    f.seek(0)
+    magic, version, _, count, index_offset = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{f.name}: not a puzzle library")
+    size = os.fstat(f.fileno()).st_size
+    if index_offset and index_offset + count * OFFSET.size == size:
+        f.seek(index_offset)
+        offsets = list(struct.unpack(f"<{count}Q", f.read(count * OFFSET.size)))
+        if _index_is_consistent(f, offsets, index_offset):
+            return offsets, index_offset
+
+    # Index is stale: walk the records, stopping at the first incomplete one
+    offsets = []
+    pos = HEADER.size
+    while pos + LENGTH.size <= size:
+        f.seek(pos)
+        (n,) = LENGTH.unpack(f.read(LENGTH.size))
+        if pos + LENGTH.size + n > size:
+            break
+        try:
+            decode_puzzle(f.read(n))
+        except (struct.error, UnicodeDecodeError):
+            break
+        offsets.append(pos)
+        pos += LENGTH.size + n
+    return offsets, pos
+
+
+def _index_is_consistent(f, offsets, index_offset):
+    """Checks that offsets chain record to record from the header up to index_offset."""
+    pos = HEADER.size
+    for offset in offsets:
+        if offset != pos:
+            return False
+        f.seek(pos)
+        (n,) = LENGTH.unpack(f.read(LENGTH.size))
+        pos += LENGTH.size + n
+    return pos == index_offset
+
+
+def write_library(path, puzzles):
+    """Writes an iterable of PuzzleData to a new library file and returns the count."""
+    with LibraryWriter(path) as writer:
+        for data in puzzles:
+            writer.add(data)
+        return len(writer)
+
+
+class PuzzleLibrary:
+    """Read-only, memory-mapped view of a binary puzzle library."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self._count, self._index_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a puzzle library")
+        self._offsets = None # record offsets found by walking, when the index cannot be used
+        if not self._index_offset or self._index_offset + self._count * OFFSET.size != len(self._mm):
+            self._offsets = _recover_offsets(self._file)[0]
+            self._count = len(self._offsets)
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, i):
+        if not -self._count <= i < self._count:
+            raise IndexError("puzzle index out of range")
+        if i < 0:
+            i += self._count
+        if self._offsets is not None:
+            return self._offsets[i]
+        return OFFSET.unpack_from(self._mm, self._index_offset + i * OFFSET.size)[0]
+
+    def __getitem__(self, i):
+        """Decodes puzzle i without touching any other record."""
+        return decode_puzzle(self._mm, self._offset(i) + LENGTH.size)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def raw(self, i):
+        """Returns the encoded payload of puzzle i (e.g. for hashing)."""
+        pos = self._offset(i)
+        (n,) = LENGTH.unpack_from(self._mm, pos)
+        return self._mm[pos + LENGTH.size:pos + LENGTH.size + n]
+
+    def title(self, i):
+        """Returns the title of puzzle i, decoding only the record head."""
+        pos = self._offset(i) + LENGTH.size + RECORD_HEAD.size
+        return _read_str(self._mm, pos)[0]
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_any(path, index=0):
+    """Loads a PuzzleData from a JSON puzzle or puzzle #index of a binary library."""
+    with open(path, "rb") as f:
+        is_library = f.read(len(MAGIC)) == MAGIC
+    if is_library:
+        with PuzzleLibrary(path) as library:
+            return library[index]
+    return load_puzzle(path)
+
+
+# --- Command line ---
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pack, list and extract crossword puzzle files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pack = sub.add_parser("pack", help="pack JSON puzzles into a library")
+    pack.add_argument("library")
+    pack.add_argument("puzzles", nargs="+")
+    pack.add_argument("--append", action="store_true", help="extend an existing library")
+    listing = sub.add_parser("list", help="list the puzzles in a library")
+    listing.add_argument("library")
+    extract = sub.add_parser("extract", help="write puzzle #N of a library as JSON")
+    extract.add_argument("library")
+    extract.add_argument("index", type=int)
+    extract.add_argument("output")
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        with LibraryWriter(args.library, append=args.append) as writer:
+            for path in args.puzzles:
+                writer.add(load_puzzle(path))
+            print(f"{args.library}: {len(writer)} puzzles")
+    elif args.command == "list":
+        with PuzzleLibrary(args.library) as library:
+            for i in range(len(library)):
+                print(f"{i}\t{library.title(i)}")
+    elif args.command == "extract":
+        with PuzzleLibrary(args.library) as library:
+            save_puzzle(library[args.index], args.output)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
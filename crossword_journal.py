@@ -0,0 +1,382 @@
+"""Autosave for a CrosswordSession: an append-only journal of letter changes plus snapshots.
+
+Every letter change is appended to the journal as a fixed-size record and the
+file is fsync'd in batches (every `sync_every` records, once the oldest
+unsynced record is `sync_interval` seconds old, and on close), so a crash
+loses at most one batch. Writes check the interval themselves; between
+writes the owner calls sync_due() from its idle loop. Once the journal
+holds `snapshot_every` records it is compacted: the current letters and the
+undo history go to the snapshot file and the journal starts over empty.
+Restoring loads the snapshot and replays the journal records written after it.
+
+The same records drive undo/redo. The history is parallel arrays (cell, old
+letter, new letter, joined flag) plus a position; undo writes back the old
+letter of the edit before the position, redo the new letter of the edit at
+it, and both are journalled too, so history survives a restart.
+
+Files (little-endian):
+
+    journal    magic b"CWJL", version u16, reserved u16, cell count u32,
+               puzzle key u64, generation u32
+               then records: kind u8, cell u32, old u8, new u8, time f64
+    snapshot   magic b"CWSN", version u16, reserved u16, cell count u32,
+               puzzle key u64, generation u32, history length u32, position u32
+               then letters (cell count bytes), history cells (u32 each),
+               old letters, new letters and joined flags (a byte each)
+
+The snapshot's generation is that of the journal it absorbed; a journal
+whose generation is not newer is already in the snapshot and is skipped, so
+a crash between writing the snapshot and resetting the journal is harmless.
+
+Usage:
+    python crossword_journal.py JOURNAL [--bench N]
+"""
+
+import hashlib
+import os
+import struct
+import time
+from array import array
+
+JOURNAL_MAGIC = b"CWJL"
+SNAPSHOT_MAGIC = b"CWSN"
+VERSION = 1
+JOURNAL_HEADER = struct.Struct("<4sHHIQI")
+SNAPSHOT_HEADER = struct.Struct("<4sHHIQIII")
+RECORD = struct.Struct("<BIBBd")
+
+# Record kinds
+EDIT = 1 # a letter change that starts a new action
+JOINED = 2 # a letter change that belongs to the previous action (reveal_word)
+UNDO = 3 # the edit before the history position was undone
+REDO = 4 # the edit at the history position was redone
+
+
+def puzzle_key(puzzle):
+    """64-bit fingerprint of a puzzle's shape and answers, so a save is never applied to another puzzle."""
+    digest = hashlib.blake2b(struct.pack("<HH", puzzle.width, puzzle.height) + bytes(puzzle.solution),
+                             digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def default_path(puzzle, directory):
+    """Journal path for puzzle inside directory, named after its key."""
+    return os.path.join(directory, f"{puzzle_key(puzzle):016x}.cwj")
+
+
+def _write_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SessionJournal:
+    """Records a session's letter changes to disk and replays them for restore and undo/redo."""
+
+    def __init__(self, session, path, snapshot_every=5000, sync_every=64, sync_interval=1.0):
+        self.session = session
+        self.path = path
+        self.snapshot_path = path + ".snap"
+        self.snapshot_every = snapshot_every
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.key = puzzle_key(session.puzzle)
+        self.cell_count = len(session.user)
+
+        # Undo history: parallel arrays indexed by edit, position = edits currently applied
+        self.cells = array('I')
+        self.olds = bytearray()
+        self.news = bytearray()
+        self.joined = bytearray()
+        self.position = 0
+
+        self.generation = 0
+        self._file = None
+        self._records = 0 # records in the current journal
+        self._pending = 0 # records written since the last fsync
+        self._pending_since = 0.0 # monotonic time of the oldest of them
+        self._applying = False # undo/redo in progress: their letter changes are not new edits
+
+    # --- Restore ---
+
+    def restore(self):
+        """Loads the snapshot and journal (if any) into the session and starts recording.
+
+        Returns a dict of what was read: snapshot and journal record counts and
+        the time taken in ms.
+        """
+        start = time.perf_counter()
+        letters = bytearray(self.cell_count)
+        snapshot_generation = -1
+        header = self._read_snapshot(letters)
+        if header is not None:
+            snapshot_generation = header
+        replayed = 0
+        data = self._read_journal()
+        if data is not None and self.generation > snapshot_generation:
+            replayed = self._replay(data, letters)
+        else:
+            self.generation = snapshot_generation + 1
+            self._start_journal()
+        self.session.load_letters(letters)
+        self._open_for_append()
+        self.session.on_letter = self._on_letter
+        return {"snapshot": header is not None, "history": len(self.cells), "replayed": replayed,
+                "ms": round((time.perf_counter() - start) * 1e3, 3)}
+
+    def _read_snapshot(self, letters):
+        """Fills letters and the history from the snapshot; returns its generation, or None if unusable."""
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < SNAPSHOT_HEADER.size:
+            return None
+        magic, version, _, cell_count, key, generation, length, position = SNAPSHOT_HEADER.unpack_from(data)
+        if (magic != SNAPSHOT_MAGIC or version != VERSION or cell_count != self.cell_count or key != self.key
+                or len(data) != SNAPSHOT_HEADER.size + cell_count + 7 * length or position > length):
+            return None
+        pos = SNAPSHOT_HEADER.size
+        letters[:] = data[pos:pos + cell_count]
+        pos += cell_count
+        self.cells = array('I')
+        self.cells.frombytes(data[pos:pos + 4 * length])
+        pos += 4 * length
+        self.olds = bytearray(data[pos:pos + length])
+        self.news = bytearray(data[pos + length:pos + 2 * length])
+        self.joined = bytearray(data[pos + 2 * length:pos + 3 * length])
+        self.position = position
+        return generation
+
+    def _read_journal(self):
+        """Returns the journal's records as bytes (a torn last record dropped), or None if unusable."""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < JOURNAL_HEADER.size:
+            return None
+        magic, version, _, cell_count, key, generation = JOURNAL_HEADER.unpack_from(data)
+        if magic != JOURNAL_MAGIC or version != VERSION or cell_count != self.cell_count or key != self.key:
+            return None
+        self.generation = generation
+        body = len(data) - JOURNAL_HEADER.size
+        return memoryview(data)[JOURNAL_HEADER.size:JOURNAL_HEADER.size + body - body % RECORD.size]
+
+    def _replay(self, data, letters):
+        """Applies journal records to letters and the history; returns how many were applied."""
+        cells, olds, news, joined = self.cells, self.olds, self.news, self.joined
+        position = self.position
+        count = 0
+        for kind, cell, old, new, _ in RECORD.iter_unpack(data):
+            if cell >= self.cell_count:
+                break
+            if kind == EDIT or kind == JOINED:
+                if position < len(cells): # a new edit drops the redo tail
+                    del cells[position:], olds[position:], news[position:], joined[position:]
+                cells.append(cell)
+                olds.append(old)
+                news.append(new)
+                joined.append(kind == JOINED)
+                letters[cell] = new
+                position += 1
+            elif kind == UNDO and position > 0:
+                position -= 1
+                letters[cells[position]] = olds[position]
+            elif kind == REDO and position < len(cells):
+                letters[cells[position]] = news[position]
+                position += 1
+            else:
+                break
+            count += 1
+        self.position = position
+        self._records = count
+        return count
+
+    # --- Recording ---
+
+    def _start_journal(self):
+        """Replaces the journal with an empty one of the current generation."""
+        header = JOURNAL_HEADER.pack(JOURNAL_MAGIC, VERSION, 0, self.cell_count, self.key, self.generation)
+        _write_atomic(self.path, header)
+        self._records = 0
+
+    def _open_for_append(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "r+b")
+        # Drop anything past the last whole record the replay accepted
+        self._file.truncate(JOURNAL_HEADER.size + self._records * RECORD.size)
+        self._file.seek(0, os.SEEK_END)
+
+    def _write(self, kind, cell, old, new):
+        self._file.write(RECORD.pack(kind, cell, old, new, time.time()))
+        self._records += 1
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending += 1
+        if self._pending >= self.sync_every or time.monotonic() - self._pending_since >= self.sync_interval:
+            self.sync()
+        if self._records >= self.snapshot_every:
+            self.snapshot()
+
+    def _on_letter(self, idx, old, new, joined):
+        if self._applying:
+            return
+        position = self.position
+        if position < len(self.cells):
+            del self.cells[position:], self.olds[position:], self.news[position:], self.joined[position:]
+        self.cells.append(idx)
+        self.olds.append(old)
+        self.news.append(new)
+        self.joined.append(joined)
+        self.position = position + 1
+        self._write(JOINED if joined else EDIT, idx, old, new)
+
+    def sync(self):
+        """Flushes buffered records and fsyncs the journal."""
+        if self._file is not None and self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def sync_due(self):
+        """Syncs if unsynced records have waited sync_interval; returns seconds until the next sync is due.
+
+        None when nothing is waiting, so an idle loop can block without a timeout.
+        """
+        if not self._pending:
+            return None
+        wait = self._pending_since + self.sync_interval - time.monotonic()
+        if wait > 0:
+            return wait
+        self.sync()
+        return None
+
+    def snapshot(self):
+        """Compacts: writes letters and history to the snapshot file and empties the journal."""
+        self.sync()
+        length = len(self.cells)
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, VERSION, 0, self.cell_count, self.key,
+                                      self.generation, length, self.position)
+        _write_atomic(self.snapshot_path,
+                      b"".join((header, bytes(self.session.user), self.cells.tobytes(),
+                                self.olds, self.news, self.joined)))
+        self.generation += 1
+        self._start_journal()
+        self._open_for_append()
+
+    def close(self):
+        """Syncs and closes the journal; the session stops recording."""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+        if self.session.on_letter == self._on_letter:
+            self.session.on_letter = None
+
+    # --- Undo/redo ---
+
+    def undo(self):
+        """Reverts the last action (all its joined edits). Returns the cells changed."""
+        changed = []
+        self._applying = True
+        try:
+            while self.position > 0:
+                self.position -= 1
+                p = self.position
+                self.session.set_letter(self.cells[p], self.olds[p])
+                self._write(UNDO, self.cells[p], self.news[p], self.olds[p])
+                changed.append(self.cells[p])
+                if not self.joined[p]:
+                    break
+        finally:
+            self._applying = False
+        return changed
+
+    def redo(self):
+        """Reapplies the next undone action. Returns the cells changed."""
+        changed = []
+        self._applying = True
+        try:
+            while self.position < len(self.cells):
+                p = self.position
+                self.position += 1 # before the write, which may snapshot the history
+                self.session.set_letter(self.cells[p], self.news[p])
+                self._write(REDO, self.cells[p], self.olds[p], self.news[p])
+                changed.append(self.cells[p])
+                if self.position == len(self.cells) or not self.joined[self.position]:
+                    break
+        finally:
+            self._applying = False
+        return changed
+
+
+def bench_restore(edits, path, seed=0):
+    """Times restoring a session whose journal holds `edits` letter changes (no snapshot). Returns a dict."""
+    import random
+
+    from crossword_model import CrosswordPuzzle, CrosswordSession
+
+    puzzle = CrosswordPuzzle()
+    rnd = random.Random(seed)
+    white = puzzle.white_indices()
+    for stale in (path, path + ".snap"):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    session = CrosswordSession(puzzle)
+    journal = SessionJournal(session, path, snapshot_every=edits + 1, sync_every=256)
+    journal.restore()
+    start = time.perf_counter()
+    while len(journal.cells) < edits: # draws that leave the letter unchanged record nothing
+        idx = rnd.choice(white)
+        session.set_letter(idx, rnd.choice((0, puzzle.solution[idx], ord(rnd.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ")))))
+    record_ms = (time.perf_counter() - start) * 1e3
+    journal.close()
+    expected = bytes(session.user)
+
+    restored = CrosswordSession(puzzle)
+    journal = SessionJournal(restored, path)
+    stats = journal.restore()
+    journal.close()
+    assert bytes(restored.user) == expected
+    return {"edits": edits, "journal_bytes": os.path.getsize(path), "record_ms": round(record_ms, 3),
+            "restore": stats}
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Inspect an autosave journal, or time restoring one.")
+    parser.add_argument("journal", help="journal file (the snapshot is JOURNAL.snap)")
+    parser.add_argument("--bench", type=int, metavar="N",
+                        help="write a fresh N-edit journal for the built-in puzzle at JOURNAL and time its restore")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        print(json.dumps(bench_restore(args.bench, args.journal)))
+        return
+    with open(args.journal, "rb") as f:
+        data = f.read()
+    magic, version, _, cell_count, key, generation = JOURNAL_HEADER.unpack_from(data)
+    body = memoryview(data)[JOURNAL_HEADER.size:]
+    kinds = {EDIT: 0, JOINED: 0, UNDO: 0, REDO: 0}
+    for kind, *_ in RECORD.iter_unpack(body[:len(body) - len(body) % RECORD.size]):
+        kinds[kind] = kinds.get(kind, 0) + 1
+    print(json.dumps({"magic": magic.decode("ascii", "replace"), "version": version, "cells": cell_count,
+                      "key": f"{key:016x}", "generation": generation,
+                      "records": {"edit": kinds[EDIT], "joined": kinds[JOINED], "undo": kinds[UNDO],
+                                  "redo": kinds[REDO]},
+                      "torn_bytes": len(body) % RECORD.size,
+                      "snapshot": os.path.exists(args.journal + ".snap")}))
+
+
+if __name__ == '__main__':
+    main()
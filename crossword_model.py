@@ -0,0 +1,503 @@
+"""Headless crossword puzzle and play-session model.
+
+Holds everything the game needs that is not drawing: grid building, numbering,
+clue lists, cursor movement, typing and checking. It does not import pygame,
+so batch tools and tests can use it without SDL or a display.
+"""
+
+from array import array
+from dataclasses import dataclass
+
+# --- Constants ---
+GRID_SIZE = 10
+
+# --- Crossword Data ---
+# (word, clue, start_row, start_col, direction ('A' or 'D'))
+# Numbering will be assigned automatically
+WORDS_DATA = [
+    ("PYTHON", "Popular programming language", 0, 0, "A"),
+    ("GRID", "Network of lines for the puzzle", 0, 0, "D"),
+    ("LOOP", "Repeated execution of code", 2, 1, "A"),
+    ("TEXT", "Written words or characters", 0, 3, "D"),
+    ("EVENT", "Something that happens, in Pygame", 4, 3, "A"),
+    ("ARRAY", "Ordered series or arrangement", 2, 6, "D"),
+    ("TEN", "Number of rows/columns in this grid", 6, 0, "A"),
+    ("SET", "To put or place something", 6, 0, "D"), # Shares 'T' with TEN
+    ("INPUT", "Data entered into a system", 8, 2, "A"),
+    ("MOUSE", "Computer pointing device", 4, 5, "D"), # Shares 'E' with EVENT
+    ("CELL", "A single box in the grid", 0, 8, "D"),
+    ("pygame", "Library used for this game", 6, 4, "A") #pygame word
+]
+
+
+@dataclass
+class PuzzleData:
+    """A puzzle as loaded from a file: dimensions plus (word, clue, row, col, direction) tuples."""
+    title: str
+    width: int
+    height: int
+    words_data: list
+
+
+DEFAULT_PUZZLE = PuzzleData("10x10 Crossword Puzzle", GRID_SIZE, GRID_SIZE, WORDS_DATA)
+
+
+@dataclass(frozen=True, slots=True)
+class Word:
+    """A numbered entry. Its cells are the flat indices start, start+stride, ... (length of them)."""
+    text: str
+    clue: str
+    row: int
+    col: int
+    direction: str
+    number: int
+    start: int # flat index r*width+c of the first cell
+    stride: int # 1 for across, width for down
+    length: int # number of in-grid cells
+    width: int
+    word_id: int # position in CrosswordPuzzle.words
+
+    @property
+    def indices(self):
+        """Flat cell indices of the word."""
+        return range(self.start, self.start + self.stride * self.length, self.stride)
+
+    @property
+    def cells(self):
+        """(r,c) tuples of the word, in order."""
+        return tuple(divmod(i, self.width) for i in self.indices)
+
+    def cell(self, pos):
+        """(r,c) of the word's pos-th letter."""
+        return divmod(self.start + pos * self.stride, self.width)
+
+
+class CrosswordPuzzle:
+    """Static puzzle data: flat grids, numbered words, clue lists and the cell-to-word index.
+
+    Grids are flat and indexed by r*width+c. solution holds the ASCII letter of
+    each white cell and 0 for black squares; numbers holds clue numbers (0 for none).
+    """
+
+    def __init__(self, data=DEFAULT_PUZZLE):
+        self.title = data.title
+        self.width = data.width
+        self.height = data.height
+        cell_count = self.width * self.height
+        self.solution = bytearray(cell_count)
+        self.numbers = array('H', bytes(2 * cell_count))
+
+        self.words = [] # Will store Word records
+
+        # Cell-to-word index: across_word[i]/down_word[i] is the position in
+        # self.words of the across/down word covering flat cell i, or -1.
+        # Built once in _prepare_puzzle so cell lookups never scan self.words.
+        self.across_word = array('i', [-1]) * cell_count
+        self.down_word = array('i', [-1]) * cell_count
+
+        self._prepare_puzzle(data)
+
+        self.across_clues_display = [] # (number, clue_text, word)
+        self.down_clues_display = []   # (number, clue_text, word)
+        self._prepare_clue_lists()
+
+    def _prepare_puzzle(self, data):
+        """Populates solution, numbers, words and the cell index from a PuzzleData."""
+        width, height = self.width, self.height
+        word_starts = {} # (row, col) -> number
+        current_word_number = 1
+
+        # Sort words to assign numbers consistently (optional, but good for predictability)
+        # Typically, words are numbered left-to-right, top-to-bottom.
+        sorted_words_data = sorted(data.words_data, key=lambda x: (x[2], x[3]))
+
+        for word_str, clue, r_start, c_start, direction in sorted_words_data:
+            text = word_str.upper()
+
+            # Assign word number if it's a new starting cell
+            if (r_start, c_start) not in word_starts:
+                word_starts[(r_start, c_start)] = current_word_number
+                number = current_word_number
+                current_word_number += 1
+            else:
+                number = word_starts[(r_start, c_start)]
+
+            # Only the in-grid prefix of a word is kept
+            dr, dc = (0, 1) if direction == "A" else (1, 0)
+            length = 0
+            for i in range(len(text)):
+                r, c = r_start + dr * i, c_start + dc * i
+                if not (0 <= r < height and 0 <= c < width):
+                    print(f"Error: Word '{word_str}' at ({r_start},{c_start}) goes out of bounds.")
+                    break
+                length += 1
+
+            start = r_start * width + c_start if length else 0
+            stride = 1 if direction == "A" else width
+            word_id = len(self.words)
+            word = Word(text, clue, r_start, c_start, direction, number, start, stride, length, width, word_id)
+            self.words.append(word)
+            if length:
+                self.numbers[start] = number
+
+            owner = self.across_word if direction == "A" else self.down_word
+            try:
+                for i, idx in enumerate(word.indices):
+                    self.solution[idx] = ord(text[i])
+                    # First word registered for a cell/direction wins, matching the old scan order
+                    if owner[idx] < 0:
+                        owner[idx] = word_id
+            except ValueError: # the solution holds one byte per cell
+                raise ValueError(f"Invalid puzzle: word '{word_str}' has a letter outside Latin-1") from None
+
+    def _prepare_clue_lists(self):
+        """Populates the lists of clues for display."""
+        seen_numbers_across = set()
+        seen_numbers_down = set()
+
+        # Sort words by number for ordered clue list
+        sorted_words = sorted(self.words, key=lambda w: w.number)
+
+        for word in sorted_words:
+            num = word.number
+            if word.direction == "A" and num not in seen_numbers_across:
+                self.across_clues_display.append((num, word.clue, word))
+                seen_numbers_across.add(num)
+            elif word.direction == "D" and num not in seen_numbers_down:
+                self.down_clues_display.append((num, word.clue, word))
+                seen_numbers_down.add(num)
+
+        # Further sort by number just in case (though primary sort should handle it)
+        self.across_clues_display.sort(key=lambda x: x[0])
+        self.down_clues_display.sort(key=lambda x: x[0])
+
+    def is_white(self, r, c):
+        """True if (r, c) is inside the grid and not a black square."""
+        return 0 <= r < self.height and 0 <= c < self.width and self.solution[r * self.width + c] != 0
+
+    def number_at(self, r, c):
+        """Clue number printed in (r, c), or 0."""
+        return self.numbers[r * self.width + c]
+
+    def word_at(self, cell, direction):
+        """Returns (word, position_in_word) for the word covering cell in direction, or None."""
+        if cell is None:
+            return None
+        r, c = cell
+        if not (0 <= r < self.height and 0 <= c < self.width):
+            return None
+        idx = r * self.width + c
+        word_id = (self.across_word if direction == "A" else self.down_word)[idx]
+        if word_id < 0:
+            return None
+        word = self.words[word_id]
+        return word, (idx - word.start) // word.stride
+
+    def white_indices(self):
+        """Flat indices of every white cell."""
+        return [i for i, ch in enumerate(self.solution) if ch]
+
+
+class CrosswordSession:
+    """A player's progress through a puzzle: entered letters, cursor and direction.
+
+    Entered letters live in a flat bytearray (ASCII letter, 0 for empty) indexed
+    like the puzzle grids; the cursor API still speaks (row, col).
+
+    Every change to an entered letter goes through _set_letter, which keeps
+    per-word filled/correct counts and the puzzle-wide totals up to date in
+    O(1) via the cell-to-word index, so completion checks never scan the grid.
+    """
+
+    def __init__(self, puzzle):
+        self.puzzle = puzzle
+        self.user = bytearray(puzzle.width * puzzle.height)
+
+        # Progress counters, indexed like puzzle.words
+        self.word_filled = array('H', bytes(2 * len(puzzle.words)))
+        self.word_correct = array('H', bytes(2 * len(puzzle.words)))
+        self.filled_count = 0
+        self.correct_count = 0
+        self.white_count = sum(1 for ch in puzzle.solution if ch)
+
+        self.checked_wrong = set() # flat indices marked wrong by check_word, until retyped
+        self.changed = set() # flat indices whose letter or mark changed; the view drains it
+        # Called as on_letter(idx, old, new, joined) after every letter change; joined is
+        # True for the second and later cells changed by one action (reveal_word)
+        self.on_letter = None
+
+        self.active_cell = None # (row, col)
+        self.active_direction = "A" # "A" for across, "D" for down
+        self.current_word_highlight = () # (r,c) tuples for the active word
+        self.active_word = None # word object for the current highlight
+        self.active_clue_text = ""
+        # While set, update_highlight only tracks active_word; the highlight cells and
+        # clue text wait for refresh_view(), so a frame's worth of input builds them once
+        self.defer_view = False
+        self._view_stale = False
+
+    # --- Cursor ---
+
+    def select_cell(self, row, col):
+        """Selects a cell as if it were clicked. Clicking the active cell again toggles direction."""
+        if not self.puzzle.is_white(row, col):
+            self.clear_selection()
+            return
+
+        cell = (row, col)
+        if self.active_cell == cell: # Clicked same cell again
+            # Toggle direction if the cell is part of both A and D words
+            if self._has_both_directions(cell):
+                self.active_direction = "D" if self.active_direction == "A" else "A"
+        else: # Clicked a new cell
+            self.active_cell = cell
+            # Default to Across if possible, else Down
+            if self.puzzle.word_at(cell, "A"):
+                self.active_direction = "A"
+            elif self.puzzle.word_at(cell, "D"): # If not part of any across word, try down
+                self.active_direction = "D"
+            else: # Not part of any word (should not happen if the grid is correct)
+                self.active_cell = None # Deselect
+
+        self.update_highlight()
+
+    def clear_selection(self):
+        """Deselects the active cell."""
+        self.active_cell = None
+        self.current_word_highlight = ()
+        self.active_word = None
+        self.active_clue_text = ""
+        self._view_stale = False
+
+    def word_id(self, word):
+        """Position of word in puzzle.words."""
+        return word.word_id
+
+    def letter_at(self, r, c):
+        """The letter entered at (r, c), or '' if empty."""
+        ch = self.user[r * self.puzzle.width + c]
+        return chr(ch) if ch else ''
+
+    def _has_both_directions(self, cell):
+        return self.puzzle.word_at(cell, "A") is not None and self.puzzle.word_at(cell, "D") is not None
+
+    def toggle_direction(self):
+        """Switches between Across and Down if the active cell belongs to both."""
+        if self.active_cell:
+            if self._has_both_directions(self.active_cell):
+                self.active_direction = "D" if self.active_direction == "A" else "A"
+                self.update_highlight()
+
+    def update_highlight(self):
+        """Updates the highlighted word and current clue based on active_cell and active_direction."""
+        previous = self.active_word
+        self.active_word = None
+        if self.active_cell:
+            entry = self.puzzle.word_at(self.active_cell, self.active_direction)
+            if entry is None:
+                # If no word in current direction, try to find one in the other direction
+                other_direction = "D" if self.active_direction == "A" else "A"
+                entry = self.puzzle.word_at(self.active_cell, other_direction)
+                if entry is not None:
+                    self.active_direction = other_direction # Switch to this direction
+            if entry is not None:
+                self.active_word = entry[0]
+
+        if self.active_word is previous and not self._view_stale:
+            return # Same word: the highlight tuple and clue text stay as they are
+        if self.defer_view:
+            self._view_stale = True
+        else:
+            self._build_view()
+
+    def refresh_view(self):
+        """Builds the highlight cells and clue text left stale by update_highlight while defer_view was set."""
+        if self._view_stale:
+            self._build_view()
+
+    def _build_view(self):
+        word = self.active_word
+        self._view_stale = False
+        if word is None:
+            self.current_word_highlight = ()
+            self.active_clue_text = ""
+        else:
+            self.current_word_highlight = word.cells
+            self.active_clue_text = f"{word.number}{word.direction}. {word.clue}"
+
+    def move(self, dr, dc):
+        """Moves the active cell by dr, dc, skipping black cells."""
+        puzzle = self.puzzle
+        if not self.active_cell:
+            # Try to select the first available cell
+            for idx, ch in enumerate(puzzle.solution):
+                if ch:
+                    self.active_cell = divmod(idx, puzzle.width)
+                    self.update_highlight()
+                    return
+            return # No valid cells
+
+        r, c = self.active_cell
+
+        # If moving along the current word's direction
+        if self.active_direction == "A": # Across
+            next_r, next_c = r, c + dc
+        else: # Down
+            next_r, next_c = r + dr, c
+
+        # Check bounds and if it's a valid cell
+        if puzzle.is_white(next_r, next_c):
+            # Check if the new cell is part of the currently highlighted word
+            next_entry = puzzle.word_at((next_r, next_c), self.active_direction)
+            if next_entry and next_entry[0] is self.active_word:
+                self.active_cell = (next_r, next_c)
+            else: # Moved out of current word, try to find a new word at the new cell
+                self.active_cell = (next_r, next_c)
+                self.update_highlight() # This will try to find a new word
+                # If no word is found in current direction, it might switch or clear highlight
+        else:
+            # Fallback: simple boundary-respecting move if not in a word context
+            new_r, new_c = r + dr, c + dc
+            if puzzle.is_white(new_r, new_c):
+                self.active_cell = (new_r, new_c)
+                self.update_highlight()
+
+    def neighbour_in_active_word(self, step):
+        """Returns the cell `step` positions along the active word from active_cell, or None."""
+        entry = self.puzzle.word_at(self.active_cell, self.active_direction)
+        if not entry:
+            return None
+        word, pos = entry
+        pos += step
+        if 0 <= pos < word.length:
+            return word.cell(pos)
+        return None
+
+    # --- Typing ---
+
+    def type_letter(self, letter):
+        """Enters a letter in the active cell and advances along the active word."""
+        if not self.active_cell:
+            return
+        r, c = self.active_cell
+        self._set_letter(r * self.puzzle.width + c, ord(letter.upper()))
+        # Move to next cell in the current word direction
+        next_cell_in_word = self.neighbour_in_active_word(1)
+        if next_cell_in_word:
+            self.active_cell = next_cell_in_word
+        self.update_highlight()
+
+    def backspace(self):
+        """Clears the active cell and steps back along the active word."""
+        if not self.active_cell:
+            return
+        r, c = self.active_cell
+        self._set_letter(r * self.puzzle.width + c, 0)
+        # Move back one cell in the current word direction
+        prev_cell_in_word = self.neighbour_in_active_word(-1)
+        if prev_cell_in_word:
+            self.active_cell = prev_cell_in_word
+        self.update_highlight()
+
+    def set_letter(self, idx, value):
+        """Stores value (ASCII letter or 0) at flat cell idx as one action; True if the letter changed.
+
+        For callers outside the cursor API: undo/redo, co-solving peers, tools.
+        """
+        return self._set_letter(idx, value)
+
+    def _set_letter(self, idx, value, joined=False):
+        """Stores value (ASCII letter or 0) at flat cell idx and updates the progress counters.
+
+        Returns True if the letter changed.
+        """
+        old = self.user[idx]
+        if old == value:
+            return False
+        answer = self.puzzle.solution[idx]
+        filled = (value != 0) - (old != 0)
+        correct = (value == answer) - (old == answer)
+        self.user[idx] = value
+        self.filled_count += filled
+        self.correct_count += correct
+        # The counters follow the cell-to-word index, so a word overlapping another in the
+        # same direction (malformed; crossword_validate reports it) is not counted there
+        across, down = self.puzzle.across_word[idx], self.puzzle.down_word[idx]
+        if across >= 0:
+            self.word_filled[across] += filled
+            self.word_correct[across] += correct
+        if down >= 0:
+            self.word_filled[down] += filled
+            self.word_correct[down] += correct
+        self.checked_wrong.discard(idx)
+        self.changed.add(idx)
+        if self.on_letter is not None:
+            self.on_letter(idx, old, value, joined)
+        return True
+
+    def load_letters(self, letters):
+        """Replaces every entered letter at once (a restored save) and recounts progress."""
+        self.user[:] = letters
+        solution = self.puzzle.solution
+        for word_id, word in enumerate(self.puzzle.words):
+            self.word_filled[word_id] = sum(1 for i in word.indices if self.user[i])
+            self.word_correct[word_id] = sum(1 for i in word.indices if self.user[i] and self.user[i] == solution[i])
+        self.filled_count = len(self.user) - self.user.count(0)
+        self.correct_count = sum(1 for i, ch in enumerate(self.user) if ch and ch == solution[i])
+        self.checked_wrong.clear()
+        self.changed.update(range(len(self.user)))
+
+    # --- Checking ---
+
+    def is_cell_correct(self, r, c):
+        """True if the letter entered at (r, c) matches the solution."""
+        idx = r * self.puzzle.width + c
+        return self.user[idx] != 0 and self.user[idx] == self.puzzle.solution[idx]
+
+    def incorrect_cells(self):
+        """Returns filled cells whose letter does not match the solution."""
+        user, solution, width = self.user, self.puzzle.solution, self.puzzle.width
+        return [divmod(i, width) for i in range(len(user)) if user[i] and user[i] != solution[i]]
+
+    def is_word_filled(self, word):
+        """True if every cell of word holds a letter."""
+        return self.word_filled[self.word_id(word)] == word.length
+
+    def is_word_correct(self, word):
+        """True if every cell of word holds the right letter."""
+        return self.word_correct[self.word_id(word)] == word.length
+
+    def is_filled(self):
+        """True if every white cell holds a letter."""
+        return self.filled_count == self.white_count
+
+    def is_solved(self):
+        """True if every white cell holds the right letter."""
+        return self.correct_count == self.white_count
+
+    def check_word(self, word=None):
+        """Marks the wrong letters of word (default: the active word) and returns their (r,c) cells."""
+        word = word or self.active_word
+        if word is None or self.word_correct[self.word_id(word)] == word.length:
+            return []
+        user, solution = self.user, self.puzzle.solution
+        wrong = [i for i in word.indices if user[i] and user[i] != solution[i]]
+        self.checked_wrong.update(wrong)
+        self.changed.update(wrong)
+        return [divmod(i, word.width) for i in wrong]
+
+    def reveal_cell(self):
+        """Fills the active cell with its answer."""
+        if self.active_cell:
+            r, c = self.active_cell
+            idx = r * self.puzzle.width + c
+            self._set_letter(idx, self.puzzle.solution[idx])
+
+    def reveal_word(self, word=None):
+        """Fills word (default: the active word) with its answer."""
+        word = word or self.active_word
+        if word is not None:
+            joined = False # the word's cells undo as one action
+            for idx in word.indices:
+                if self._set_letter(idx, self.puzzle.solution[idx], joined):
+                    joined = True
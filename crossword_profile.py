@@ -0,0 +1,161 @@
+"""Per-frame timing for the game loop, kept in a fixed-size ring buffer.
+
+The loop calls begin_frame() when a frame's work starts, mark(phase) after
+each phase (the time since the previous mark is charged to that phase) and
+end_frame(events) when the frame is on screen. Each frame is one row of a
+preallocated array('d'), so recording allocates nothing and old frames are
+overwritten once the buffer is full. Running totals cover every frame.
+
+A frame whose work takes longer than the frame budget (1/fps) misses
+int(work * fps) display deadlines; those are counted as skipped frames.
+
+Input latency: the game stamps each input event with perf_counter() when it
+drains the event queue and passes the stamps of a frame's inputs to
+end_frame(), which records now - stamp for each, i.e. keypress to the
+display update that shows it. Time the event spent in SDL's queue before
+the drain is not visible to pygame and is not included; the retained loop
+blocks on the queue, so there it is ~0 unless a frame was still being drawn.
+"""
+
+import json
+import time
+from array import array
+
+PHASES = ("handle", "grid", "clues", "info", "flip")
+HANDLE, GRID, CLUES, INFO, FLIP = range(len(PHASES))
+# Row layout: one slot per phase, then events handled, frames skipped, frame start time,
+# slowest input latency of the frame
+_EVENT_COUNT = len(PHASES)
+_SKIPPED = _EVENT_COUNT + 1
+_START = _SKIPPED + 1
+_INPUT = _START + 1
+_ROW = _INPUT + 1
+
+
+class FrameProfiler:
+    """Ring buffer of per-phase frame timings plus running totals."""
+
+    def __init__(self, capacity=1800, fps=30):
+        self.capacity = capacity
+        self.fps = fps
+        self._rows = array('d', bytes(8 * _ROW * capacity))
+        self._next = 0 # row the next frame is written to
+        self._last = 0.0 # time of the previous mark
+        self.frames = 0
+        self.events = 0
+        self.skipped = 0
+        self.phase_totals = [0.0] * len(PHASES)
+        self._latency = array('d', bytes(8 * capacity)) # keypress-to-screen seconds, one per input, ring
+        self._latency_next = 0
+        self.inputs = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.created = time.time()
+
+    def begin_frame(self):
+        base = self._next * _ROW
+        rows = self._rows
+        for i in range(base, base + _ROW):
+            rows[i] = 0.0
+        self._last = rows[base + _START] = time.perf_counter()
+
+    def mark(self, phase):
+        """Charges the time since the previous mark (or begin_frame) to phase."""
+        now = time.perf_counter()
+        self._rows[self._next * _ROW + phase] += now - self._last
+        self._last = now
+
+    def end_frame(self, events, input_stamps=()):
+        """Closes the frame once it is on screen; input_stamps are the stamps of the inputs it shows."""
+        rows = self._rows
+        base = self._next * _ROW
+        work = sum(rows[base:base + len(PHASES)])
+        skipped = int(work * self.fps)
+        rows[base + _EVENT_COUNT] = events
+        rows[base + _SKIPPED] = skipped
+        if input_stamps:
+            shown = time.perf_counter()
+            latency = self._latency
+            for stamp in input_stamps:
+                late = shown - stamp
+                latency[self._latency_next] = late
+                self._latency_next = (self._latency_next + 1) % self.capacity
+                self.latency_total += late
+            rows[base + _INPUT] = late = shown - min(input_stamps)
+            self.latency_max = max(self.latency_max, late)
+            self.inputs += len(input_stamps)
+        for phase in range(len(PHASES)):
+            self.phase_totals[phase] += rows[base + phase]
+        self.frames += 1
+        self.events += events
+        self.skipped += skipped
+        self._next = (self._next + 1) % self.capacity
+
+    def recent(self, count=None):
+        """The last count (default: all buffered) frames as dicts, oldest first; times in ms."""
+        held = min(self.frames, self.capacity)
+        count = held if count is None else min(count, held)
+        frames = []
+        for k in range(count, 0, -1):
+            base = (self._next - k) % self.capacity * _ROW
+            row = self._rows[base:base + _ROW]
+            frame = {name: round(row[i] * 1e3, 3) for i, name in enumerate(PHASES)}
+            frame["total"] = round(sum(row[:len(PHASES)]) * 1e3, 3)
+            frame["events"] = int(row[_EVENT_COUNT])
+            frame["skipped"] = int(row[_SKIPPED])
+            frame["t"] = round(row[_START], 6)
+            frame["input"] = round(row[_INPUT] * 1e3, 3)
+            frames.append(frame)
+        return frames
+
+    def summary(self):
+        """Totals for every frame, plus ms percentiles per phase over the buffered frames."""
+        frames = self.recent()
+        phases = {}
+        for name in PHASES + ("total",):
+            values = sorted(f[name] for f in frames)
+            if values:
+                n = len(values)
+                phases[name] = {"mean": round(sum(values) / n, 3), "p50": values[n // 2],
+                                "p95": values[min(n - 1, n * 95 // 100)], "max": values[-1]}
+        return {
+            "frames": self.frames,
+            "events": self.events,
+            "skipped": self.skipped,
+            "fps_budget": self.fps,
+            "events_per_frame": round(self.events / self.frames, 3) if self.frames else 0.0,
+            "total_ms": {name: round(t * 1e3, 3) for name, t in zip(PHASES, self.phase_totals)},
+            "buffered_ms": phases,
+            "input_latency_ms": self.input_latency(),
+        }
+
+    def input_latency(self):
+        """Keypress-to-screen ms: mean and max over every input, percentiles over the buffered ones."""
+        held = sorted(self._latency[:min(self.inputs, self.capacity)])
+        if not held:
+            return {"inputs": 0}
+        n = len(held)
+        return {"inputs": self.inputs, "mean": round(self.latency_total / self.inputs * 1e3, 3),
+                "p50": round(held[n // 2] * 1e3, 3), "p95": round(held[min(n - 1, n * 95 // 100)] * 1e3, 3),
+                "max": round(self.latency_max * 1e3, 3)}
+
+    def overlay_text(self, count=30):
+        """One line of mean ms per phase over the last count frames, for the on-screen overlay."""
+        frames = self.recent(count)
+        if not frames:
+            return "profiling: no frames yet"
+        n = len(frames)
+        parts = [f"{name} {sum(f[name] for f in frames) / n:.1f}" for name in PHASES]
+        events = sum(f["events"] for f in frames) / n
+        text = f"{' '.join(parts)} ms | ev/frame {events:.1f} | skipped {self.skipped}"
+        if self.inputs:
+            text += f" | input p95 {self.input_latency()['p95']:.1f}"
+        return text
+
+    def dump(self, path, extra=None):
+        """Writes the summary and the buffered frames as JSON, plus any extra top-level entries
+        (the game adds its glyph cache counters)."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"started": self.created, "summary": self.summary(), "frames": self.recent(), **(extra or {})},
+                      f, indent=1)
+            f.write("\n")
@@ -0,0 +1,171 @@
+"""A queue of puzzles to play in one process, prepared ahead on a worker thread.
+
+PuzzleQueue lists every puzzle of some JSON files and libraries and loads
+them on demand. Preloader keeps prepared puzzles (whatever the caller's
+prepare(position) builds: parsed puzzle, session, layout...) in a bounded
+LRU cache. A worker thread prepares the positions just after (and one before)
+the current one, so moving through the queue finds them ready. Positions
+near the current one are never evicted; the least recently used of the rest
+are, past `capacity`, and handed to discard() so they can release files.
+"""
+
+import threading
+from collections import OrderedDict
+
+from crossword_io import MAGIC, PuzzleLibrary, load_puzzle
+from crossword_model import DEFAULT_PUZZLE
+
+
+class PuzzleQueue:
+    """Ordered puzzles from files and libraries; only titles are read up front."""
+
+    def __init__(self, paths, builtin=False):
+        self.entries = [] # (path or None for the built-in puzzle, index in a library or None)
+        self._libraries = {} # path -> open PuzzleLibrary (mmap reads are safe from any thread)
+        if builtin:
+            self.entries.append((None, None))
+        for path in paths:
+            with open(path, "rb") as f:
+                is_library = f.read(len(MAGIC)) == MAGIC
+            if is_library:
+                library = self._libraries[path] = PuzzleLibrary(path)
+                self.entries += [(path, i) for i in range(len(library))]
+            else:
+                self.entries.append((path, None))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self, position):
+        """The PuzzleData at position."""
+        path, index = self.entries[position]
+        if path is None:
+            return DEFAULT_PUZZLE
+        if index is None:
+            return load_puzzle(path)
+        return self._libraries[path][index]
+
+    def title(self, position):
+        """Title of the puzzle at position (library titles are read without decoding the puzzle)."""
+        path, index = self.entries[position]
+        if path is None:
+            return DEFAULT_PUZZLE.title
+        if index is None:
+            return self.load(position).title
+        return self._libraries[path].title(index)
+
+    def close(self):
+        for library in self._libraries.values():
+            library.close()
+        self._libraries.clear()
+
+
+class Preloader:
+    """Prepares puzzles around the current position on a worker thread and caches them (LRU)."""
+
+    def __init__(self, prepare, count, ahead=3, capacity=8, discard=None):
+        self.prepare = prepare # position -> prepared puzzle; runs on the worker (or the caller on a miss)
+        self.count = count
+        self.ahead = ahead
+        self.capacity = max(capacity, ahead + 2)
+        self.discard = discard # called with each evicted prepared puzzle
+        self.current = 0
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict() # position -> prepared puzzle, least recently used first
+        self._busy = set() # positions being prepared right now
+        self._failed = set() # positions whose prepare raised, skipped until the window moves
+        self._lock = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    def _wanted(self):
+        """Positions to keep ready: the current one, `ahead` after it and one before, nearest first."""
+        around = [self.current + k for k in range(1, self.ahead + 1)] + [self.current - 1]
+        return [self.current] + [p for p in around if 0 <= p < self.count]
+
+    def get(self, position):
+        """Makes position current and returns its prepared puzzle, preparing it now if the worker has not.
+
+        If preparing raises, the exception propagates and the current position is left as it was.
+        """
+        with self._lock:
+            previous = self.current
+            if position != self.current:
+                self._failed.clear() # new window: worth another try
+            self.current = position
+            while position in self._busy: # the worker is on it; it will not be long
+                self._lock.wait()
+            prepared = self._cache.get(position)
+            if prepared is not None:
+                self._cache.move_to_end(position)
+                self.hits += 1
+                self._lock.notify_all() # new window for the worker
+                return prepared
+            self.misses += 1
+            self._busy.add(position)
+        try:
+            prepared = self.prepare(position)
+        except Exception:
+            with self._lock: # the caller stays where it was
+                self._busy.discard(position)
+                self._failed.add(position)
+                self.current = previous
+                self._lock.notify_all()
+            raise
+        with self._lock:
+            self._busy.discard(position)
+        self._store(position, prepared)
+        return prepared
+
+    def _store(self, position, prepared):
+        evicted = []
+        with self._lock:
+            self._cache[position] = prepared
+            keep = set(self._wanted())
+            for old in list(self._cache):
+                if len(self._cache) <= self.capacity:
+                    break
+                if old not in keep:
+                    evicted.append(self._cache.pop(old))
+            self._lock.notify_all()
+        if self.discard:
+            for item in evicted:
+                self.discard(item)
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while True:
+                    if self._closed:
+                        return
+                    todo = [p for p in self._wanted()
+                            if p not in self._cache and p not in self._busy and p not in self._failed]
+                    if todo:
+                        break
+                    self._lock.wait()
+                position = todo[0]
+                self._busy.add(position)
+            try:
+                prepared = self.prepare(position)
+            except Exception: # the main thread will hit the same error when it asks for it
+                with self._lock:
+                    self._busy.discard(position)
+                    self._failed.add(position) # go on with the rest of the window
+                    self._lock.notify_all()
+                continue
+            with self._lock:
+                self._busy.discard(position)
+            self._store(position, prepared)
+
+    def close(self):
+        """Stops the worker and discards every cached puzzle."""
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._thread.join()
+        if self.discard:
+            for item in self._cache.values():
+                self.discard(item)
+        self._cache.clear()
@@ -0,0 +1,441 @@
+"""Co-solve server: several players fill one puzzle together over TCP.
+
+The server owns the authoritative CrosswordSession. Clients connect over TCP
+and speak newline-delimited JSON. Client to server:
+
+    {"op": "hello", "name": "..."}     (optional; names the player, up to 32 characters)
+    {"op": "set", "cell": i, "letter": "A" or "", "seq": n, "base": tick}
+    {"op": "cursor", "cell": i or -1, "dir": "A" or "D"}
+    {"op": "stats"}
+
+cell, seq and base are integers (not booleans): cell a white cell's flat
+index, seq >= 0 and base between 0 and the current tick; seq defaults to 0
+and base to the current tick. A message that is not a JSON object, has an
+unknown op or bad fields is ignored and answered with {"op": "error",
+"error": "...", "seq" (if the message had one)}. A line longer than the
+stream limit (64 KiB) gets an error reply and the connection is closed.
+
+On connect the server sends {"op": "welcome", "id", "tick", "puzzle" (the
+crossword_io JSON structure), "letters" (one character per cell, "." for
+empty), "cursors"}. After that it only sends deltas. Writes and cursor moves
+are collected for one tick (default 50 ms). The tick's changes then go out
+as a single {"op": "delta", "tick", "time", "cells": [[i, letter, writer,
+seq], ...], "cursors": [[id, cell, dir], ...], "gone": [ids], "filled",
+"solved"}. The message is encoded once and the same bytes go to every client.
+
+Conflicting writes to a cell are resolved the same way whatever order they
+arrive in:
+  - "base" is the last tick the writer had seen. A write made before the
+    writer saw another player's newer letter in that cell is stale and is
+    dropped.
+  - Of the fresh writes to one cell in a tick, the lowest client id wins.
+  - Every cell written in a tick is in its delta with the winning value, so
+    clients whose write lost correct themselves.
+
+CoSolveClient is the blocking client CrosswordGame uses. It reads on a
+background thread and applies deltas when the game polls.
+
+Usage:
+    python crossword_server.py [PUZZLE] [--index N] [--host 127.0.0.1] [--port 8765] [--tick 0.05]
+"""
+
+import asyncio
+import json
+import queue
+import socket
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+
+from crossword_io import puzzle_from_dict, puzzle_to_dict
+from crossword_model import DEFAULT_PUZZLE, CrosswordPuzzle, CrosswordSession
+
+LETTERS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+
+def _int_in(value, low, high):
+    """value if it is an int (bools excluded) with low <= value < high, else None."""
+    if type(value) is int and low <= value < high:
+        return value
+    return None
+
+
+def encode_letters(user):
+    """Session letters as a string, one character per cell, "." for empty."""
+    return bytes(user).replace(b"\0", b".").decode("ascii")
+
+
+def decode_letters(text):
+    return bytearray(text.encode("ascii").replace(b".", b"\0"))
+
+
+@dataclass
+class Client:
+    id: int
+    writer: asyncio.StreamWriter
+    name: str = ""
+    cursor: tuple = (-1, "A") # (flat cell or -1, direction)
+    sent: int = 0 # deltas written to this client
+
+
+class CoSolveServer:
+    """Authoritative puzzle state plus the tick loop that broadcasts coalesced deltas."""
+
+    def __init__(self, data, tick=0.05, max_buffer=1 << 20):
+        self.puzzle = CrosswordPuzzle(data)
+        self.puzzle_dict = puzzle_to_dict(data) # sent in every welcome
+        self.session = CrosswordSession(self.puzzle)
+        self.tick_interval = tick
+        self.max_buffer = max_buffer # a client this far behind on reading is dropped
+        self.tick = 0
+        self.clients = {} # id -> Client
+        self._next_id = 1
+        cell_count = len(self.session.user)
+        self.cell_tick = [0] * cell_count # tick each cell was last written in
+        self.cell_owner = [-1] * cell_count # id of the client that wrote it
+        self.cell_seq = [0] * cell_count # that client's seq for the write
+
+        # Collected since the last tick
+        self.pending = {} # cell -> {client id: (seq, value)}
+        self.pending_cursors = {} # client id -> (cell, direction)
+        self.gone = []
+
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.messages_in = 0
+        self.bytes_out = 0
+        self.tick_times = deque(maxlen=1000) # seconds spent building and writing each delta
+        self.tick_late = deque(maxlen=1000) # seconds each tick woke up after its deadline
+
+    # --- Connections ---
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """Starts listening and ticking; returns the asyncio server."""
+        server = await asyncio.start_server(self._serve_client, host, port)
+        self._ticker = asyncio.ensure_future(self._tick_loop())
+        return server
+
+    async def _serve_client(self, reader, writer):
+        client = Client(self._next_id, writer)
+        self._next_id += 1
+        self.clients[client.id] = client
+        self._send(client, {"op": "welcome", "id": client.id, "tick": self.tick,
+                            "puzzle": self.puzzle_dict, "letters": encode_letters(self.session.user),
+                            "cursors": [[c.id, *c.cursor] for c in self.clients.values() if c.cursor[0] >= 0]})
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError: # longer than the stream limit; the rest of it cannot be resynced
+                    self._error(client, "line too long")
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                self.messages_in += 1
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    self._error(client, "not JSON")
+                    continue
+                self._receive(client, message)
+        except ConnectionError:
+            pass
+        finally:
+            self._drop(client)
+
+    def _drop(self, client):
+        if self.clients.pop(client.id, None) is not None:
+            self.pending_cursors.pop(client.id, None)
+            self.gone.append(client.id)
+            client.writer.close()
+
+    def _send(self, client, message):
+        data = json.dumps(message, separators=(",", ":")).encode() + b"\n"
+        client.writer.write(data)
+        self.bytes_out += len(data)
+
+    def _error(self, client, text, message=None):
+        reply = {"op": "error", "error": text}
+        if isinstance(message, dict) and "seq" in message:
+            reply["seq"] = message["seq"]
+        self._send(client, reply)
+
+    # --- Messages ---
+
+    def _white_cell(self, value):
+        """value if it is the flat index of a white cell, else None."""
+        cell = _int_in(value, 0, len(self.cell_tick))
+        if cell is None or not self.puzzle.solution[cell]:
+            return None
+        return cell
+
+    def _receive(self, client, message):
+        if not isinstance(message, dict):
+            self._error(client, "message is not an object")
+            return
+        op = message.get("op")
+        if op == "set":
+            self._receive_set(client, message)
+        elif op == "cursor":
+            cell = message.get("cell", -1)
+            if cell != -1 or type(cell) is not int:
+                cell = self._white_cell(cell)
+                if cell is None:
+                    self._error(client, "cursor: cell is not a white cell or -1", message)
+                    return
+            direction = "D" if message.get("dir") == "D" else "A"
+            if (cell, direction) != client.cursor:
+                client.cursor = (cell, direction)
+                self.pending_cursors[client.id] = client.cursor
+        elif op == "hello":
+            client.name = str(message.get("name", ""))[:32]
+        elif op == "stats":
+            self._send(client, {"op": "stats", **self.stats()})
+        else:
+            self._error(client, f"unknown op {str(op)[:32]!r}", message)
+
+    def _receive_set(self, client, message):
+        cell, letter = self._white_cell(message.get("cell")), message.get("letter", "")
+        seq = _int_in(message.get("seq", 0), 0, 1 << 63)
+        base = _int_in(message.get("base", self.tick), 0, self.tick + 1)
+        if cell is None or seq is None or base is None:
+            self._error(client, "set: cell must be a white cell, seq >= 0 and base a tick seen", message)
+            return
+        if not isinstance(letter, str) or len(letter) > 1 or letter and letter.upper() not in LETTERS:
+            self._error(client, "set: letter must be A-Z or empty", message)
+            return
+        letter = letter.upper()
+        if base < self.cell_tick[cell] and self.cell_owner[cell] != client.id:
+            # Made without seeing another player's newer letter: keep theirs, but
+            # list the cell in the next delta so this client is corrected
+            self.pending.setdefault(cell, {})
+            return
+        self.pending.setdefault(cell, {})[client.id] = (seq, ord(letter) if letter else 0)
+
+    # --- Ticks ---
+
+    async def _tick_loop(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            # Fixed-rate ticks; a tick that overran pushes the schedule back rather than bunching up
+            deadline = max(deadline + self.tick_interval, loop.time())
+            await asyncio.sleep(deadline - loop.time())
+            self.tick_late.append(loop.time() - deadline)
+            if self.pending or self.pending_cursors or self.gone:
+                self.flush()
+
+    def flush(self):
+        """Applies this tick's writes and sends one delta to every client."""
+        start = time.perf_counter()
+        self.tick += 1
+        tick, session = self.tick, self.session
+        cells = []
+        for cell in sorted(self.pending):
+            writes = self.pending[cell]
+            if writes:
+                owner = min(writes) # deterministic winner among concurrent writes
+                seq, value = writes[owner]
+                session.set_letter(cell, value)
+                self.cell_tick[cell], self.cell_owner[cell], self.cell_seq[cell] = tick, owner, seq
+            value = session.user[cell]
+            cells.append([cell, chr(value) if value else "", self.cell_owner[cell], self.cell_seq[cell]])
+        session.changed.clear()
+        delta = {"op": "delta", "tick": tick, "time": time.time(), "cells": cells,
+                 "cursors": [[cid, cell, direction] for cid, (cell, direction) in sorted(self.pending_cursors.items())],
+                 "gone": self.gone, "filled": session.filled_count, "solved": session.is_solved()}
+        self.pending, self.pending_cursors, self.gone = {}, {}, []
+
+        data = json.dumps(delta, separators=(",", ":")).encode() + b"\n"
+        for client in list(self.clients.values()):
+            if client.writer.transport.get_write_buffer_size() > self.max_buffer:
+                self._drop(client) # not reading: stop buffering for it
+                continue
+            client.writer.write(data)
+            client.sent += 1
+            self.bytes_out += len(data)
+        self.tick_times.append(time.perf_counter() - start)
+
+    def stats(self):
+        """Server counters, including CPU seconds used since start."""
+        return {"clients": len(self.clients), "tick": self.tick, "messages_in": self.messages_in,
+                "bytes_out": self.bytes_out, "cpu": round(time.process_time() - self.cpu_started, 4),
+                "wall": round(time.perf_counter() - self.started, 4),
+                "tick_ms": _ms_percentiles(self.tick_times), "tick_late_ms": _ms_percentiles(self.tick_late)}
+
+
+def _ms_percentiles(samples):
+    times = sorted(samples)
+    n = len(times)
+    if not n:
+        return {}
+    return {"p50": round(times[n // 2] * 1e3, 3), "p99": round(times[min(n - 1, n * 99 // 100)] * 1e3, 3),
+            "max": round(times[-1] * 1e3, 3)}
+
+
+async def serve(data, host="127.0.0.1", port=8765, tick=0.05, log=sys.stdout):
+    """Runs a co-solve server for a PuzzleData until cancelled."""
+    server = CoSolveServer(data, tick)
+    listener = await server.start(host, port)
+    host, port = listener.sockets[0].getsockname()[:2]
+    print(f"listening on {host}:{port}", file=log, flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+# --- Client ---
+
+class CoSolveClient:
+    """Blocking client for one player: sends local edits and cursor moves, applies remote deltas.
+
+    A reader thread queues incoming messages and calls notify() so an event
+    loop can wake up; poll() then applies them on the caller's thread.
+    """
+
+    def __init__(self, host, port, name=""):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self.sock.makefile("rb")
+        self.welcome = json.loads(self._file.readline())
+        self.id = self.welcome["id"]
+        self.tick = self.welcome["tick"]
+        self.session = None
+        self.connected = True
+        self.cursors = {} # other player id -> flat cell of their cursor
+        self.cursor_cells = Counter() # flat cell -> other players' cursors on it
+        for cid, cell, _ in self.welcome["cursors"]:
+            self._move_cursor(cid, cell)
+        self._inbox = queue.SimpleQueue()
+        self._seq = 0
+        self._last_seq = {} # cell -> seq of our latest write to it
+        self._cursor = None
+        self._applying = False # remote letters being applied: not our edits
+        if name:
+            self._send({"op": "hello", "name": name})
+
+    def puzzle(self):
+        """The server's puzzle as a CrosswordPuzzle."""
+        return CrosswordPuzzle(puzzle_from_dict(self.welcome["puzzle"]))
+
+    def attach(self, session, notify=None):
+        """Loads the shared letters into session, sends its edits from now on and starts reading."""
+        self.session = session
+        session.load_letters(decode_letters(self.welcome["letters"]))
+        session.on_letter = self._on_letter
+        self._notify = notify
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        try:
+            for line in self._file:
+                self._inbox.put(json.loads(line))
+                if self._notify:
+                    self._notify()
+        except (OSError, ValueError):
+            pass
+        self._inbox.put(None)
+        if self._notify:
+            self._notify()
+
+    def _send(self, message):
+        try:
+            self.sock.sendall(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+        except OSError:
+            self.connected = False
+
+    def _on_letter(self, idx, old, new, joined):
+        if self._applying or not self.connected:
+            return
+        self._seq += 1
+        self._last_seq[idx] = self._seq
+        self._send({"op": "set", "cell": idx, "letter": chr(new) if new else "", "seq": self._seq, "base": self.tick})
+
+    def send_cursor(self, cell, direction):
+        """Reports the local cursor ((row, col) or None) if it moved."""
+        flat = cell[0] * self.session.puzzle.width + cell[1] if cell else -1
+        if (flat, direction) != self._cursor and self.connected:
+            self._cursor = (flat, direction)
+            self._send({"op": "cursor", "cell": flat, "dir": direction})
+
+    def poll(self):
+        """Applies every queued delta. Returns the flat cells whose remote cursor marks changed."""
+        moved = set()
+        while True:
+            try:
+                message = self._inbox.get_nowait()
+            except queue.Empty:
+                return moved
+            if message is None:
+                self.connected = False
+                moved.update(self.cursors.values())
+                self.cursors.clear()
+                self.cursor_cells.clear()
+            elif message.get("op") == "delta":
+                self._apply(message, moved)
+
+    def _apply(self, delta, moved):
+        session = self.session
+        self._applying = True
+        try:
+            for cell, letter, writer, seq in delta["cells"]:
+                if writer == self.id and seq < self._last_seq.get(cell, 0):
+                    continue # a newer letter of ours for this cell is still in flight
+                session.set_letter(cell, ord(letter) if letter else 0)
+        finally:
+            self._applying = False
+        for cid, cell, _ in delta["cursors"]:
+            if cid != self.id:
+                moved.add(self._move_cursor(cid, cell))
+                moved.add(cell)
+        for cid in delta["gone"]:
+            moved.add(self._move_cursor(cid, -1))
+        moved.discard(-1)
+        self.tick = delta["tick"]
+
+    def _move_cursor(self, cid, cell):
+        """Moves player cid's cursor to cell (-1: none); returns the cell it left, or -1."""
+        old = self.cursors.pop(cid, -1)
+        if old >= 0:
+            self.cursor_cells[old] -= 1
+            if not self.cursor_cells[old]:
+                del self.cursor_cells[old]
+        if cell >= 0:
+            self.cursors[cid] = cell
+            self.cursor_cells[cell] += 1
+        return old
+
+    def close(self):
+        self.connected = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve one crossword for several players to solve together.")
+    parser.add_argument("puzzle", nargs="?", help="JSON puzzle file or puzzle library (default: built-in puzzle)")
+    parser.add_argument("--index", type=int, default=0, help="puzzle number to serve from a library")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (0.0.0.0 for the LAN)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (0 picks a free one)")
+    parser.add_argument("--tick", type=float, default=0.05, help="seconds between coalesced broadcasts")
+    args = parser.parse_args(argv)
+
+    data = DEFAULT_PUZZLE
+    if args.puzzle:
+        from crossword_io import load_any
+        data = load_any(args.puzzle, args.index)
+    try:
+        asyncio.run(serve(data, args.host, args.port, args.tick))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
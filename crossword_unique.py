@@ -0,0 +1,202 @@
+"""Solution counting: is a puzzle's fill the only one its word list allows?
+
+count_solutions() takes a CrosswordPuzzle (built by _prepare_puzzle, so it
+works for hand-made and generated grids alike), turns each of its words into
+a slot and counts the distinct-word fills of those slots, stopping as soon as
+`limit` (default 2) are found. It reuses the filler's bitset domains and
+crossing propagation (crossword_fill.GridSearch), tries each slot's own answer
+first so the intended fill costs one node per slot, counts parts of the grid
+that no longer cross each other separately, and memoises each part on its
+residual state (candidate sets plus the used words that could still clash).
+
+The search node count doubles as a difficulty measure: a puzzle whose fill
+follows from propagation alone needs about one node per slot.
+
+Usage:
+    python crossword_unique.py WORDLIST [--builtin] [FILE ...]
+"""
+
+import json
+import sys
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from itertools import chain
+
+from crossword_fill import FillTimeout, GridSearch, Slot, WordIndex, iter_bits
+from crossword_model import CrosswordPuzzle
+
+
+@dataclass
+class UniquenessResult:
+    solutions: int # fills found, capped at limit; None on timeout
+    limit: int
+    nodes: int
+    memo_hits: int
+    elapsed: float
+    status: str # "complete" or "timeout"
+
+    @property
+    def unique(self):
+        return self.status == "complete" and self.solutions == 1
+
+
+class CountingSearch(GridSearch):
+    """GridSearch that counts fills instead of stopping at the first."""
+
+    # Proving there is no second fill visits every branch, so cheap nodes beat
+    # thorough propagation here (the filler only has to find one good branch)
+    propagate_limit = 64
+
+    def __init__(self, slots, index, max_nodes=None, deadline=None, answers=None):
+        super().__init__(slots, index, None, max_nodes, deadline)
+        # Bit of each slot's known answer, tried first so the intended fill is found without backtracking
+        self.first = [0] * len(slots)
+        for s, answer in enumerate(answers or ()):
+            group = index.words.get(self.lengths[s], [])
+            i = bisect_left(group, answer)
+            if i < len(group) and group[i] == answer:
+                self.first[s] = 1 << i
+        self.memo = {} # residual state -> (count, exact)
+        self.memo_hits = 0
+
+    def _components(self, slots):
+        """Splits open slots into groups connected through crossings with other open slots."""
+        assigned, crossings = self.assigned, self.crossings
+        remaining = set(slots)
+        groups = []
+        while remaining:
+            seed = remaining.pop()
+            group, stack = [seed], [seed]
+            while stack:
+                for _, other, _ in crossings[stack.pop()]:
+                    if other in remaining and assigned[other] is None:
+                        remaining.discard(other)
+                        group.append(other)
+                        stack.append(other)
+            groups.append(tuple(sorted(group)))
+        return groups
+
+    def _state_key(self, component):
+        domains, lengths = self.domains, self.lengths
+        residual = tuple(domains[s] for s in component)
+        # Used words only matter while some open slot could still take them
+        open_lengths = {lengths[s] for s in component}
+        clashes = frozenset(word for word in self.used if len(word) in open_lengths)
+        return component, residual, clashes
+
+    def count(self, limit, slots=None):
+        """Counts fills of the open slots (default: all), stopping once limit are found.
+
+        Groups of open slots that share no crossing are counted separately and
+        multiplied. That ignores repeated words between the groups, so the
+        count can only come out high: a puzzle is never wrongly called unique.
+        """
+        if slots is None:
+            slots = [s for s, word in enumerate(self.assigned) if word is None]
+        groups = self._components(slots)
+        # Any empty group makes the whole product zero, so check them all exist first
+        counts = []
+        for group in sorted(groups, key=len):
+            n = self._count_group(group, 1)
+            if not n:
+                return 0
+            counts.append((group, n))
+        total = 1
+        for group, n in counts:
+            if total * n < limit:
+                n = self._count_group(group, -(-limit // total))
+            total *= n
+            if total >= limit:
+                return limit
+        return total
+
+    def _count_group(self, group, limit):
+        """Counts fills of one connected group of open slots, up to limit."""
+        key = self._state_key(group)
+        cached = self.memo.get(key)
+        if cached is not None and (cached[1] or cached[0] >= limit):
+            self.memo_hits += 1
+            return min(cached[0], limit)
+
+        domains = self.domains
+        s = min(group, key=lambda g: domains[g].bit_count())
+        rest = [g for g in group if g != s]
+        words = self.index.words.get(self.lengths[s], [])
+        domain = domains[s]
+        first = domain & self.first[s]
+        order = iter_bits(domain & ~first)
+        if first:
+            order = chain((first.bit_length() - 1,), order)
+        total = 0
+        for i in order:
+            word = words[i]
+            if word in self.used:
+                continue
+            self._tick()
+            self.assigned[s] = word
+            self.used.add(word)
+            domains[s] = 1 << i
+            trail = []
+            if self._propagate([s], trail):
+                total += self.count(limit - total, rest) if rest else 1
+            for other, old in reversed(trail):
+                domains[other] = old
+            domains[s] = domain
+            self.used.discard(word)
+            self.assigned[s] = None
+            if total >= limit:
+                break
+
+        self.memo[key] = (total, total < limit)
+        return total
+
+
+def puzzle_slots(puzzle):
+    """Slots for every in-grid word of a CrosswordPuzzle, in its numbering order."""
+    return [Slot(word.row, word.col, word.direction, tuple(word.indices))
+            for word in puzzle.words if word.length]
+
+
+def count_solutions(puzzle, index, limit=2, max_nodes=None, timeout=None):
+    """Counts fills of puzzle's slots from index plus the puzzle's own answers. Returns a UniquenessResult."""
+    start = time.perf_counter()
+    slots = puzzle_slots(puzzle)
+    answers = [word.text[:word.length] for word in puzzle.words if word.length]
+    index = index.extended(a for a in answers if a.isascii() and a.isalpha())
+    deadline = start + timeout if timeout else None
+    search = CountingSearch(slots, index, max_nodes, deadline, answers)
+    try:
+        solutions = search.count(limit) if search._propagate(list(range(len(slots))), []) else 0
+        status = "complete"
+    except FillTimeout:
+        solutions, status = None, "timeout"
+    return UniquenessResult(solutions, limit, search.nodes, search.memo_hits,
+                            time.perf_counter() - start, status)
+
+
+def main(argv=None):
+    import argparse
+
+    from crossword_validate import iter_sources
+
+    parser = argparse.ArgumentParser(description="Check whether puzzles have a unique fill for a word list.")
+    parser.add_argument("wordlist", help="one word per line")
+    parser.add_argument("files", nargs="*", help="JSON puzzles or puzzle libraries")
+    parser.add_argument("--builtin", action="store_true", help="also check the built-in puzzle")
+    parser.add_argument("--limit", type=int, default=2, help="stop counting at this many solutions")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per puzzle")
+    args = parser.parse_args(argv)
+
+    index = WordIndex.from_file(args.wordlist)
+    for source, data in iter_sources(args.files, args.builtin):
+        result = count_solutions(CrosswordPuzzle(data), index, args.limit, timeout=args.timeout)
+        print(json.dumps({"source": source, "title": data.title, "unique": result.unique,
+                          "solutions": result.solutions, "limit": result.limit, "status": result.status,
+                          "nodes": result.nodes, "memo_hits": result.memo_hits,
+                          "seconds": round(result.elapsed, 4)}))
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
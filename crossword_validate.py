@@ -0,0 +1,238 @@
+"""Vectorised puzzle validation with NumPy.
+
+validate_puzzle() rasterises every word of a PuzzleData into flat arrays
+(one entry per letter) and checks the whole puzzle with array operations:
+
+    out_of_bounds      word runs off the grid
+    bad_letters        answer has characters other than A-Z (after upper-casing)
+    lowercase          answer is not written in upper case (the game upper-cases it)
+    conflict           crossing words disagree on a cell's letter
+    overlap            two words of the same direction share a cell
+    orphan             white cell in a run of 2+ cells that no word in that direction covers
+    disconnected       white cells form more than one region
+    numbering          word does not start where standard numbering puts an entry,
+                       or does not fill its whole run
+
+Usage:
+    python crossword_validate.py [--builtin] [FILE ...] [--jsonl] [--summary]
+
+FILE may be a JSON puzzle or a puzzle library; every puzzle in a library is
+checked. The report is JSON; the exit status is 1 if any puzzle has errors,
+so it can gate generated puzzles.
+"""
+
+import json
+import sys
+
+import numpy as np
+
+from crossword_grid import run_lengths, run_starts
+
+# Issue types that make a puzzle unusable; the others are warnings
+ERRORS = {"out_of_bounds", "bad_letters", "conflict", "overlap", "orphan", "disconnected", "numbering"}
+
+
+def rasterise(data):
+    """Returns per-letter arrays (word, row, col, letter, direction) for every word of a PuzzleData."""
+    words = data.words_data
+    n = len(words)
+    lengths = np.fromiter((len(w[0]) for w in words), dtype=np.int64, count=n)
+    r0 = np.fromiter((w[2] for w in words), dtype=np.int64, count=n)
+    c0 = np.fromiter((w[3] for w in words), dtype=np.int64, count=n)
+    down = np.fromiter((w[4] == "D" for w in words), dtype=bool, count=n)
+
+    word = np.repeat(np.arange(n), lengths)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])) if n else np.zeros(0, dtype=np.int64)
+    pos = np.arange(word.size) - np.repeat(offsets, lengths)
+    is_down = np.repeat(down, lengths)
+    rows = np.repeat(r0, lengths) + np.where(is_down, pos, 0)
+    cols = np.repeat(c0, lengths) + np.where(is_down, 0, pos)
+    # Per character: an upper-casing that changes the length ('ß' -> 'SS') must not shift later
+    # letters into the wrong cells; anything that is not ASCII after it becomes '?'
+    text = "".join(w[0] for w in words)
+    if text.isascii():
+        text = text.upper()
+    else:
+        text = "".join(ch if len(ch) == 1 else "?" for ch in map(str.upper, text))
+    letters = np.frombuffer(text.encode("ascii", "replace"), dtype=np.uint8)
+    return word, rows, cols, letters, is_down, lengths, down
+
+
+def count_regions(white):
+    """Number of 4-connected regions of white cells (min-label propagation)."""
+    if not white.any():
+        return 0
+    big = white.size
+    labels = np.where(white, np.arange(big).reshape(white.shape), big)
+    while True:
+        nxt = labels.copy()
+        nxt[1:, :] = np.minimum(nxt[1:, :], labels[:-1, :])
+        nxt[:-1, :] = np.minimum(nxt[:-1, :], labels[1:, :])
+        nxt[:, 1:] = np.minimum(nxt[:, 1:], labels[:, :-1])
+        nxt[:, :-1] = np.minimum(nxt[:, :-1], labels[:, 1:])
+        nxt = np.where(white, nxt, big)
+        if np.array_equal(nxt, labels):
+            return int(np.unique(labels[white]).size)
+        labels = nxt
+
+
+def validate_puzzle(data):
+    """Checks one PuzzleData and returns a JSON-ready report dict."""
+    width, height = data.width, data.height
+    words = data.words_data
+    issues = []
+
+    def word_ref(i):
+        answer, _, r, c, direction = words[i]
+        return {"word": answer, "row": int(r), "col": int(c), "direction": direction}
+
+    word, rows, cols, letters, is_down, lengths, down = rasterise(data)
+
+    # Out of bounds
+    outside = (rows < 0) | (rows >= height) | (cols < 0) | (cols >= width)
+    outside_words = np.unique(word[outside])
+    for i in outside_words:
+        issues.append({"type": "out_of_bounds", **word_ref(i)})
+
+    # Letters
+    bad = (letters < 65) | (letters > 90)
+    for i in np.unique(word[bad & ~outside]):
+        issues.append({"type": "bad_letters", **word_ref(i)})
+    for i, (answer, *_rest) in enumerate(words):
+        if answer != answer.upper():
+            issues.append({"type": "lowercase", **word_ref(i)})
+
+    inside = ~outside
+    word, letters, is_down = word[inside], letters[inside], is_down[inside]
+    flat = rows[inside] * width + cols[inside]
+
+    # Conflicts: group letters by cell, compare min and max letter in each group
+    order = np.argsort(flat, kind="stable")
+    flat_s, letters_s, word_s = flat[order], letters[order], word[order]
+    if flat_s.size:
+        group_start = np.flatnonzero(np.r_[True, flat_s[1:] != flat_s[:-1]])
+        lo = np.minimum.reduceat(letters_s, group_start)
+        hi = np.maximum.reduceat(letters_s, group_start)
+        group_of = np.repeat(np.arange(group_start.size), np.diff(np.r_[group_start, flat_s.size]))
+        for g in np.flatnonzero(lo != hi):
+            members = word_s[group_of == g]
+            cell = int(flat_s[group_start[g]])
+            issues.append({"type": "conflict", "row": cell // width, "col": cell % width,
+                           "letters": sorted({chr(x) for x in letters_s[group_of == g]}),
+                           "words": [words[i][0] for i in members]})
+
+    # Overlaps: the same cell covered twice in the same direction
+    keyed = flat * 2 + is_down
+    uniq, counts = np.unique(keyed, return_counts=True)
+    for k in uniq[counts > 1]:
+        members = word[keyed == k]
+        cell = int(k // 2)
+        issues.append({"type": "overlap", "row": cell // width, "col": cell % width,
+                       "direction": "D" if k % 2 else "A", "words": [words[i][0] for i in members]})
+
+    # Grid derived from the words: white where any word has a letter
+    white = np.zeros(height * width, dtype=bool)
+    white[flat] = True
+    white = white.reshape(height, width)
+    covered_across = np.zeros(height * width, dtype=bool)
+    covered_across[flat[~is_down]] = True
+    covered_down = np.zeros(height * width, dtype=bool)
+    covered_down[flat[is_down]] = True
+
+    start_across, start_down, in_across, in_down = run_starts(white)
+
+    # Orphans: cells in a run that no word of that direction covers
+    for direction, in_run, covered in (("A", in_across, covered_across), ("D", in_down, covered_down)):
+        for cell in np.flatnonzero(in_run.ravel() & ~covered):
+            issues.append({"type": "orphan", "row": int(cell // width), "col": int(cell % width),
+                           "direction": direction})
+
+    # Regions
+    regions = count_regions(white)
+    if regions > 1:
+        issues.append({"type": "disconnected", "regions": regions})
+
+    # Numbering: each in-bounds word must start at a standard entry start and fill its run
+    across_len = run_lengths(white, 1)
+    down_len = run_lengths(white, 0)
+    r0 = np.fromiter((w[2] for w in words), dtype=np.int64, count=len(words))
+    c0 = np.fromiter((w[3] for w in words), dtype=np.int64, count=len(words))
+    in_grid = np.ones(len(words), dtype=bool)
+    in_grid[outside_words] = False
+    r0, c0 = r0.clip(0, height - 1), c0.clip(0, width - 1) # out-of-grid words are masked off anyway
+    starts = np.where(down, start_down[r0, c0], start_across[r0, c0])
+    run_len = np.where(down, down_len[r0, c0], across_len[r0, c0])
+    for i in np.flatnonzero(in_grid & ~starts):
+        issues.append({"type": "numbering", "reason": "not an entry start", **word_ref(i)})
+    for i in np.flatnonzero(in_grid & starts & (run_len != lengths)):
+        issues.append({"type": "numbering", "reason": "run is longer than the word",
+                       "run_length": int(run_len[i]), **word_ref(i)})
+
+    counts = {}
+    for issue in issues:
+        counts[issue["type"]] = counts.get(issue["type"], 0) + 1
+    return {
+        "title": data.title,
+        "width": width,
+        "height": height,
+        "words": len(words),
+        "ok": not any(t in ERRORS for t in counts),
+        "counts": counts,
+        "issues": issues,
+    }
+
+
+def iter_sources(paths, builtin=False):
+    """Yields (source label, PuzzleData) for the built-in puzzle and every puzzle in paths."""
+    from crossword_io import MAGIC, PuzzleLibrary, load_puzzle
+    from crossword_model import DEFAULT_PUZZLE
+
+    if builtin:
+        yield "builtin", DEFAULT_PUZZLE
+    for path in paths:
+        with open(path, "rb") as f:
+            is_library = f.read(len(MAGIC)) == MAGIC
+        if is_library:
+            with PuzzleLibrary(path) as library:
+                for i in range(len(library)):
+                    yield f"{path}#{i}", library[i]
+        else:
+            yield path, load_puzzle(path)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate crossword puzzles and print a JSON report.")
+    parser.add_argument("files", nargs="*", help="JSON puzzles or puzzle libraries")
+    parser.add_argument("--builtin", action="store_true", help="also check the built-in puzzle")
+    parser.add_argument("--jsonl", action="store_true", help="one report per line instead of one document")
+    parser.add_argument("--summary", action="store_true", help="print only totals")
+    args = parser.parse_args(argv)
+    if not args.files and not args.builtin:
+        parser.error("nothing to validate")
+
+    reports = []
+    totals = {"puzzles": 0, "failed": 0, "counts": {}}
+    for source, data in iter_sources(args.files, args.builtin):
+        report = {"source": source, **validate_puzzle(data)}
+        totals["puzzles"] += 1
+        totals["failed"] += not report["ok"]
+        for kind, n in report["counts"].items():
+            totals["counts"][kind] = totals["counts"].get(kind, 0) + n
+        if args.summary:
+            continue
+        if args.jsonl:
+            print(json.dumps(report))
+        else:
+            reports.append(report)
+
+    if args.summary:
+        print(json.dumps(totals, indent=2))
+    elif not args.jsonl:
+        print(json.dumps({"summary": totals, "reports": reports}, indent=2))
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Records sessions through SessionJournal and checks that restoring gives back the same letters and history."""
+
+import os
+import random
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crossword_journal import SessionJournal
+from crossword_model import CrosswordPuzzle, CrosswordSession
+
+
+def restored(puzzle, path):
+    """A new session restored from path, and its (closed) journal."""
+    session = CrosswordSession(puzzle)
+    journal = SessionJournal(session, path)
+    journal.restore()
+    journal.close()
+    return session, journal
+
+
+def assert_same(journal, path):
+    """Restoring path gives journal's letters, history and position."""
+    journal.sync()
+    session, other = restored(journal.session.puzzle, path)
+    assert bytes(session.user) == bytes(journal.session.user)
+    assert other.position == journal.position
+    assert list(other.cells) == list(journal.cells)
+    assert other.olds == journal.olds and other.news == journal.news and other.joined == journal.joined
+
+
+@pytest.fixture
+def puzzle():
+    return CrosswordPuzzle()
+
+
+def test_redo_across_compaction(puzzle, tmp_path):
+    path = str(tmp_path / "j.cwj")
+    session = CrosswordSession(puzzle)
+    journal = SessionJournal(session, path, snapshot_every=7)
+    journal.restore()
+    white = puzzle.white_indices()
+    for idx in white[:3]:
+        session.set_letter(idx, ord("X"))
+    word = puzzle.words[-1]
+    session.reveal_word(word)
+    journal.undo()
+    session.reveal_word(word)
+    journal.undo()
+    journal.redo() # its write is the 7th record and compacts
+    assert journal.generation > 0
+    assert_same(journal, path)
+    journal.close()
+
+
+@pytest.mark.parametrize("snapshot_every", [3, 7, 50, 5000])
+def test_random_edits_undo_redo(puzzle, tmp_path, snapshot_every):
+    path = str(tmp_path / "j.cwj")
+    session = CrosswordSession(puzzle)
+    journal = SessionJournal(session, path, snapshot_every=snapshot_every, sync_every=1)
+    journal.restore()
+    rnd = random.Random(snapshot_every)
+    white = puzzle.white_indices()
+    for _ in range(300):
+        action = rnd.random()
+        if action < 0.5:
+            idx = rnd.choice(white)
+            session.set_letter(idx, rnd.choice((0, puzzle.solution[idx], ord(rnd.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ")))))
+        elif action < 0.6:
+            session.reveal_word(rnd.choice(puzzle.words))
+        elif action < 0.8:
+            journal.undo()
+        else:
+            journal.redo()
+        assert_same(journal, path)
+    journal.close()
+
+
+def test_restore_continues_recording(puzzle, tmp_path):
+    path = str(tmp_path / "j.cwj")
+    session = CrosswordSession(puzzle)
+    journal = SessionJournal(session, path, snapshot_every=4)
+    journal.restore()
+    white = puzzle.white_indices()
+    for idx in white[:6]:
+        session.set_letter(idx, ord("A"))
+    journal.undo()
+    journal.close()
+
+    session, _ = restored(puzzle, path)
+    journal = SessionJournal(session, path, snapshot_every=4)
+    journal.restore()
+    assert journal.position == 5
+    journal.redo()
+    assert session.user[white[5]] == ord("A")
+    session.set_letter(white[6], ord("B"))
+    assert_same(journal, path)
+    journal.close()
+
+
+def test_torn_record_is_dropped(puzzle, tmp_path):
+    path = str(tmp_path / "j.cwj")
+    session = CrosswordSession(puzzle)
+    journal = SessionJournal(session, path)
+    journal.restore()
+    white = puzzle.white_indices()
+    for idx in white[:3]:
+        session.set_letter(idx, ord("C"))
+    journal.close()
+    with open(path, "r+b") as f: # a crash midway through writing the last record
+        f.truncate(os.path.getsize(path) - 3)
+
+    session, journal = restored(puzzle, path)
+    assert journal.position == 2
+    assert [session.user[i] for i in white[:3]] == [ord("C"), ord("C"), 0]
+
+
+def test_sync_due(puzzle, tmp_path):
+    session = CrosswordSession(puzzle)
+    journal = SessionJournal(session, str(tmp_path / "j.cwj"), sync_interval=0.05)
+    journal.restore()
+    assert journal.sync_due() is None
+    session.set_letter(puzzle.white_indices()[0], ord("D"))
+    wait = journal.sync_due()
+    assert 0 < wait <= 0.05
+    time.sleep(wait)
+    assert journal.sync_due() is None # synced now
+    assert journal.sync_due() is None
+    journal.close()
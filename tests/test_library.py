@@ -0,0 +1,106 @@
+"""Writes binary puzzle libraries and reads them back, including after a writer dies between checkpoints."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crossword_io import LibraryWriter, PuzzleLibrary, puzzle_from_dict, puzzle_to_dict, write_library
+from crossword_model import DEFAULT_PUZZLE, PuzzleData
+
+
+def puzzle(n):
+    """A small distinct puzzle, numbered n."""
+    return PuzzleData(f"Puzzle {n} – café", 5, 5,
+                      [(f"AB{chr(65 + n % 26)}", f"clue {n}", 0, 0, "A"), ("AXY", "down", 0, 0, "D")])
+
+
+def titles(path):
+    with PuzzleLibrary(path) as library:
+        return [library.title(i) for i in range(len(library))], [p.title for p in library]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "lib.cwpl")
+    puzzles = [DEFAULT_PUZZLE] + [puzzle(n) for n in range(20)]
+    assert write_library(path, puzzles) == 21
+    with PuzzleLibrary(path) as library:
+        assert list(library) == puzzles
+        assert library[-1] == puzzles[-1]
+        assert library.title(3) == puzzles[3].title
+        with pytest.raises(IndexError):
+            library[21]
+
+
+def test_crash_between_checkpoints(tmp_path):
+    path = str(tmp_path / "lib.cwpl")
+    writer = LibraryWriter(path)
+    for n in range(3):
+        writer.add(puzzle(n))
+    writer.checkpoint()
+    for n in range(3, 5):
+        writer.add(puzzle(n)) # overwrites the index checkpoint() wrote
+    writer._file.flush() # what is on disk when the process is killed here
+
+    expected = [puzzle(n).title for n in range(5)]
+    assert titles(path) == (expected, expected)
+
+    # A record torn by the crash is dropped, the rest still read
+    writer._file.truncate(os.path.getsize(path) - 5)
+    writer._file.close()
+    assert titles(path) == (expected[:4], expected[:4])
+
+    # Appending recovers the same records and writes a good index again
+    with LibraryWriter(path, append=True) as writer:
+        assert len(writer) == 4
+        writer.add(puzzle(5))
+    expected = expected[:4] + [puzzle(5).title]
+    assert titles(path) == (expected, expected)
+
+
+def test_truncate_and_resume(tmp_path):
+    path = str(tmp_path / "lib.cwpl")
+    with LibraryWriter(path) as writer:
+        for n in range(6):
+            writer.add(puzzle(n))
+    with LibraryWriter(path, append=True) as writer:
+        writer.truncate(2)
+        writer.add(puzzle(9))
+    expected = [puzzle(n).title for n in (0, 1, 9)]
+    assert titles(path) == (expected, expected)
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"width": 0}, "size"),
+    ({"height": 70000}, "size"),
+    ({"title": 5}, "title"),
+    ({"answer": "CAFÉ"}, "ASCII"),
+    ({"answer": ""}, "ASCII"),
+    ({"answer": "A" * 256}, "ASCII"),
+    ({"answer": 7}, "ASCII"),
+    ({"row": -1}, "starts at"),
+    ({"col": 65536}, "starts at"),
+    ({"direction": "X"}, "direction"),
+    ({"clue": ["not", "text"]}, "clue"),
+    ({"row": "two"}, "Invalid puzzle"),
+])
+def test_puzzle_from_dict_rejects_what_cannot_pack(change, message):
+    obj = puzzle_to_dict(puzzle(1))
+    for key, value in change.items():
+        if key in obj:
+            obj[key] = value
+        else:
+            obj["words"][0][key] = value
+    with pytest.raises(ValueError, match=message) as e:
+        puzzle_from_dict(obj)
+    assert str(e.value).startswith("Invalid puzzle: ")
+
+
+def test_puzzle_from_dict_packs(tmp_path):
+    data = puzzle_from_dict(puzzle_to_dict(puzzle(2)))
+    path = str(tmp_path / "lib.cwpl")
+    write_library(path, [data])
+    with PuzzleLibrary(path) as library:
+        assert library[0] == data
@@ -0,0 +1,108 @@
+"""Drives Preloader with a fake prepare(): window, LRU eviction, discard and prepare failures."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crossword_queue import Preloader
+
+
+class Recorder:
+    """prepare() that returns ("prepared", position), raises for the `bad` positions and logs calls."""
+
+    def __init__(self, bad=()):
+        self.bad = set(bad)
+        self.calls = []
+        self.discarded = []
+        self.lock = threading.Lock()
+
+    def prepare(self, position):
+        with self.lock:
+            self.calls.append(position)
+        if position in self.bad:
+            raise ValueError(f"bad puzzle {position}")
+        return ("prepared", position)
+
+    def discard(self, item):
+        self.discarded.append(item)
+
+
+def settle(preloader):
+    """Waits for the worker to run out of work."""
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with preloader._lock:
+            todo = [p for p in preloader._wanted()
+                    if p not in preloader._cache and p not in preloader._failed]
+            if not todo and not preloader._busy:
+                return
+        time.sleep(0.005)
+    raise AssertionError("preloader did not settle")
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+def test_prepares_window_ahead(recorder):
+    preloader = Preloader(recorder.prepare, 10, ahead=3, capacity=8)
+    try:
+        assert preloader.get(4) == ("prepared", 4)
+        settle(preloader)
+        assert {3, 4, 5, 6, 7} <= set(preloader._cache)
+        misses = preloader.misses
+        assert preloader.get(5) == ("prepared", 5)
+        assert preloader.misses == misses and preloader.hits == 1
+    finally:
+        preloader.close()
+
+
+def test_evicts_least_recently_used_outside_window(recorder):
+    preloader = Preloader(recorder.prepare, 40, ahead=1, capacity=4, discard=recorder.discard)
+    try:
+        for position in (0, 10, 20, 30):
+            preloader.get(position)
+            settle(preloader)
+            assert len(preloader._cache) <= preloader.capacity
+            assert set(preloader._wanted()) <= set(preloader._cache)
+        # the oldest windows went first, each handed to discard once
+        assert ("prepared", 0) in recorder.discarded and ("prepared", 30) not in recorder.discarded
+        assert len(recorder.discarded) == len(set(recorder.discarded))
+        cached = set(preloader._cache.values())
+    finally:
+        preloader.close()
+    assert cached <= set(recorder.discarded) # close discards the rest
+
+
+def test_failure_in_worker_does_not_block_window():
+    recorder = Recorder(bad={5})
+    preloader = Preloader(recorder.prepare, 10, ahead=3, capacity=8)
+    try:
+        preloader.get(4)
+        settle(preloader)
+        assert {3, 4, 6, 7} <= set(preloader._cache) and 5 not in preloader._cache
+        assert recorder.calls.count(5) == 1 # not retried while the window stays
+    finally:
+        preloader.close()
+
+
+def test_failure_on_get_keeps_current():
+    recorder = Recorder(bad={5})
+    preloader = Preloader(recorder.prepare, 10, ahead=1, capacity=4)
+    try:
+        preloader.get(2)
+        settle(preloader)
+        with pytest.raises(ValueError, match="bad puzzle 5"):
+            preloader.get(5)
+        assert preloader.current == 2
+        assert 5 not in preloader._busy
+        recorder.bad.clear() # fixed on disk: the next visit tries again
+        assert preloader.get(5) == ("prepared", 5)
+    finally:
+        preloader.close()
@@ -0,0 +1,179 @@
+"""Talks to a CoSolveServer over real sockets: welcome, deltas, conflict resolution and error replies."""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crossword_model import DEFAULT_PUZZLE, CrosswordPuzzle, CrosswordSession
+from crossword_server import CoSolveClient, CoSolveServer
+
+PUZZLE = CrosswordPuzzle(DEFAULT_PUZZLE)
+WHITE = PUZZLE.white_indices()
+BLACK = next(i for i, ch in enumerate(PUZZLE.solution) if not ch)
+
+
+class Peer:
+    """A raw protocol connection: send() messages (dicts or raw bytes), recv() the next one with an op."""
+
+    def __init__(self, reader, writer, welcome):
+        self.reader, self.writer, self.welcome = reader, writer, welcome
+
+    @classmethod
+    async def connect(cls, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        return cls(reader, writer, json.loads(await reader.readline()))
+
+    def send(self, message):
+        self.writer.write(message if isinstance(message, bytes) else json.dumps(message).encode() + b"\n")
+
+    async def recv(self, op):
+        while True:
+            line = await asyncio.wait_for(self.reader.readline(), 5)
+            assert line, f"connection closed waiting for {op}"
+            message = json.loads(line)
+            if message["op"] == op:
+                return message
+
+
+def run(test, tick=0.01):
+    """Runs test(server, port) against a fresh server on a free port."""
+    async def main():
+        srv = CoSolveServer(DEFAULT_PUZZLE, tick=tick)
+        server = await srv.start("127.0.0.1", 0)
+        try:
+            await test(srv, server.sockets[0].getsockname()[1])
+        finally:
+            srv._ticker.cancel()
+            server.close()
+    asyncio.run(main())
+
+
+def test_welcome_and_delta():
+    async def test(srv, port):
+        a = await Peer.connect(port)
+        assert a.welcome["letters"] == "." * len(PUZZLE.solution)
+        assert a.welcome["puzzle"]["title"] == DEFAULT_PUZZLE.title
+        b = await Peer.connect(port)
+        assert b.welcome["id"] == a.welcome["id"] + 1
+        a.send({"op": "set", "cell": WHITE[0], "letter": "q", "seq": 1})
+        a.send({"op": "cursor", "cell": WHITE[1], "dir": "D"})
+        delta = await b.recv("delta")
+        assert delta["cells"] == [[WHITE[0], "Q", a.welcome["id"], 1]]
+        assert delta["cursors"] == [[a.welcome["id"], WHITE[1], "D"]]
+        assert delta["filled"] == 1
+        assert srv.session.user[WHITE[0]] == ord("Q")
+    run(test)
+
+
+def test_concurrent_writes_lowest_id_wins():
+    async def test(srv, port):
+        a, b = await Peer.connect(port), await Peer.connect(port)
+        srv._ticker.cancel() # flush by hand so both writes land in one tick
+        b.send({"op": "set", "cell": WHITE[0], "letter": "B", "seq": 1})
+        a.send({"op": "set", "cell": WHITE[0], "letter": "A", "seq": 1})
+        a.send({"op": "stats"})
+        b.send({"op": "stats"})
+        await a.recv("stats")
+        await b.recv("stats")
+        srv.flush()
+        delta = await b.recv("delta")
+        assert delta["cells"] == [[WHITE[0], "A", a.welcome["id"], 1]]
+    run(test)
+
+
+def test_stale_write_is_corrected():
+    async def test(srv, port):
+        a, b = await Peer.connect(port), await Peer.connect(port)
+        a.send({"op": "set", "cell": WHITE[0], "letter": "A", "seq": 1})
+        tick = (await b.recv("delta"))["tick"]
+        # b writes without having seen a's letter: dropped, but the cell is resent
+        b.send({"op": "set", "cell": WHITE[0], "letter": "B", "seq": 1, "base": tick - 1})
+        delta = await b.recv("delta")
+        assert delta["cells"] == [[WHITE[0], "A", a.welcome["id"], 1]]
+        # once it has seen it, b may overwrite
+        b.send({"op": "set", "cell": WHITE[0], "letter": "B", "seq": 2, "base": delta["tick"]})
+        delta = await a.recv("delta")
+        while delta["cells"] and delta["cells"][0][1] != "B":
+            delta = await a.recv("delta")
+        assert delta["cells"] == [[WHITE[0], "B", b.welcome["id"], 2]]
+    run(test)
+
+
+def test_bad_messages_get_error_replies():
+    async def test(srv, port):
+        a = await Peer.connect(port)
+        bad = [
+            b"not json\n",
+            b"[1, 2]\n",
+            {"op": "dance", "seq": 3},
+            {"op": "set", "cell": BLACK, "letter": "A", "seq": 4},
+            {"op": "set", "cell": len(PUZZLE.solution), "letter": "A", "seq": 5},
+            {"op": "set", "cell": True, "letter": "A", "seq": 6},
+            {"op": "set", "cell": WHITE[0], "letter": "AB", "seq": 7},
+            {"op": "set", "cell": WHITE[0], "letter": "7", "seq": 8},
+            {"op": "set", "cell": WHITE[0], "letter": "A", "seq": -1},
+            {"op": "set", "cell": WHITE[0], "letter": "A", "seq": 9, "base": 10 ** 6},
+            {"op": "cursor", "cell": BLACK, "seq": 10},
+            {"op": "cursor", "cell": "0"},
+        ]
+        for message in bad:
+            a.send(message)
+            reply = await a.recv("error")
+            assert reply["error"]
+            if isinstance(message, dict):
+                assert reply.get("seq") == message.get("seq")
+        # still connected, and nothing was applied
+        a.send({"op": "stats"})
+        assert (await a.recv("stats"))["clients"] == 1
+        assert not any(srv.session.user)
+    run(test)
+
+
+def test_line_too_long_closes_connection():
+    async def test(srv, port):
+        a = await Peer.connect(port)
+        a.send(b"x" * (1 << 17) + b"\n")
+        assert (await a.recv("error"))["error"] == "line too long"
+        try: # the unread rest of the line may turn the close into a reset
+            assert await asyncio.wait_for(a.reader.read(), 5) == b""
+        except ConnectionResetError:
+            pass
+    run(test)
+
+
+def test_clients_solve_together():
+    loop = asyncio.new_event_loop()
+    srv = CoSolveServer(DEFAULT_PUZZLE, tick=0.01)
+    server = loop.run_until_complete(srv.start("127.0.0.1", 0))
+    port = server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    clients = [CoSolveClient("127.0.0.1", port, name=f"p{i}") for i in range(2)]
+    sessions = []
+    try:
+        for client in clients:
+            sessions.append(CrosswordSession(client.puzzle()))
+            client.attach(sessions[-1])
+        first, second = sessions
+        for idx in WHITE[:5]:
+            first.set_letter(idx, PUZZLE.solution[idx])
+        deadline = time.monotonic() + 5
+        while second.filled_count < 5 and time.monotonic() < deadline:
+            clients[1].poll()
+            time.sleep(0.01)
+        assert bytes(second.user) == bytes(first.user)
+        assert second.correct_count == 5
+    finally:
+        for client in clients:
+            client.close()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        srv._ticker.cancel()
+        server.close()
+        loop.run_until_complete(asyncio.sleep(0))
+        loop.close()
@@ -0,0 +1,85 @@
+"""Replays a full solve and checks the session's incremental counters after every keystroke."""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_common import synthetic_words_data
+from crossword_model import CrosswordPuzzle, CrosswordSession, PuzzleData
+
+
+def recount(session):
+    """Counters recomputed from scratch: (word_filled, word_correct, filled_count, correct_count)."""
+    user, solution = session.user, session.puzzle.solution
+    filled = [sum(1 for i in w.indices if user[i]) for w in session.puzzle.words]
+    correct = [sum(1 for i in w.indices if user[i] and user[i] == solution[i]) for w in session.puzzle.words]
+    return (filled, correct, sum(1 for ch in user if ch),
+            sum(1 for ch, answer in zip(user, solution) if ch and ch == answer))
+
+
+def assert_counters(session):
+    filled, correct, filled_count, correct_count = recount(session)
+    assert list(session.word_filled) == filled
+    assert list(session.word_correct) == correct
+    assert session.filled_count == filled_count
+    assert session.correct_count == correct_count
+
+
+def select(session, word, pos=0):
+    """Puts the cursor on word's pos-th cell, facing along word."""
+    r, c = word.cell(pos)
+    session.select_cell(r, c)
+    if session.active_word is not word:
+        session.select_cell(r, c) # toggles the direction
+    assert session.active_word is word
+
+
+@pytest.fixture(params=[None, 10, 21])
+def puzzle(request):
+    if request.param is None:
+        return CrosswordPuzzle()
+    size = request.param
+    return CrosswordPuzzle(PuzzleData(f"{size}x{size}", size, size, synthetic_words_data(size)))
+
+
+def test_full_solve(puzzle):
+    session = CrosswordSession(puzzle)
+    rnd = random.Random(0)
+    for word in puzzle.words:
+        select(session, word)
+        for pos, i in enumerate(word.indices):
+            answer = chr(puzzle.solution[i])
+            if rnd.random() < 0.2: # a typo, cleared straight away
+                session.type_letter("Q" if answer != "Q" else "Z")
+                assert_counters(session)
+                select(session, word, pos)
+                session.backspace()
+                assert_counters(session)
+                select(session, word, pos)
+            session.type_letter(answer)
+            assert_counters(session)
+    assert session.is_solved()
+    assert all(session.is_word_correct(w) for w in puzzle.words)
+
+
+def test_reveal_and_clear(puzzle):
+    session = CrosswordSession(puzzle)
+    for k, word in enumerate(puzzle.words):
+        select(session, word)
+        if k % 2:
+            session.reveal_word()
+        else:
+            session.reveal_cell()
+        assert_counters(session)
+    for word in puzzle.words:
+        select(session, word)
+        for _ in range(word.length):
+            session.backspace()
+            assert_counters(session)
+    session.load_letters(bytes(puzzle.solution))
+    assert_counters(session)
+    assert session.is_solved()